@@ -0,0 +1,206 @@
+from datetime import datetime, timezone
+from typing import Dict
+
+import numpy as np
+
+from columnar_store import StatsView
+from desc_stats import RunningStats
+from git_log import GitLog
+from knowledge import main_authors
+from module_index import ModuleIndex
+from util import timer, to_days
+
+
+def get_module_map(config):
+    return ModuleIndex(config)
+
+
+def get_age(stats, inverse=False):
+    def f(value):
+        return 1 / value if inverse else value
+
+    return {
+        name:
+        f(to_days(datetime.now(tz=timezone.utc) - stats[name]['last_change']))
+        for name in stats
+    }
+
+
+@timer
+def add_stats_for_module(module_stats, file_stats, module_map):
+    for filename, data in file_stats.items():
+        module = module_map(filename)
+        module_stats[module]['loc'] += data['loc']
+        module_stats[module]['lines'] += data['lines']
+        module_stats[module]['complexity'] += data['complexity']
+        module_stats[module]['complexity_max'] = max(
+            module_stats[module]['complexity_max'], data['complexity'])
+        module_stats[module]['proximity'] += data['proximity']
+        module_stats[module]['proximity_max'] = max(
+            module_stats[module]['proximity_max'], data['proximity'])
+    for data in module_stats.values():
+        data['mean_complexity'] = data['complexity'] / data['lines']
+        data['mean_proximity'] = data['proximity'] / data['revisions']
+
+
+class LastChanges:
+    """ The rows of each file of full_stats in commit time order, to look
+        up the last change of a file before a time without a pass over
+        all its rows. Stats read from columns (see columnar_store) are
+        indexed from the columns and their rows are read on lookup.
+    """
+    def __init__(self, full_stats, git_log: GitLog) -> None:
+        self._git_log = git_log
+        if isinstance(full_stats, StatsView):
+            filenames = full_stats.column('stat_files').tolist()
+            offsets = full_stats.column('stat_offsets')
+            shas, inverse = np.unique(full_stats.column('stat_sha'),
+                                      return_inverse=True)
+            shas = shas.tolist()
+            times = np.array(
+                [git_log.get_time_from_sha(sha).timestamp() for sha in shas],
+                dtype=np.float64)[inverse]
+            self._rows_at = full_stats.rows_at
+        else:
+            filenames = list(full_stats)
+            offsets = np.cumsum([0] +
+                                [len(data) for data in full_stats.values()])
+            shas = [sha for data in full_stats.values() for sha in data]
+            inverse = np.arange(len(shas))
+            times = np.array(
+                [git_log.get_time_from_sha(sha).timestamp() for sha in shas],
+                dtype=np.float64)
+            rows = [
+                row for data in full_stats.values() for row in data.values()
+            ]
+            self._rows_at = lambda indices: [rows[idx] for idx in indices]
+        # the rows of each file ordered by time, equal times keep their order
+        order = np.lexsort(
+            (times, np.repeat(np.arange(len(filenames)), np.diff(offsets))))
+        self._shas = [shas[idx] for idx in inverse[order].tolist()]
+        self._times = times[order]
+        self._rows = order.tolist()
+        self._files = {
+            filename: (begin, end)
+            for filename, begin, end in zip(filenames, offsets[:-1].tolist(),
+                                            offsets[1:].tolist())
+        }
+
+    def __contains__(self, filename) -> bool:
+        begin, end = self._files.get(filename, (0, 0))
+        return begin < end
+
+    def _last(self, filename: str, end: datetime) -> int:
+        begin, stop = self._files.get(filename, (0, 0))
+        times = self._times[begin:stop]
+        idx = np.searchsorted(times, end.timestamp(), side='right') - 1
+        if idx < 0:
+            return -1
+        return begin + int(np.searchsorted(times, times[idx], side='left'))
+
+    def last_change(self, filename: str, end: datetime):
+        """ Returns the sha and the time of the last change of the file
+            until end, the first row of equal times, or (None, None).
+        """
+        idx = self._last(filename, end)
+        if idx < 0:
+            return None, None
+        sha = self._shas[idx]
+        return sha, self._git_log.get_time_from_sha(sha)
+
+    def last_rows(self, filenames, end: datetime) -> Dict[str, tuple]:
+        """ Returns the row and the time of the last change until end of
+            each file with one, read at once.
+        """
+        found = [(filename, idx) for filename in filenames
+                 for idx in (self._last(filename, end), ) if idx >= 0]
+        rows = self._rows_at([self._rows[idx] for _, idx in found])
+        return {
+            filename: (row, self._git_log.get_time_from_sha(self._shas[idx]))
+            for (filename, idx), row in zip(found, rows)
+        }
+
+
+@timer
+def get_current_stats(full_stats,
+                      git_log: GitLog,
+                      begin: datetime,
+                      end: datetime,
+                      window=None,
+                      last_changes: LastChanges = None):
+    """ Returns the stats of all files in the repository for the period.
+        A SlidingWindow moved to the period provides the revisions,
+        proximities and authors without a pass over the period, and
+        last_changes the last row of each file. Each file then costs a
+        few lookups, the table of all files is still built per call.
+    """
+    stats = window.revisions() if window else git_log.get_revisions_only(
+        begin=begin, end=end)
+    files = git_log.get_files_in_repository()
+    for key in [key for key in stats if key not in files]:
+        del stats[key]
+    if window and last_changes is None:
+        last_changes = LastChanges(full_stats, git_log)
+    if window:
+        last_rows = last_changes.last_rows(
+            [filename for filename in files if filename in last_changes], end)
+    for filename in files:
+        if window:
+            if filename not in last_changes:
+                continue
+            row, last_change_time = last_rows.get(filename, (None, None))
+            proximity = window.proximity(filename)
+            authors = main_authors(window.authors(filename))
+        else:
+            data = full_stats.get(filename)
+            if not data:
+                continue
+            last_sha, last_change_time = None, None
+            proximity_stats = RunningStats()
+            for sha, row in data.items():
+                t = git_log.get_time_from_sha(sha)
+                if t > end:
+                    continue
+                if last_change_time is None or t > last_change_time:
+                    last_sha, last_change_time = sha, t
+                if begin <= t:
+                    proximity_stats.add(row['proximity'])
+            proximity = {
+                'proximity': proximity_stats.total,
+                'mean_proximity': proximity_stats.mean(),
+                'proximity_sd': proximity_stats.sd(),
+                'proximity_max': proximity_stats.max_value()
+            }
+            authors = git_log.get_main_authors(filename=filename)
+            row = None if last_sha is None else data[last_sha]
+        if row is None:
+            stats[filename].update({
+                'last_change': 0,
+                'loc': 0,
+                'lines': 0,
+                'complexity': 0,
+                'mean_complexity': 0,
+                'complexity_sd': 0,
+                'complexity_max': 0,
+                'proximity': 0,
+                'mean_proximity': 0,
+                'proximity_sd': 0,
+                'proximity_max': 0,
+                'authors': ({}, 0)
+            })
+            continue
+        complexity = row['complexity']
+        lines = row['lines']
+        stats[filename].update({
+            'last_change': last_change_time,
+            'loc': lines,  # FIXME
+            'lines': lines,
+            'complexity': complexity['total'],
+            'mean_complexity': complexity['mean'],
+            'complexity_sd': complexity['sd'],
+            'complexity_max': complexity['max'],
+            **proximity,
+            'authors': authors
+        })
+
+    return stats
@@ -0,0 +1,13 @@
+from model import get_model
+from projects import get_registry
+
+## Lifecycle hooks of the bokeh server application in this directory.
+##
+## The analysis model of the first project is loaded while the server
+## starts instead of in the first session, so that all sessions start
+## from the shared commit index, stats and default time window.
+##
+
+
+def on_server_loaded(server_context):
+    get_model(get_registry().names()[0]).warm_up()
@@ -0,0 +1,139 @@
+#!/bin/env python
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import stats_cache
+from columnar_store import update_columns
+from git_log import GitLog
+from model import AnalysisModel
+from projects import Project, complete_config
+
+## Measures how the throughput of the dashboard's window computation
+## scales with the number of server processes. Each worker process loads
+## the project like a bokeh server process does, either from the json
+## caches or from the mapped columns, and computes the stats of random
+## time windows until the time is up. Reports the windows per second of
+## all workers, the load time per worker and the proportional set size
+## (PSS) of all workers, which counts pages shared between the workers
+## once.
+##
+## Run the program as:
+##
+##  python benchmarks/load_test.py --root repo --stats-path stats --procs 1 2 4
+##
+
+
+def proportional_set_size() -> int:
+    """ Returns the PSS of the process in bytes, 0 if unknown. """
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as smaps:
+            for line in smaps:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def load_project(config: dict, source: str):
+    if source == 'columns':
+        return Project(config)
+    return SimpleNamespace(
+        name=config['project'],
+        config=config,
+        git_log=GitLog(root=config['path'],
+                       commits=stats_cache.load_commits(config['stats_path']),
+                       cache_dir=config['stats_path']),
+        full_stats=stats_cache.load_stats(config['stats_path']))
+
+
+def worker(config: dict, source: str, seconds: float, seed: int, barrier,
+           results):
+    tic = time.perf_counter()
+    model = AnalysisModel(load_project(config, source))
+    load_seconds = time.perf_counter() - tic
+    times = model.git_log._timestamps
+    rng = np.random.default_rng(seed=seed)
+    barrier.wait()
+    n_windows = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        first, last = np.sort(rng.integers(0, len(times), 2))
+        model.window_stats(
+            begin=datetime.fromtimestamp(times[first], tz=timezone.utc),
+            end=datetime.fromtimestamp(times[last], tz=timezone.utc))
+        n_windows += 1
+    results.put({
+        'load_seconds': load_seconds,
+        'windows': n_windows,
+        'pss': proportional_set_size()
+    })
+
+
+def run_load_test(config: dict, source: str, procs, seconds: float) -> dict:
+    if source == 'columns':
+        update_columns(config['stats_path'])
+    results = {}
+    for n_procs in procs:
+        barrier = multiprocessing.Barrier(n_procs)
+        queue = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=worker,
+                                    args=(config, source, seconds, seed,
+                                          barrier, queue))
+            for seed in range(n_procs)
+        ]
+        for process in workers:
+            process.start()
+        runs = [queue.get() for _ in workers]
+        for process in workers:
+            process.join()
+        results[n_procs] = {
+            'windows_per_second':
+            sum(run['windows'] for run in runs) / seconds,
+            'load_seconds': max(run['load_seconds'] for run in runs),
+            'pss_mb': sum(run['pss'] for run in runs) / 2**20
+        }
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Measures the scaling with the number of processes.')
+    parser.add_argument('--root', required=True, help='repo root dir')
+    parser.add_argument('--stats-path',
+                        required=True,
+                        help='directory of the cache files')
+    parser.add_argument('--source',
+                        choices=['columns', 'json'],
+                        default='columns')
+    parser.add_argument('--procs', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--seconds', type=float, default=10.0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    config = complete_config({
+        'project': os.path.basename(os.path.abspath(args.root)),
+        'path': args.root,
+        'stats_path': args.stats_path,
+        'modules': {}
+    })
+    print(
+        json.dumps(run_load_test(config=config,
+                                 source=args.source,
+                                 procs=args.procs,
+                                 seconds=args.seconds),
+                   indent=2))
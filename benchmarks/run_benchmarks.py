@@ -0,0 +1,192 @@
+#!/bin/env python
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import instrument
+import stats_cache
+from analysis import get_current_stats
+from git_data import add_parents_and_children, get_commit_list
+from git_log import GitLog, get_full_log
+from git_runner import get_runner
+from miner.complexity_calculations import calculate_complexity_in
+from stats import get_complexity, get_proximities_for_file
+from update_stats import compute_stats
+
+from synthetic_repo import create_repository
+
+## Times the stages of the analysis pipeline on a synthetic repository
+## and reports the results as JSON.
+##
+## Run the program as:
+##
+##  python benchmarks/run_benchmarks.py --commits 500 --files 100 --output bench.json
+##
+
+
+class Timings:
+    def __init__(self, repeat: int) -> None:
+        self.repeat = repeat
+        self.stages = {}
+
+    def __call__(self, name: str, func, setup=None):
+        """ Runs func repeat times and records the first and the fastest
+            run. setup runs untimed before each run.
+        """
+        times = []
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            tic = time.perf_counter()
+            value = func()
+            times.append(time.perf_counter() - tic)
+        self.stages[name] = {
+            'first': times[0],
+            'min': min(times),
+            'mean': sum(times) / len(times),
+            'repeat': len(times)
+        }
+        return value
+
+
+def _crimescene_version():
+    return subprocess.run(
+        ['git', 'describe', '--always', '--dirty'],
+        cwd=os.path.dirname(os.path.realpath(__file__)),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL).stdout.decode('utf-8').strip()
+
+
+def run_benchmarks(root: str, repeat: int = 1):
+    timed = Timings(repeat=repeat)
+
+    git_log_str = timed('get_full_log', lambda: get_full_log(root=root))
+    commits = timed('get_commit_list', lambda: get_commit_list(git_log_str))
+
+    def link_commits():
+        for commit in commits:
+            commit.parents = []
+            commit.children = []
+            commit.child_shas = []
+        add_parents_and_children(commits)
+
+    timed('add_parents_and_children', link_commits)
+
+    def _get_complexity(filename: str, sha: str):
+        return get_complexity(root=root, filename=filename, sha=sha)
+
+    def _get_proximity(filename: str, sha: str, previous_sha):
+        if previous_sha is None:
+            return 0
+        return get_proximities_for_file(root=root,
+                                        filename=filename,
+                                        sha=sha,
+                                        previous_sha=previous_sha)
+
+    stats = timed(
+        'compute_stats', lambda: compute_stats(
+            commits=commits,
+            get_loc=lambda filename, sha: 0,
+            get_complexity=_get_complexity,
+            get_proximity=_get_proximity))
+
+    timed('store_commits', lambda: stats_cache.store_commits(commits))
+    timed('store_stats', lambda: stats_cache.store_stats(stats))
+    commits = timed('load_commits', stats_cache.load_commits)
+    full_stats = timed('load_stats', stats_cache.load_stats)
+
+    git_log = GitLog(root=root, commits=commits)
+    end = commits[-1].creation_time
+    begin = end - 0.3 * (end - commits[0].creation_time)
+    timed(
+        'get_current_stats', lambda: get_current_stats(
+            full_stats=full_stats, git_log=git_log, begin=begin, end=end))
+
+    most_changed = Counter(change.filename for commit in commits
+                           for change in commit.changes).most_common(1)[0][0]
+    timed(
+        'get_couplings', lambda: git_log.get_couplings(
+            filename=most_changed, begin=begin, end=end))
+    # the proximities of the diffs stay cached, the first run computes them
+    timed('read_proximities_from',
+          lambda: git_log.read_proximities_from(begin=begin, end=end),
+          setup=git_log.clear_window_caches)
+
+    sources = []
+    for filename in git_log.get_files_in_repository():
+        if filename:
+            with open(os.path.join(root, filename), 'r') as source:
+                sources.append(source.read())
+    timed('calculate_complexity_in',
+          lambda: [calculate_complexity_in(source) for source in sources])
+    return timed.stages
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmarks the analysis pipeline.')
+    parser.add_argument('--commits', type=int, default=200)
+    parser.add_argument('--files', type=int, default=50)
+    parser.add_argument('--rename-rate', type=float, default=0.02)
+    parser.add_argument('--lines', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write results to this file')
+    parser.add_argument('--trace',
+                        help='write a Chrome trace of all spans to this file')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    parameters = {
+        'commits': args.commits,
+        'files': args.files,
+        'rename_rate': args.rename_rate,
+        'lines': args.lines,
+        'seed': args.seed,
+        'repeat': args.repeat
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.trace:
+            instrument.enable()
+        root = create_repository(path=os.path.join(tmp_dir, 'repo'),
+                                 n_commits=args.commits,
+                                 n_files=args.files,
+                                 rename_rate=args.rename_rate,
+                                 lines_per_file=args.lines,
+                                 seed=args.seed) + '/'
+        work_dir = os.path.join(tmp_dir, 'cache')
+        os.makedirs(work_dir)
+        cwd = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            stages = run_benchmarks(root=root, repeat=args.repeat)
+        finally:
+            os.chdir(cwd)
+        if args.trace:
+            instrument.export(args.trace, chrome=True)
+
+    result = json.dumps(
+        {
+            'version': _crimescene_version(),
+            'python': platform.python_version(),
+            'parameters': parameters,
+            'stages': stages,
+            'git': get_runner().latencies()
+        },
+        indent=2)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(result)
+    else:
+        print(result)
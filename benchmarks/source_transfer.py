@@ -0,0 +1,123 @@
+#!/bin/env python
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from bokeh.document import Document
+from bokeh.models import ColumnDataSource
+from bokeh.protocol import Protocol
+
+from source_data import float_column, int_column, time_column
+
+## Measures the bytes and the time of the websocket message that updates
+## a ColumnDataSource, once with Python lists and once with typed NumPy
+## arrays, for a file table and a daily churn series of the dashboard's
+## size.
+##
+## Run the program as:
+##
+##  python benchmarks/source_transfer.py --files 30000 --days 3650
+##
+
+FLOAT_COLUMNS = [
+    'complexity', 'mean_complexity', 'complexity_sd', 'complexity_max',
+    'proximity', 'mean_proximity', 'proximity_sd', 'proximity_max', 'age',
+    'churn_per_line', 'size', 'color_value'
+]
+INT_COLUMNS = ['loc', 'revisions', 'lines', 'soc', 'churn', 'n_authors']
+
+
+def file_table(n_files: int, rng) -> dict:
+    data = {'module': [f'src/module_{idx % 50}/file_{idx}.cpp'
+                       for idx in range(n_files)]}
+    for name in INT_COLUMNS:
+        data[name] = int_column(rng.integers(0, 5000, n_files))
+    for name in FLOAT_COLUMNS:
+        data[name] = float_column(rng.random(n_files) * 100)
+    return data
+
+
+def churn_series(n_days: int, rng) -> dict:
+    start = datetime(year=2015, month=1, day=1, tzinfo=timezone.utc)
+    return {
+        'x':
+        time_column(start + timedelta(days=day) for day in range(n_days)),
+        'added': int_column(rng.integers(0, 500, n_days)),
+        'removed': int_column(rng.integers(0, 500, n_days)),
+        'loc': int_column(rng.integers(0, 10**6, n_days))
+    }
+
+
+def as_lists(data: dict) -> dict:
+    """ Returns the columns as the lists of Python numbers, datetimes and
+        strings the sources were filled with before.
+    """
+    return {
+        name: column.astype(object).tolist() if isinstance(
+            column, np.ndarray) else column
+        for name, column in data.items()
+    }
+
+
+def measure_update(data: dict, repeat: int) -> dict:
+    """ Returns the size in bytes and the best time in seconds of setting
+        the data of an attached source and encoding the message.
+    """
+    seconds = []
+    for _ in range(repeat):
+        document = Document()
+        source = ColumnDataSource(data={name: [] for name in data})
+        document.add_root(source)
+        events = []
+        document.on_change(events.append)
+        tic = time.perf_counter()
+        source.data = data
+        message = Protocol().create('PATCH-DOC', events, use_buffers=True)
+        seconds.append(time.perf_counter() - tic)
+    size = len(message.header_json) + len(message.metadata_json) + len(
+        message.content_json) + sum(
+            len(payload) for _, payload in message.buffers)
+    return {'bytes': size, 'seconds': min(seconds)}
+
+
+def run_source_transfer_benchmark(n_files: int, n_days: int,
+                                  repeat: int) -> dict:
+    rng = np.random.default_rng(seed=0)
+    results = {}
+    for name, data in [('file_table', file_table(n_files, rng)),
+                       ('churn_series', churn_series(n_days, rng))]:
+        lists = measure_update(as_lists(data), repeat=repeat)
+        arrays = measure_update(data, repeat=repeat)
+        results[name] = {
+            'lists': lists,
+            'arrays': arrays,
+            'size_ratio': arrays['bytes'] / lists['bytes'],
+            'speedup': lists['seconds'] / arrays['seconds']
+        }
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Compares the websocket transfer of lists and arrays.')
+    parser.add_argument('--files', type=int, default=30000)
+    parser.add_argument('--days', type=int, default=3650)
+    parser.add_argument('--repeat', type=int, default=3)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(
+        json.dumps(run_source_transfer_benchmark(n_files=args.files,
+                                                 n_days=args.days,
+                                                 repeat=args.repeat),
+                   indent=2))
@@ -0,0 +1,102 @@
+#!/bin/env python
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+## Measures cold import times of the entry points in fresh interpreters
+## and checks them against their budgets.
+##
+## Run the program as:
+##
+##  python benchmarks/startup.py --repeat 5
+##
+## Exits with 1 if an entry point exceeds its budget or loads one of the
+## visualization libraries it must not depend on.
+##
+
+VISUALIZATION_MODULES = ['bokeh', 'circlify', 'wordcloud', 'matplotlib']
+ENTRY_POINTS = {
+    'updater': {
+        'modules': ['update_cache'],
+        'budget': 0.5,
+        'forbidden': VISUALIZATION_MODULES
+    },
+    'report': {
+        'modules': ['report'],
+        'budget': 0.5,
+        'forbidden': VISUALIZATION_MODULES
+    },
+    'dashboard': {
+        'modules': [
+            'bokeh.plotting', 'projects', 'analysis', 'color_map',
+            'circular_package', 'file_analysis', 'long_term_plot',
+            'get_wordcloud'
+        ],
+        'budget': 2.5,
+        'forbidden': ['circlify', 'wordcloud']
+    }
+}
+
+MEASURE_CODE = '''
+import json, sys, time
+tic = time.perf_counter()
+for module in {modules!r}:
+    __import__(module)
+elapsed = time.perf_counter() - tic
+loaded = sorted({{name.split('.')[0] for name in sys.modules}} & set({forbidden!r}))
+print(json.dumps({{'seconds': elapsed, 'loaded': loaded}}))
+'''
+
+
+def measure(modules, forbidden) -> dict:
+    output = subprocess.run(
+        [
+            sys.executable, '-c',
+            MEASURE_CODE.format(modules=modules, forbidden=forbidden)
+        ],
+        stdout=subprocess.PIPE,
+        cwd=ROOT,
+        check=True).stdout
+    return json.loads(output)
+
+
+def run_startup_benchmark(repeat: int, budget_scale: float = 1.0) -> dict:
+    results = {}
+    for name, entry_point in ENTRY_POINTS.items():
+        runs = [
+            measure(entry_point['modules'], entry_point['forbidden'])
+            for _ in range(repeat)
+        ]
+        seconds = min(run['seconds'] for run in runs)
+        budget = budget_scale * entry_point['budget']
+        loaded = runs[0]['loaded']
+        results[name] = {
+            'seconds': seconds,
+            'budget': budget,
+            'forbidden_loaded': loaded,
+            'ok': seconds <= budget and not loaded
+        }
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Checks cold import times against their budgets.')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--budget-scale',
+                        type=float,
+                        default=1.0,
+                        help='factor for all budgets, e.g. for slow machines')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = run_startup_benchmark(repeat=args.repeat,
+                                    budget_scale=args.budget_scale)
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if all(result['ok'] for result in results.values()) else 1)
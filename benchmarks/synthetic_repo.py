@@ -0,0 +1,123 @@
+#!/bin/env python
+import argparse
+import os
+import random
+import subprocess
+from datetime import datetime, timedelta, timezone
+
+## Generates a synthetic git repository for benchmarking.
+##
+## Run the program as:
+##
+##  python benchmarks/synthetic_repo.py --path /tmp/repo --commits 500 --files 100
+##
+
+AUTHORS = [
+    'Ada Lovelace', 'Alan Turing', 'Barbara Liskov', 'Donald Knuth',
+    'Edsger Dijkstra', 'Grace Hopper'
+]
+START = datetime(year=2018, month=1, day=1, tzinfo=timezone.utc)
+
+
+def _git(path: str, args, env=None):
+    subprocess.run(['git'] + args,
+                   cwd=path,
+                   env=env,
+                   check=True,
+                   stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL)
+
+
+def _source_line(rng: random.Random, idx: int):
+    indentation = '    ' * rng.randint(0, 4)
+    if idx % 7 == 0:
+        return f'{indentation}// comment {rng.randint(0, 1000)}'
+    return f'{indentation}int value_{idx} = {rng.randint(0, 1000)};'
+
+
+def _write_file(path: str, rng: random.Random, n_lines: int):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as source:
+        source.write('\n'.join(
+            _source_line(rng, idx) for idx in range(n_lines)) + '\n')
+
+
+def _modify_file(path: str, rng: random.Random):
+    with open(path, 'r') as source:
+        lines = source.read().split('\n')
+    for _ in range(rng.randint(1, 5)):
+        idx = rng.randrange(len(lines))
+        if rng.random() < 0.5 and len(lines) > 1:
+            lines.pop(idx)
+        else:
+            lines.insert(idx, _source_line(rng, rng.randint(0, 1000)))
+    with open(path, 'w') as source:
+        source.write('\n'.join(lines))
+
+
+def _new_filename(rng: random.Random, idx: int):
+    return f'src/module_{rng.randint(0, 9)}/file_{idx}.cpp'
+
+
+def create_repository(path: str,
+                      n_commits: int = 200,
+                      n_files: int = 50,
+                      rename_rate: float = 0.02,
+                      lines_per_file: int = 100,
+                      seed: int = 0):
+    """ Creates a git repository with n_commits commits on branch master.
+        The first commit adds n_files files with about lines_per_file
+        lines each, every later commit modifies a few files and renames
+        one of them with probability rename_rate.
+    """
+    rng = random.Random(seed)
+    os.makedirs(path, exist_ok=True)
+    _git(path, ['-c', 'init.defaultBranch=master', 'init', '-q'])
+    files = [_new_filename(rng, idx) for idx in range(n_files)]
+    for filename in files:
+        _write_file(os.path.join(path, filename), rng,
+                    max(1, int(rng.gauss(lines_per_file,
+                                         lines_per_file / 4))))
+
+    for idx in range(n_commits):
+        if idx > 0:
+            for filename in rng.sample(files, min(len(files),
+                                                  rng.randint(1, 5))):
+                _modify_file(os.path.join(path, filename), rng)
+            if rng.random() < rename_rate:
+                file_idx = rng.randrange(len(files))
+                new_filename = _new_filename(rng, n_files + idx)
+                os.makedirs(os.path.dirname(os.path.join(path, new_filename)),
+                            exist_ok=True)
+                _git(path, ['mv', files[file_idx], new_filename])
+                files[file_idx] = new_filename
+        date = (START + timedelta(hours=6 * idx)).isoformat()
+        author = rng.choice(AUTHORS)
+        env = dict(os.environ,
+                   GIT_AUTHOR_NAME=author,
+                   GIT_AUTHOR_EMAIL='author@example.com',
+                   GIT_COMMITTER_NAME=author,
+                   GIT_COMMITTER_EMAIL='author@example.com',
+                   GIT_AUTHOR_DATE=date,
+                   GIT_COMMITTER_DATE=date)
+        _git(path, ['add', '-A'])
+        _git(path, ['commit', '-q', '-m', f'Change number {idx}'], env=env)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Generates a synthetic git repository.')
+    parser.add_argument('--path', required=True, help='repository path')
+    parser.add_argument('--commits', type=int, default=200)
+    parser.add_argument('--files', type=int, default=50)
+    parser.add_argument('--rename-rate', type=float, default=0.02)
+    parser.add_argument('--lines', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    create_repository(path=args.path,
+                      n_commits=args.commits,
+                      n_files=args.files,
+                      rename_rate=args.rename_rate,
+                      lines_per_file=args.lines,
+                      seed=args.seed)
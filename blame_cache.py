@@ -0,0 +1,238 @@
+import os
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+import stats_cache
+from git_runner import get_runner
+from util import timer
+
+## Line ownership of files at any revision.
+##
+## A file is blamed once with `git blame --incremental` at the first
+## revision it is asked for. Later revisions are derived from the cached
+## one by applying the -U0 hunks of the commits in between, attributing
+## all added lines to the commit author. Renamed or recreated files are
+## blamed again. The author of each line is stored run-length encoded
+## per file and revision in the stats store.
+##
+
+HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+
+def parse_blame(lines: Iterable[str]) -> List[Tuple[str, int, int]]:
+    """ Returns (author, first final line, number of lines) for the
+        groups of a `git blame --incremental` output.
+    """
+    authors = {}
+    groups = []
+    sha = None
+    for line in lines:
+        if line.startswith('author '):
+            authors[sha] = line[7:].rstrip('\n')
+        elif line.startswith('filename '):
+            sha = None
+        elif sha is None:
+            sha, _, final_line, n_lines = line.split()
+            groups.append((sha, int(final_line), int(n_lines)))
+    return [(authors[sha], final_line, n_lines)
+            for sha, final_line, n_lines in groups]
+
+
+def parse_hunk(line: str) -> Tuple[int, int, int, int]:
+    """ Returns old start, old count, new start and new count of a hunk
+        header.
+    """
+    match = HUNK_HEADER.match(line)
+    old_start, old_count, new_start, new_count = match.groups()
+    return (int(old_start), 1 if old_count is None else int(old_count),
+            int(new_start), 1 if new_count is None else int(new_count))
+
+
+def apply_hunks(owners: np.ndarray, hunks: List[Tuple[int, int, int, int]],
+                author_id: int) -> np.ndarray:
+    """ Returns the line owners after a diff with the given -U0 hunks,
+        the added lines belong to author_id.
+    """
+    pieces = []
+    position = 0
+    for old_start, old_count, _, new_count in hunks:
+        # pure insertions are placed after old_start
+        begin = old_start if old_count == 0 else old_start - 1
+        pieces.append(owners[position:begin])
+        pieces.append(np.full(new_count, author_id, dtype=owners.dtype))
+        position = begin + old_count
+    pieces.append(owners[position:])
+    return np.concatenate(pieces)
+
+
+def _encode(owners: np.ndarray) -> List[List[int]]:
+    if not len(owners):
+        return []
+    starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+    counts = np.diff(np.r_[starts, len(owners)])
+    return [[int(owner), int(count)]
+            for owner, count in zip(owners[starts], counts)]
+
+
+def _decode(runs: List[List[int]]) -> np.ndarray:
+    if not runs:
+        return np.zeros(0, dtype=np.int32)
+    owners, counts = zip(*runs)
+    return np.repeat(np.array(owners, dtype=np.int32), counts)
+
+
+class BlameCache:
+    """ Author ids per line of files, keyed by file and commit sha.
+        Missing files are blamed or updated on a thread pool of git
+        workers and persisted in the stats store.
+    """
+    def __init__(self,
+                 root: str,
+                 path: str = stats_cache.BLAME_NAME,
+                 max_workers: int = None) -> None:
+        self._root = root
+        self._path = path
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._lock = threading.Lock()
+        data = stats_cache.load_blame(path) if path and os.path.isfile(
+            path) else {
+                'authors': [],
+                'files': {}
+            }
+        self.authors: List[str] = data['authors']
+        self._author_ids = {
+            author: author_id
+            for author_id, author in enumerate(self.authors)
+        }
+        self._files: Dict[str, Dict[str, List[List[int]]]] = data['files']
+
+    def _author_id(self, author: str) -> int:
+        with self._lock:
+            author_id = self._author_ids.get(author)
+            if author_id is None:
+                author_id = len(self.authors)
+                self.authors.append(author)
+                self._author_ids[author] = author_id
+            return author_id
+
+    def _resolve(self, rev: str) -> str:
+        info = get_runner().info(self._root, f'{rev}^{{commit}}')
+        return None if info is None else info[0]
+
+    def _blame(self, filename: str, sha: str) -> np.ndarray:
+        output = get_runner().run(self._root, [
+            'git', 'blame', '--incremental', '--porcelain', sha, '--',
+            filename
+        ]).decode('utf-8', errors='replace')
+        groups = parse_blame(output.splitlines())
+        n_lines = max((line + n - 1 for _, line, n in groups), default=0)
+        owners = np.zeros(n_lines, dtype=np.int32)
+        for author, line, n in groups:
+            owners[line - 1:line - 1 + n] = self._author_id(author)
+        return owners
+
+    def _on_first_parent_chain(self, base: str, sha: str) -> bool:
+        """ Whether base is reached from sha by following first parents. """
+        lines = get_runner().run(
+            self._root,
+            ['git', 'rev-list', '--first-parent', '--parents', sha,
+             f'^{base}']).split(b'\n')
+        lines = [line for line in lines if line]
+        return bool(lines) and lines[-1].split()[1:2] == [base.encode()]
+
+    def _update(self, filename: str, base: str, sha: str):
+        """ Applies the diffs of the first-parent commits (base, sha] to
+            the owners at base. Returns None if the file was recreated.
+        """
+        owners = _decode(self._files[filename][base])
+        author_id = None
+        hunks = []
+        for line in get_runner().stream(self._root, [
+                'git', 'log', '--first-parent', '-m', '--reverse', '-p',
+                '-U0', '--no-color', '--no-renames',
+                '--format=commit %aN', f'{base}..{sha}', '--', filename
+        ]):
+            line = line.decode('utf-8', errors='replace')
+            if line.startswith('commit '):
+                if author_id is not None:
+                    owners = apply_hunks(owners, hunks, author_id)
+                author_id = self._author_id(line[7:].rstrip('\n'))
+                hunks = []
+            elif line.startswith('@@ '):
+                hunks.append(parse_hunk(line))
+            elif line.startswith(('new file mode', 'deleted file mode')):
+                return None
+        if author_id is not None:
+            owners = apply_hunks(owners, hunks, author_id)
+        return owners
+
+    def _compute(self, filename: str, sha: str,
+                 on_chain: Dict[str, bool]) -> np.ndarray:
+        for base in reversed(list(self._files.get(filename, {}))):
+            if on_chain[base]:
+                owners = self._update(filename, base, sha)
+                if owners is not None:
+                    return owners
+                break
+        return self._blame(filename, sha)
+
+    @timer
+    def owners(self, filenames: List[str],
+               rev: str = 'HEAD') -> Dict[str, np.ndarray]:
+        """ Returns the author id of each line of the files at rev. """
+        sha = self._resolve(rev)
+        if sha is None:
+            return {filename: np.zeros(0, dtype=np.int32)
+                    for filename in filenames}
+        missing = [
+            filename for filename in filenames
+            if sha not in self._files.get(filename, {})
+        ]
+        if missing:
+            # the files share their cached revisions, each is checked once
+            bases = list({
+                base
+                for filename in missing
+                for base in self._files.get(filename, {})
+            })
+            with ThreadPoolExecutor(max_workers=self._max_workers) as pool:
+                on_chain = dict(
+                    zip(
+                        bases,
+                        pool.map(
+                            lambda base: self._on_first_parent_chain(
+                                base, sha), bases)))
+                results = pool.map(
+                    lambda filename: self._compute(filename, sha, on_chain),
+                    missing)
+                for filename, owners in zip(missing, results):
+                    self._files.setdefault(filename, {})[sha] = _encode(owners)
+            self.store()
+        return {
+            filename: _decode(self._files[filename][sha])
+            for filename in filenames
+        }
+
+    def ownership(self, filenames: List[str],
+                  rev: str = 'HEAD') -> Dict[str, Dict[str, int]]:
+        """ Returns the number of lines per author of the files at rev. """
+        return {
+            filename: {
+                self.authors[author_id]: count
+                for author_id, count in Counter(owners.tolist()).items()
+            }
+            for filename, owners in self.owners(filenames, rev).items()
+        }
+
+    def store(self):
+        if self._path:
+            stats_cache.store_blame(
+                {
+                    'authors': self.authors,
+                    'files': self._files
+                }, path=self._path)
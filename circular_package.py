@@ -1,10 +1,16 @@
 # from dataclasses import dataclass, field
+from collections import defaultdict
+
+import numpy as np
 from bokeh.plotting import figure
 from bokeh.models import ColumnDataSource, HoverTool, Text
-import circlify as circ
 from color_map import get_colors
 
 SCALE = 1
+# levels below the zoomed circle that are sent to the browser
+LOD_DEPTH = 2
+# minimal radius in pixels of labeled circles
+MIN_LABEL_RADIUS = 20
 
 # @dataclass
 # class Circle:
@@ -50,13 +56,51 @@ def is_file(circle):
     return circle.ex and 'children' not in circle.ex
 
 
-def get_full_name(a_circle, circles):
-    if a_circle.level <= 1:
-        return get_name(a_circle)
-    parent = next(circle for circle in circles
-                  if circle.level == a_circle.level -
-                  1 and in_circle((a_circle.x, a_circle.y), circle))
-    return get_full_name(parent, circles) + '/' + get_name(a_circle)
+def get_parents(circles) -> np.ndarray:
+    """ Returns the index of the enclosing circle of each circle, -1 for
+        the top level.
+    """
+    index_of = {id(circle.ex): idx for idx, circle in enumerate(circles)}
+    parents = np.full(len(circles), -1, dtype=np.int64)
+    for idx, circle in enumerate(circles):
+        for child in (circle.ex or {}).get('children', []):
+            child_idx = index_of.get(id(child))
+            if child_idx is not None:
+                parents[child_idx] = idx
+    for idx, a_circle in enumerate(circles):
+        if parents[idx] < 0 and a_circle.level > 1:
+            parents[idx] = next(
+                candidate for candidate, circle in enumerate(circles)
+                if circle.level == a_circle.level -
+                1 and in_circle((a_circle.x, a_circle.y), circle))
+    return parents
+
+
+def get_full_names(names, levels: np.ndarray, parents: np.ndarray):
+    full_names = list(names)
+    for idx in np.argsort(levels, kind='stable'):
+        if parents[idx] >= 0:
+            full_names[idx] = full_names[parents[idx]] + '/' + names[idx]
+    return full_names
+
+
+def visible_circles(levels: np.ndarray, parents: np.ndarray, children,
+                    focus: int) -> np.ndarray:
+    """ Returns the circles down to LOD_DEPTH levels below the focus
+        together with the focus and its enclosing circles.
+    """
+    if focus < 0:
+        return np.flatnonzero(levels <= LOD_DEPTH)
+    visible = []
+    parent = focus
+    while parent >= 0:
+        visible.append(parent)
+        parent = parents[parent]
+    layer = [focus]
+    for _ in range(LOD_DEPTH):
+        layer = [child for idx in layer for child in children[idx]]
+        visible.extend(layer)
+    return np.sort(np.array(visible, dtype=np.int64))
 
 
 def get_main_author(module, stats):
@@ -75,28 +119,54 @@ def get_main_author(module, stats):
 
 
 class CircularPackage:
+    """ Zoomable circle packing of the file hierarchy. Only the circles
+        of the zoomed circle down to LOD_DEPTH levels below are sent to
+        the browser, the children of a tapped circle are sent when it is
+        zoomed into. Labels are shown for circles of the next level that
+        are at least MIN_LABEL_RADIUS pixels large on screen.
+    """
     def __init__(self, data, color_data, stats, width: int, height: int,
                  selected_callback) -> None:
         self._data = data
         self._color_data = color_data
         self._stats = stats
         self._selected_callback = selected_callback
+        self._width = width
         self.source = ColumnDataSource(
             data=dict(x=[], y=[], color=[], radius=[], name=[], level=[]))
         self.source.selected.on_change('indices', self.update_selected)  # pylint: disable=no-member
         self.selected = []
-        self.full_names = []
         self.current_idx = None
         self.current_level = 0
         self.zoom_level = 0
-        self.max_level = 0
+        self.focus = -1
         self.text_source = ColumnDataSource(
             data=dict(x=[], y=[], color=[], text=[]))
-        self.circles = circ.circlify(self._data, show_enclosure=True)
-        for circle in self.circles:
-            circle.circle = circ._Circle(x=circle.circle.x,
-                                         y=0.93 * circle.circle.y,
-                                         r=circle.circle.r)
+        import circlify as circ
+        self.circles = [
+            circle
+            for circle in circ.circlify(self._data, show_enclosure=True)
+            if circle.level > 0
+        ]
+        self._x = np.array([circle.x for circle in self.circles])
+        self._y = 0.93 * np.array([circle.y for circle in self.circles])
+        self._r = np.array([circle.r for circle in self.circles])
+        self._levels = np.array([circle.level for circle in self.circles],
+                                dtype=np.int64)
+        self._names = [get_name(circle) for circle in self.circles]
+        self._is_file = np.array(
+            [bool(is_file(circle)) for circle in self.circles], dtype=bool)
+        self._parents = get_parents(self.circles)
+        self._children = defaultdict(list)
+        for idx, parent in enumerate(self._parents):
+            self._children[parent].append(idx)
+        self.full_names = get_full_names(self._names, self._levels,
+                                         self._parents)
+        self.max_level = int(self._levels.max(initial=0))
+        self._rows = np.zeros(0, dtype=np.int64)
+        self._colors = np.zeros(0, dtype=object)
+        self._alphas = np.zeros(0)
+        self._updating = False
         self.plot = figure(x_range=(-1, 1),
                            y_range=(-1, 1),
                            plot_width=width,
@@ -146,95 +216,92 @@ class CircularPackage:
         self.update_package(self._color_data, self._stats)
 
     def reset_selection(self):
+        self.current_idx = None
         self.current_level = 0
         self.zoom_level = 0
+        self.focus = -1
         self.plot.x_range.update(start=-1, end=1)
         self.plot.y_range.update(start=-1, end=1)
-        self.update_text_source()
+        self.update_sources()
         self._selected_callback()
 
     def update_selected(self, attr, old, new):
+        if self._updating:
+            return
         self.selected = new
         if not self.selected:
             self.reset_selection()
             return
 
-        new_level = max(self.source.data['level'][idx]
-                        for idx in self.selected)
-        self.current_level = new_level
-        self.zoom_level = self.current_level
-
-        try:
-            self.current_idx = next(
-                idx for idx in self.selected
-                if self.source.data['level'][idx] == self.current_level)
-        except StopIteration:
-            self.current_idx = None
+        circles = self._rows[[idx for idx in new if idx < len(self._rows)]]
+        if not len(circles):
             self.reset_selection()
+            return
+        self.current_idx = int(circles[np.argmax(self._levels[circles])])
+        self.current_level = int(self._levels[self.current_idx])
+        self.focus = self.current_idx
+        if self._is_file[self.focus]:
+            self.focus = int(self._parents[self.focus])
+        if self.focus < 0:
+            self.zoom_level = 0
+            self.plot.x_range.update(start=-1, end=1)
+            self.plot.y_range.update(start=-1, end=1)
         else:
-            x = self.source.data['x'][self.current_idx]
-            y = self.source.data['y'][self.current_idx]
-            r = self.source.data['radius'][self.current_idx]
-            is_file = self.source.data['is_file'][self.current_idx]
-            if is_file:
-                self.zoom_level = self.current_level - 1
-                zoom_idx = next(
-                    idx for idx in self.selected
-                    if self.source.data['level'][idx] == self.zoom_level)
-                x = self.source.data['x'][zoom_idx]
-                y = self.source.data['y'][zoom_idx]
-                r = self.source.data['radius'][zoom_idx]
-
+            self.zoom_level = int(self._levels[self.focus])
+            x = self._x[self.focus]
+            y = self._y[self.focus]
+            r = self._r[self.focus]
             self.plot.x_range.update(start=x - r, end=x + r)
             self.plot.y_range.update(start=y - r, end=y + r)
-            self._selected_callback()
+        self._selected_callback()
+        self.update_sources()
 
-        self.update_package(self._color_data, self._stats)
+    def _view_radius(self):
+        return 1.0 if self.focus < 0 else self._r[self.focus]
 
     def update_text_source(self):
         reference_level = min(self.zoom_level + 1, self.max_level)
-        self.text_source.data = dict(
-            x=[circle.circle.x for circle in self.circles if circle.level > 0],
-            y=[circle.circle.y for circle in self.circles if circle.level > 0],
-            text=[
-                get_name(circle) if circle.level == reference_level else ''
-                for circle in self.circles if circle.level > 0
-            ])
+        rows = self._rows
+        on_screen_radius = self._r[rows] * self._width / (
+            2 * self._view_radius())
+        labeled = rows[(self._levels[rows] == reference_level)
+                       & (on_screen_radius >= MIN_LABEL_RADIUS)]
+        self.text_source.data = dict(x=self._x[labeled],
+                                     y=self._y[labeled],
+                                     text=[self._names[idx] for idx in labeled])
+
+    def update_sources(self):
+        """ Sends the circles of the current zoom level to the browser. """
+        self._rows = visible_circles(self._levels, self._parents,
+                                     self._children, self.focus)
+        rows = self._rows
+        self._updating = True
+        try:
+            self.source.data = dict(
+                x=self._x[rows],
+                y=self._y[rows],
+                radius=self._r[rows],
+                name=[self._names[idx] for idx in rows],
+                full_name=[self.full_names[idx] for idx in rows],
+                is_file=self._is_file[rows],
+                author=[
+                    get_main_author(self.full_names[idx], stats=self._stats)
+                    for idx in rows
+                ],
+                level=self._levels[rows],
+                color=self._colors[rows].tolist(),
+                base_color=self._colors[rows].tolist(),
+                alpha=self._alphas[rows])
+            self.source.selected.indices = []
+        finally:
+            self._updating = False
+        self.update_text_source()
 
     def update_package(self, color_data, stats):
-        self.max_level = max(self.circles, key=lambda x: x.level).level
         self._color_data = color_data
-        self.full_names = [
-            get_full_name(circle, self.circles) for circle in self.circles
-            if circle.level > 0
-        ]
         self._stats = stats
-        author_list = [
-            get_main_author(get_full_name(circle, self.circles),
-                            stats=self._stats) for circle in self.circles
-            if circle.level > 0
-        ]
-        color_weights = [
-            self._color_data.get(name) or None for name in self.full_names
-        ]
-        colors = get_colors(color_weights)
-        alphas = [0.1 if color == 'white' else 0.8 for color in colors]
-        self.source.data = dict(
-            x=[circle.circle.x for circle in self.circles if circle.level > 0],
-            y=[circle.circle.y for circle in self.circles if circle.level > 0],
-            radius=[
-                circle.circle.r for circle in self.circles if circle.level > 0
-            ],
-            name=[
-                get_name(circle) for circle in self.circles if circle.level > 0
-            ],
-            is_file=[
-                is_file(circle) for circle in self.circles if circle.level > 0
-            ],
-            author=author_list,
-            level=[
-                circle.level for circle in self.circles if circle.level > 0
-            ],
-            color=colors,
-            alpha=alphas)
-        self.update_text_source()
\ No newline at end of file
+        self._colors = np.array(get_colors(
+            [self._color_data.get(name) or None for name in self.full_names]),
+                                dtype=object)
+        self._alphas = np.where(self._colors == 'white', 0.1, 0.8)
+        self.update_sources()
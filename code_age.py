@@ -0,0 +1,134 @@
+#!/bin/env python
+import argparse
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+import numpy as np
+
+import stats_cache
+from git_log import GitLog
+from transform.hierarchy import build_hierarchy
+from util import parse_date
+
+## Code age of all files as data for a D3.js enclosure diagram.
+##
+## The age is the number of months since the last change of a file and
+## is taken from the commit index. Weights decay exponentially with the
+## given half-life. Files changed within the half-life are colored
+## darkred, older ones DodgerBlue, files without history gray (see
+## transform/code_age_csv_as_enclosure_json.py).
+##
+## Run the program as:
+##
+##  python code_age.py --root ~/projects/repo --stats-path ~/.stats/repo \
+##      --halflife 6
+##
+
+SECONDS_PER_MONTH = 30.4375 * 24 * 3600
+RECENT_COLOR = 'darkred'
+STABLE_COLOR = 'DodgerBlue'
+UNKNOWN_COLOR = 'gray'
+
+
+def last_change_times(git_log: GitLog, end: datetime = None) -> np.ndarray:
+    """ Returns the timestamp of the last change up to end per file id,
+        NaN for files without changes.
+    """
+    _, hi = git_log.window(begin=git_log.first_commit_date(),
+                           end=end or datetime.now(tz=timezone.utc))
+    change_ids = git_log.identities.change_ids[:hi]
+    file_ids = np.fromiter((file_id for ids in change_ids for file_id in ids),
+                           dtype=np.int64)
+    times = np.repeat(
+        np.array([
+            commit.creation_time.timestamp()
+            for commit in git_log.commits[:hi]
+        ]), [len(ids) for ids in change_ids])
+    last_changes = np.full(git_log.identities.n_files, np.nan)
+    np.fmax.at(last_changes, file_ids, times)
+    return last_changes
+
+
+def age_in_months(last_changes: np.ndarray, now: datetime) -> np.ndarray:
+    return np.floor((now.timestamp() - last_changes) / SECONDS_PER_MONTH)
+
+
+def decay_weights(ages: np.ndarray, half_life: float):
+    """ Returns 1 / 2^(age / half_life) and the color of each age. """
+    weights = np.nan_to_num(np.exp2(-ages / half_life))
+    colors = np.where(np.isnan(ages), UNKNOWN_COLOR,
+                      np.where(ages < half_life, RECENT_COLOR, STABLE_COLOR))
+    return weights, colors
+
+
+def code_age_structure(git_log: GitLog,
+                       sizes: Dict[str, float],
+                       half_life: float,
+                       now: datetime = None):
+    """ Returns the enclosure structure of the files in sizes with their
+        size, decayed weight and color.
+    """
+    now = now or datetime.now(tz=timezone.utc)
+    names = list(sizes)
+    identities = git_log.identities
+    file_ids = np.array([identities.id_of(name) for name in names],
+                        dtype=np.float64)
+    known = ~np.isnan(file_ids)
+    last_changes = np.full(len(names), np.nan)
+    last_changes[known] = last_change_times(
+        git_log, end=now)[file_ids[known].astype(np.int64)]
+    weights, colors = decay_weights(age_in_months(last_changes, now),
+                                    half_life=half_life)
+    return build_hierarchy((name, {
+        'size': sizes[name],
+        'weight': float(weight),
+        'color': str(color)
+    }) for name, weight, color in zip(names, weights, colors))
+
+
+def latest_lines(full_stats, git_log: GitLog) -> Dict[str, int]:
+    """ Returns the number of lines of each file at its last change. """
+    return {
+        filename: max(((git_log.get_time_from_sha(sha), row['lines'])
+                       for sha, row in data.items() if git_log.has_sha(sha)),
+                      default=(None, 0))[1]
+        for filename, data in full_stats.items()
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Generates a JSON document suitable for enclosure '
+        'diagrams of the code age.')
+    parser.add_argument('--root', default='.', help='repo root dir')
+    parser.add_argument('--stats-path',
+                        default='.',
+                        help='directory of the cache files')
+    parser.add_argument('--halflife',
+                        type=float,
+                        default=1,
+                        help='Specifies the half life for a module in months')
+    parser.add_argument('--end', type=parse_date, help='date of the snapshot')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    git_log = GitLog(root=args.root,
+                     commits=stats_cache.load_commits(args.stats_path),
+                     cache_dir=args.stats_path)
+    files = git_log.get_files_in_repository()
+    sizes = {
+        filename: lines
+        for filename, lines in latest_lines(
+            stats_cache.load_stats(args.stats_path), git_log).items()
+        if filename in files
+    }
+    now = args.end + timedelta(days=1) if args.end else None
+    print(
+        json.dumps(
+            code_age_structure(git_log=git_log,
+                               sizes=sizes,
+                               half_life=args.halflife,
+                               now=now)))
@@ -1,22 +1,109 @@
+import numpy as np
+from bokeh.models import CustomJS, LinearColorMapper, LogColorMapper
 from bokeh.palettes import RdYlGn11
 
 COLORS = RdYlGn11
 N_COLORS = len(COLORS)
+NONE_COLOR = 'white'
+SCALES = ['linear', 'log', 'quantile']
+_PALETTE = np.array(COLORS + (NONE_COLOR, ))
 
 
-def get_colors(color_data):
-    min_color_data = min(datum for datum in color_data if datum is not None)
-    max_color_data = max(datum for datum in color_data if datum is not None)
-    dsoc = (max_color_data - min_color_data) / N_COLORS
-    color_idx_map = {(min_color_data + i * dsoc,
-                      min_color_data + (i + 1) * dsoc): i
-                     for i in range(N_COLORS)}
+def _as_array(color_data):
+    return np.array([np.nan if datum is None else datum for datum in color_data],
+                    dtype=np.float64)
 
-    def get_color(value):
-        if value is None:
-            return "white"
-        for range, idx in color_idx_map.items():
-            if range[0] <= value <= range[1]:
-                return COLORS[idx]
 
-    return [get_color(data) for data in color_data]
\ No newline at end of file
+def _scaled(values: np.ndarray, valid: np.ndarray, scale: str):
+    if scale == 'log':
+        scaled = np.full(len(values), np.nan)
+        scaled[valid] = np.log1p(values[valid] - values[valid].min())
+        return scaled
+    if scale == 'quantile':
+        scaled = np.full(len(values), np.nan)
+        sorted_values = np.sort(values[valid])
+        scaled[valid] = np.searchsorted(
+            sorted_values, values[valid], side='right') / len(sorted_values)
+        return scaled
+    return values
+
+
+def get_color_indices(color_data, scale: str = 'linear') -> np.ndarray:
+    """ Maps each value to one of N_COLORS equally sized bins between the
+        smallest and largest value, None is mapped to N_COLORS.
+    """
+    values = _as_array(color_data)
+    valid = ~np.isnan(values)
+    indices = np.full(len(values), N_COLORS, dtype=np.int64)
+    if not valid.any():
+        return indices
+    values = _scaled(values, valid, scale)
+    min_color_data = values[valid].min()
+    max_color_data = values[valid].max()
+    bins = np.linspace(min_color_data, max_color_data, N_COLORS + 1)[1:-1]
+    indices[valid] = np.digitize(values[valid], bins, right=True)
+    return indices
+
+
+def get_colors(color_data, scale: str = 'linear'):
+    return _PALETTE[get_color_indices(color_data, scale=scale)].tolist()
+
+
+def color_range(color_data):
+    values = _as_array(color_data)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return 0.0, 1.0
+    return float(values.min()), float(values.max())
+
+
+def get_color_mapper(color_data, scale: str = 'linear'):
+    """ Returns a color mapper for client-side color transforms of the
+        values in color_data.
+    """
+    low, high = color_range(color_data)
+    if scale == 'log':
+        return LogColorMapper(palette=COLORS,
+                              low=max(low, 1e-3),
+                              high=max(high, 1e-3),
+                              nan_color=NONE_COLOR)
+    return LinearColorMapper(palette=COLORS,
+                             low=low,
+                             high=high,
+                             nan_color=NONE_COLOR)
+
+
+RECOLOR_CODE = '''
+const name = cb_obj.value;
+const values = source.data[field_names[name] || name];
+const color_values = capped_log.includes(name) ?
+    Array.from(values, (value) => Math.min(Math.log(1 + value), 2)) :
+    Array.from(values);
+const finite = color_values.filter((value) => Number.isFinite(value));
+source.data['color_value'] = color_values;
+if (finite.length > 0) {
+    mapper.low = finite.reduce((a, b) => Math.min(a, b), Infinity);
+    mapper.high = finite.reduce((a, b) => Math.max(a, b), -Infinity);
+}
+source.change.emit();
+'''
+
+
+def recolor_callback(source, mapper, field_names: dict, capped_log=()):
+    """ Returns a CustomJS callback for a Select widget that recolors the
+        source in the browser from the column chosen in the widget.
+        field_names maps menu entries to column names, entries in capped_log
+        are shown as min(log(1 + value), 2).
+    """
+    return CustomJS(args=dict(source=source,
+                              mapper=mapper,
+                              field_names=field_names,
+                              capped_log=list(capped_log)),
+                    code=RECOLOR_CODE)
+
+
+def set_capped_log(callback: CustomJS, capped_log=()):
+    """ Sets the entries of a recolor_callback shown as min(log(1 + value),
+        2), e.g. when its source switches to data colored differently.
+    """
+    callback.args = dict(callback.args, capped_log=list(capped_log))
@@ -0,0 +1,384 @@
+import os
+import shutil
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import stats_cache
+from git_data import Change, Commit, add_parents_and_children
+from util import timer
+
+## Column files of the commit and stats caches.
+##
+## commits.json and stats.json are converted to one .npy file per column
+## in the columns directory next to them. The columns are opened with
+## np.load(mmap_mode='r'), so opening them takes milliseconds and all
+## bokeh server processes of a machine share the pages of the files
+## through the page cache instead of each holding its own parsed copy.
+## The stats are read through StatsView, a read-only mapping with the
+## layout of stats_cache.load_stats whose rows read the columns on
+## access, or several rows at once with StatsView.rows_at. The commits
+## are still built as objects in each process.
+##
+## Variable length lists (parents, changes, the rows of a file) are stored
+## as flat columns with an offsets column: the entries of item i are
+## flat[offsets[i]:offsets[i + 1]].
+##
+
+COLUMNS_NAME = 'columns'
+ROW_KEYS = ['loc', 'lines', 'soc']
+COMPLEXITY_KEYS = ['total', 'mean', 'sd', 'max']
+# the types of the rows written by update_stats.compute_stats
+STAT_DTYPES = {
+    'loc': np.int64,
+    'lines': np.int64,
+    'soc': np.int64,
+    'proximity': np.int64,
+    **{f'complexity_{key}': np.float64
+       for key in COMPLEXITY_KEYS}
+}
+
+
+def _offsets(lengths) -> np.ndarray:
+    return np.concatenate([[0], np.cumsum(list(lengths),
+                                          dtype=np.int64)]).astype(np.int64)
+
+
+def _strings(values) -> np.ndarray:
+    return np.array(list(values), dtype=str)
+
+
+def _ranges(offsets: np.ndarray):
+    offsets = offsets.tolist()
+    return zip(offsets[:-1], offsets[1:])
+
+
+def _split(flat, offsets: np.ndarray) -> List[list]:
+    if isinstance(flat, np.ndarray):
+        flat = flat.tolist()
+    return [flat[begin:end] for begin, end in _ranges(offsets)]
+
+
+def _utf8(values) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [value.encode('utf-8') for value in values]
+    return np.frombuffer(b''.join(encoded),
+                         dtype=np.uint8), _offsets(map(len, encoded))
+
+
+class _Interner:
+    def __init__(self) -> None:
+        self.ids = {}
+
+    def __call__(self, value: str) -> int:
+        return self.ids.setdefault(value, len(self.ids))
+
+    def values(self) -> np.ndarray:
+        return _strings(self.ids)
+
+
+def commit_columns(commits: List[Commit], paths: _Interner) -> dict:
+    authors = _Interner()
+    changes = [change for commit in commits for change in commit.changes]
+    msg_bytes, msg_offsets = _utf8(commit.msg for commit in commits)
+    return {
+        'sha':
+        _strings(commit.sha for commit in commits),
+        'creation_time':
+        np.array([commit.creation_time.timestamp() for commit in commits],
+                 dtype=np.float64),
+        'author':
+        np.array([authors(commit.author) for commit in commits],
+                 dtype=np.int32),
+        'authors':
+        authors.values(),
+        'msg_bytes':
+        msg_bytes,
+        'msg_offsets':
+        msg_offsets,
+        'parent_sha':
+        _strings(sha for commit in commits for sha in commit.parent_shas),
+        'parent_offsets':
+        _offsets(len(commit.parent_shas) for commit in commits),
+        'change_offsets':
+        _offsets(len(commit.changes) for commit in commits),
+        'change_old_filename':
+        np.array([paths(change.old_filename) for change in changes],
+                 dtype=np.int32),
+        'change_filename':
+        np.array([paths(change.filename) for change in changes],
+                 dtype=np.int32),
+        'change_added_lines':
+        np.array([change.added_lines for change in changes], dtype=np.int64),
+        'change_removed_lines':
+        np.array([change.removed_lines for change in changes],
+                 dtype=np.int64),
+        'change_removed':
+        np.array([change.removed for change in changes], dtype=bool)
+    }
+
+
+def stats_columns(stats: dict, paths: _Interner) -> dict:
+    rows = [row for data in stats.values() for row in data.values()]
+    shas = _strings(sha for data in stats.values() for sha in data)
+    offsets = _offsets(len(data) for data in stats.values())
+    # the rows of each file sorted by sha for the lookup by sha
+    order = np.concatenate([np.zeros(0, dtype=np.int64)] + [
+        begin + np.argsort(shas[begin:end], kind='stable')
+        for begin, end in zip(offsets[:-1], offsets[1:])
+    ])
+    columns = {
+        'stat_files': _strings(stats),
+        'stat_offsets': offsets,
+        'stat_sha': shas,
+        'stat_order': order,
+        'stat_sorted_sha': shas[order],
+        'stat_name': np.array([paths(row['name']) for row in rows],
+                              dtype=np.int32)
+    }
+    for key in ROW_KEYS + ['proximity']:
+        columns[f'stat_{key}'] = np.array([row[key] for row in rows],
+                                          dtype=STAT_DTYPES[key])
+    for key in COMPLEXITY_KEYS:
+        columns[f'stat_complexity_{key}'] = np.array(
+            [row['complexity'][key] for row in rows],
+            dtype=STAT_DTYPES[f'complexity_{key}'])
+    return columns
+
+
+@timer
+def store_columns(commits: List[Commit], stats: dict, directory: str = '.'):
+    """ Writes the columns of commits and stats to the columns directory
+        in directory. The directory is replaced as a whole, processes
+        that mapped the previous files keep reading them.
+    """
+    path = os.path.join(directory, COLUMNS_NAME)
+    tmp_path = f'{path}.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    paths = _Interner()
+    columns = commit_columns(commits, paths)
+    columns.update(stats_columns(stats, paths))
+    columns['paths'] = paths.values()
+    for name, column in columns.items():
+        np.save(os.path.join(tmp_path, f'{name}.npy'), column)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def has_columns(directory: str, sources: List[str]) -> bool:
+    """ Returns whether the columns in directory are at least as new as
+        all existing source files.
+    """
+    path = os.path.join(directory, COLUMNS_NAME)
+    if not os.path.isdir(path):
+        return False
+    mtime = os.path.getmtime(path)
+    return all(
+        os.path.getmtime(source) <= mtime for source in sources
+        if os.path.isfile(source))
+
+
+class StatsRow(Mapping):
+    """ One row as in stats_cache.load_stats, the values are read from the
+        columns on access.
+    """
+    KEYS = ['name'] + ROW_KEYS + ['complexity', 'proximity']
+
+    def __init__(self, columns: Dict[str, np.ndarray], idx: int) -> None:
+        self._columns = columns
+        self._idx = idx
+
+    def __getitem__(self, key: str):
+        columns = self._columns
+        if key == 'name':
+            return str(columns['paths'][columns['stat_name'][self._idx]])
+        if key == 'complexity':
+            return {
+                name: columns[f'stat_complexity_{name}'][self._idx].item()
+                for name in COMPLEXITY_KEYS
+            }
+        if key not in StatsRow.KEYS:
+            raise KeyError(key)
+        return columns[f'stat_{key}'][self._idx].item()
+
+    def __iter__(self):
+        return iter(StatsRow.KEYS)
+
+    def __len__(self) -> int:
+        return len(StatsRow.KEYS)
+
+
+class FileStats(Mapping):
+    """ The rows of one file, sha -> row. """
+    def __init__(self, view: 'StatsView', begin: int, end: int) -> None:
+        self._view = view
+        self._begin = begin
+        self._end = end
+
+    def _find(self, sha: str) -> int:
+        sorted_shas = self._view.column(
+            'stat_sorted_sha')[self._begin:self._end]
+        idx = int(np.searchsorted(sorted_shas, sha))
+        if idx == len(sorted_shas) or sorted_shas[idx] != sha:
+            return -1
+        return int(self._view.column('stat_order')[self._begin + idx])
+
+    def __getitem__(self, sha: str) -> StatsRow:
+        idx = self._find(sha)
+        if idx < 0:
+            raise KeyError(sha)
+        return self._view.row(idx)
+
+    def __contains__(self, sha) -> bool:
+        return self._find(sha) >= 0
+
+    def __iter__(self):
+        return iter(
+            self._view.column('stat_sha')[self._begin:self._end].tolist())
+
+    def __len__(self) -> int:
+        return self._end - self._begin
+
+    def items(self):
+        return zip(self, self.values())
+
+    def values(self):
+        return self._view.rows(self._begin, self._end)
+
+
+class StatsView(Mapping):
+    """ Read-only stats of the columns, filename -> sha -> row. Only the
+        index of the filenames lives in the process, the rows are read
+        from the mapped columns on access.
+    """
+    def __init__(self, columns: Dict[str, np.ndarray]) -> None:
+        self._columns = columns
+        self._files = {
+            filename: idx
+            for idx, filename in enumerate(columns['stat_files'].tolist())
+        }
+
+    def column(self, name: str) -> np.ndarray:
+        return self._columns[name]
+
+    def row(self, idx: int) -> StatsRow:
+        return StatsRow(self._columns, idx)
+
+    def rows(self, begin: int, end: int) -> List[StatsRow]:
+        return [StatsRow(self._columns, idx) for idx in range(begin, end)]
+
+    def rows_at(self, indices) -> List[dict]:
+        """ Returns the rows at the indices as dicts, read from the columns
+            at once.
+        """
+        columns = self._columns
+        indices = np.asarray(indices, dtype=np.int64)
+        paths = columns['paths']
+        values = {
+            key: columns[f'stat_{key}'][indices].tolist()
+            for key in ROW_KEYS + ['proximity']
+        }
+        values['name'] = paths[columns['stat_name'][indices]].tolist()
+        complexity = [
+            columns[f'stat_complexity_{key}'][indices].tolist()
+            for key in COMPLEXITY_KEYS
+        ]
+        values['complexity'] = [
+            dict(zip(COMPLEXITY_KEYS, row)) for row in zip(*complexity)
+        ]
+        return [
+            {key: values[key][idx]
+             for key in StatsRow.KEYS} for idx in range(len(indices))
+        ]
+
+    def __getitem__(self, filename: str) -> FileStats:
+        idx = self._files[filename]
+        offsets = self._columns['stat_offsets']
+        return FileStats(self, int(offsets[idx]), int(offsets[idx + 1]))
+
+    def __contains__(self, filename) -> bool:
+        return filename in self._files
+
+    def __iter__(self):
+        return iter(self._files)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+
+class ColumnarStore:
+    """ The memory mapped columns of the caches in directory. """
+    def __init__(self, directory: str = '.') -> None:
+        path = os.path.join(directory, COLUMNS_NAME)
+        self.columns = {
+            # plain arrays on the mapped buffers, indexing np.memmap is slow
+            name[:-len('.npy')]: np.load(os.path.join(path, name),
+                                         mmap_mode='r').view(np.ndarray)
+            for name in os.listdir(path) if name.endswith('.npy')
+        }
+
+    @timer
+    def commits(self) -> List[Commit]:
+        """ Returns the commits as stats_cache.load_commits does. The
+            child shas are linked from the parent shas.
+        """
+        columns = self.columns
+        paths = columns['paths'].tolist()
+        authors = columns['authors'].tolist()
+        msg_bytes = columns['msg_bytes'].tobytes()
+        messages = [
+            msg_bytes[begin:end].decode('utf-8')
+            for begin, end in _ranges(columns['msg_offsets'])
+        ]
+        parent_shas = _split(columns['parent_sha'], columns['parent_offsets'])
+        changes = _split([
+            Change(old_filename=paths[old_filename],
+                   filename=paths[filename],
+                   added_lines=added_lines,
+                   removed_lines=removed_lines,
+                   removed=removed)
+            for old_filename, filename, added_lines, removed_lines, removed in
+            zip(columns['change_old_filename'].tolist(),
+                columns['change_filename'].tolist(),
+                columns['change_added_lines'].tolist(),
+                columns['change_removed_lines'].tolist(),
+                columns['change_removed'].tolist())
+        ], columns['change_offsets'])
+        commits = [
+            Commit(sha=sha,
+                   parent_shas=parent_shas[idx],
+                   child_shas=[],
+                   parents=[],
+                   children=[],
+                   creation_time=datetime.fromtimestamp(creation_time,
+                                                        tz=timezone.utc),
+                   author=authors[author],
+                   msg=messages[idx],
+                   changes=changes[idx])
+            for idx, (sha, creation_time, author) in enumerate(
+                zip(columns['sha'].tolist(), columns['creation_time'].tolist(),
+                    columns['author'].tolist()))
+        ]
+        add_parents_and_children(commits)
+        return commits
+
+    def stats(self) -> StatsView:
+        return StatsView(self.columns)
+
+
+def update_columns(directory: str) -> bool:
+    """ Converts the json caches in directory to columns unless the
+        columns are up to date. Returns whether they were written.
+    """
+    sources = [
+        os.path.join(directory, name)
+        for name in (stats_cache.COMMITS_NAME, stats_cache.STATS_NAME)
+    ]
+    if has_columns(directory, sources):
+        return False
+    store_columns(commits=stats_cache.load_commits(directory),
+                  stats=stats_cache.load_stats(directory),
+                  directory=directory)
+    return True
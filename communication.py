@@ -0,0 +1,184 @@
+#!/bin/env python
+import argparse
+import json
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+
+import numpy as np
+
+from git_log import MAX_CHANGESET_SIZE, GitLog
+import stats_cache
+from util import parse_date
+
+## Communication network between the authors of a time window.
+##
+## Two authors need to communicate when they change the same files. The
+## network is the product of the sparse author x file incidence matrix
+## (revisions per author and file) with its transpose. The strength is
+## the cosine similarity of the revision vectors of both authors, so
+## files both change often weigh more than files touched once, or with
+## --method shared the shared files relative to the average number of
+## files of both authors as in Code Maat's communication analysis. The
+## result is written as JSON for a D3.js hierarchical edge bundling, see
+## transform/communication_csv_as_edge_bundling.py. Commits changing
+## more than --max-changeset-size files (reformats, imports) are skipped
+## as in Code Maat.
+##
+## Run the program as:
+##
+##  python communication.py --root ~/projects/repo --stats-path ~/.stats/repo \
+##      --begin 2021-01-01 --end 2021-06-30
+##
+
+METHODS = ['cosine', 'shared']
+
+
+def author_file_incidence(git_log: GitLog,
+                          begin: datetime,
+                          end: datetime,
+                          max_changeset_size: int = MAX_CHANGESET_SIZE):
+    """ Returns the authors and the nonzero entries (author index, file id,
+        revisions) of the incidence matrix of the commits in the window
+        with at most max_changeset_size changes.
+    """
+    lo, hi = git_log.window(begin=begin, end=end)
+    author_ids = {}
+    rows = []
+    columns = []
+    for idx in range(lo, hi):
+        change_ids = git_log.identities.change_ids[idx]
+        if len(change_ids) > max_changeset_size:
+            continue
+        author_id = author_ids.setdefault(git_log.commits[idx].author,
+                                          len(author_ids))
+        rows.extend([author_id] * len(change_ids))
+        columns.extend(change_ids)
+    n_files = max(git_log.identities.n_files, 1)
+    keys, revisions = np.unique(
+        np.array(rows, dtype=np.int64) * n_files +
+        np.array(columns, dtype=np.int64),
+        return_counts=True)
+    return list(author_ids), keys // n_files, keys % n_files, revisions
+
+
+def incidence_product(authors, files, weights, n_authors: int) -> np.ndarray:
+    """ Computes A A^T for the sparse matrix A with the given entries by
+        pairing all entries of each file. The pairs of a file are bounded
+        by the number of its authors.
+    """
+    order = np.argsort(files, kind='stable')
+    authors = authors[order]
+    files = files[order]
+    weights = weights[order]
+    starts = np.flatnonzero(np.r_[True, files[1:] != files[:-1]])
+    sizes = np.diff(np.r_[starts, len(files)])
+    group_sizes = np.repeat(sizes, sizes)
+    left = np.repeat(np.arange(len(files)), group_sizes)
+    offsets = np.arange(len(left)) - np.repeat(
+        np.cumsum(group_sizes) - group_sizes, group_sizes)
+    right = np.repeat(np.repeat(starts, sizes), group_sizes) + offsets
+    product = np.zeros((n_authors, n_authors))
+    np.add.at(product, (authors[left], authors[right]),
+              weights[left] * weights[right])
+    return product
+
+
+def communication_strengths(git_log: GitLog,
+                            begin: datetime,
+                            end: datetime,
+                            method: str = 'cosine',
+                            max_changeset_size: int = MAX_CHANGESET_SIZE
+                            ) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """ Returns the authors, the number of shared files and the strength
+        in percent for each pair of authors.
+    """
+    authors, author_idx, files, revisions = author_file_incidence(
+        git_log=git_log,
+        begin=begin,
+        end=end,
+        max_changeset_size=max_changeset_size)
+    shared = incidence_product(author_idx, files,
+                               np.ones(len(files), dtype=np.int64),
+                               len(authors))
+    if method == 'cosine':
+        product = incidence_product(author_idx, files,
+                                    revisions.astype(np.float64),
+                                    len(authors))
+        norms = np.sqrt(np.diag(product))
+        denominator = np.outer(norms, norms)
+    else:
+        product = shared
+        files_per_author = np.diag(shared)
+        denominator = (files_per_author[:, None] + files_per_author) / 2
+    strength = np.zeros_like(product)
+    np.divide(100 * product, denominator, out=strength, where=denominator > 0)
+    return authors, shared, np.rint(strength).astype(np.int64)
+
+
+def as_edge_bundling(authors: List[str], shared: np.ndarray,
+                     strength: np.ndarray) -> List[dict]:
+    """ Returns one entry per author with the peers it shares files with
+        as imports and the summed strength as size.
+    """
+    result = []
+    for idx, author in enumerate(authors):
+        peers = [
+            peer for peer in np.flatnonzero(shared[idx]) if peer != idx
+        ]
+        if not peers:
+            continue
+        result.append({
+            'name': author,
+            'size': int(strength[idx, peers].sum()),
+            'imports': [authors[peer] for peer in peers]
+        })
+    return result
+
+
+def get_communication(git_log: GitLog,
+                      begin: datetime,
+                      end: datetime,
+                      method: str = 'cosine',
+                      max_changeset_size: int = MAX_CHANGESET_SIZE
+                      ) -> List[dict]:
+    return as_edge_bundling(*communication_strengths(
+        git_log=git_log,
+        begin=begin,
+        end=end,
+        method=method,
+        max_changeset_size=max_changeset_size))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Generates a JSON document suitable for communication '
+        'diagrams.')
+    parser.add_argument('--root', default='.', help='repo root dir')
+    parser.add_argument('--stats-path',
+                        default='.',
+                        help='directory of the cache files')
+    parser.add_argument('--begin', type=parse_date, help='first day')
+    parser.add_argument('--end', type=parse_date, help='last day')
+    parser.add_argument('--method', choices=METHODS, default='cosine')
+    parser.add_argument('--max-changeset-size',
+                        type=int,
+                        default=MAX_CHANGESET_SIZE,
+                        help='skip commits changing more files')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    git_log = GitLog(root=args.root,
+                     commits=stats_cache.load_commits(args.stats_path),
+                     cache_dir=args.stats_path)
+    end = args.end + timedelta(days=1) if args.end else datetime.now(
+        tz=timezone.utc)
+    begin = args.begin or git_log.first_commit_date()
+    print(
+        json.dumps(
+            get_communication(git_log=git_log,
+                              begin=begin,
+                              end=end,
+                              method=args.method,
+                              max_changeset_size=args.max_changeset_size)))
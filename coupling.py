@@ -0,0 +1,114 @@
+from typing import Dict, Tuple
+
+from bokeh.models import CustomJS
+
+from color_map import COLORS, NONE_COLOR
+from source_data import int_column
+
+## Browser-side highlighting of the files coupled to the selected one.
+##
+## The strongest couplings of all files of the time window (see
+## GitLog.get_top_couplings) are sent once as an edge list. Selecting a
+## file in the table outlines its coupled files in the scatter plot and,
+## in the 'soc' overview color, colors the circle packing by the number
+## of shared revisions without a round trip to the server.
+##
+
+HIGHLIGHT_CODE = '''
+const indices = [];
+const selected = table.selected.indices;
+if (selected.length > 0) {
+    const modules = table.data['module'];
+    const name = modules[selected[0]];
+    const files = couplings.data['file'];
+    const coupled = new Set();
+    for (let i = 0; i < files.length; i++) {
+        if (files[i] === name) {
+            coupled.add(couplings.data['coupled'][i]);
+        }
+    }
+    for (let i = 0; i < modules.length; i++) {
+        if (coupled.has(modules[i])) {
+            indices.push(i);
+        }
+    }
+}
+view_filter.indices = indices;
+table.change.emit();
+'''
+
+SOC_CODE = '''
+if (circles == null || mode.value !== 'soc') {
+    return;
+}
+const data = circles.data;
+const selected = table.selected.indices;
+const n = data['full_name'].length;
+let colors = Array.from(data['base_color']);
+if (selected.length > 0) {
+    const name = table.data['module'][selected[0]];
+    const files = couplings.data['file'];
+    const counts = new Map();
+    for (let i = 0; i < files.length; i++) {
+        if (files[i] === name) {
+            counts.set(couplings.data['coupled'][i], couplings.data['count'][i]);
+        }
+    }
+    // as App.get_circ_color_data and color_map.get_color_indices
+    const values = [];
+    for (let i = 0; i < n; i++) {
+        const full_name = data['full_name'][i];
+        values.push(!data['is_file'][i] ? null :
+            counts.has(full_name) ? 2 + 2 * counts.get(full_name) :
+            full_name === name ? 1 : 0);
+    }
+    const valid = values.filter((value) => value !== null);
+    const low = valid.reduce((a, b) => Math.min(a, b), Infinity);
+    const high = valid.reduce((a, b) => Math.max(a, b), -Infinity);
+    const edges = [];
+    for (let i = 1; i < palette.length; i++) {
+        edges.push(low + (high - low) * i / palette.length);
+    }
+    colors = values.map((value) => value === null ? none_color :
+        palette[edges.filter((edge) => edge < value).length]);
+}
+data['color'] = colors;
+data['alpha'] = colors.map((color) => color === none_color ? 0.1 : 0.8);
+circles.change.emit();
+'''
+
+
+def coupling_columns(couplings: Dict[str, Tuple[Dict[str, int], int]]):
+    """ Returns the couplings as edge list columns file, coupled and
+        count.
+    """
+    edges = [(name, other, count)
+             for name, (coupled, _) in couplings.items()
+             for other, count in coupled.items()]
+    return dict(file=[name for name, _, _ in edges],
+                coupled=[other for _, other, _ in edges],
+                count=int_column(count for _, _, count in edges))
+
+
+def highlight_callback(table, couplings, view_filter):
+    """ Returns a CustomJS callback that sets the indices of view_filter
+        to the rows of table coupled to its selected row.
+    """
+    return CustomJS(args=dict(table=table,
+                              couplings=couplings,
+                              view_filter=view_filter),
+                    code=HIGHLIGHT_CODE)
+
+
+def soc_callback(table, couplings, mode, circles=None):
+    """ Returns a CustomJS callback that colors the circles by their
+        coupling to the selected row of table if mode is 'soc'. The
+        circles source is passed later by setting args['circles'].
+    """
+    return CustomJS(args=dict(table=table,
+                              couplings=couplings,
+                              mode=mode,
+                              circles=circles,
+                              palette=list(COLORS),
+                              none_color=NONE_COLOR),
+                    code=SOC_CODE)
@@ -1,37 +1,99 @@
-class DescriptiveStats:
-    def __init__(self, name, all_values):
-        self.name = name
-        self._all_values = all_values
-        self.total = sum(all_values)
-        self.n_revs = len(all_values)
+import math
+
+import numpy as np
+
+
+class RunningStats:
+    """ Streaming count, sum, mean, sum of squared deviations from the
+        mean (M2), min and max of a series of values after Welford.
+        Partial aggregates, e.g. of several commits, files or worker
+        processes, are combined with merge.
+    """
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._min = None
+        self._max = None
+
+    @classmethod
+    def from_values(cls, values) -> 'RunningStats':
+        stats = cls()
+        values = np.asarray(values)
+        if values.size:
+            stats.count = int(values.size)
+            stats.total = values.sum().item()
+            stats._mean = float(values.mean())
+            stats._m2 = float(np.square(values - stats._mean).sum())
+            stats._min = values.min().item()
+            stats._max = values.max().item()
+        return stats
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+        if self._min is None or value < self._min:
+            self._min = value
+        if self._max is None or value > self._max:
+            self._max = value
+        return self
+
+    def remove(self, value):
+        """ Removes a previously added value. Min and max are not
+            restored and remain bounds of the remaining values.
+        """
+        if self.count <= 1:
+            self.__init__()
+            return self
+        count = self.count - 1
+        mean = (self._mean * self.count - value) / count
+        self._m2 = max(self._m2 - (value - self._mean) * (value - mean), 0.0)
+        self._mean = mean
+        self.count = count
+        self.total -= value
+        return self
+
+    def merge(self, other: 'RunningStats'):
+        if not other.count:
+            return self
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self._mean += delta * other.count / count
+        self.count = count
+        self.total += other.total
+        self._min = other._min if self._min is None else min(
+            self._min, other._min)
+        self._max = other._max if self._max is None else max(
+            self._max, other._max)
+        return self
 
     def mean(self):
-        return self.total / float(self._protected_n())
+        return self.total / float(max(self.count, 1))
+
+    def sd(self):
+        return math.sqrt(self._m2 / float(max(self.count, 1)))
 
     def max_value(self):
-        try:
-            return max(self._all_values)
-        except ValueError:
-            return 0
+        return 0 if self._max is None else self._max
 
     def min_value(self):
-        try:
-            return min(self._all_values)
-        except ValueError:
-            return 0
+        return 0 if self._min is None else self._min
 
-    def sd(self):
-        from math import sqrt
-        std = 0
-        mean = self.mean()
-        for a in self._all_values:
-            std = std + (a - mean)**2
-        std = sqrt(std / float(self._protected_n()))
-        return std
 
-    def _protected_n(self):
-        n = self.n_revs
-        return max(n, 1)
+class DescriptiveStats(RunningStats):
+    def __init__(self, name, all_values=()):
+        super().__init__()
+        self.name = name
+        self.merge(RunningStats.from_values(all_values))
+
+    @property
+    def n_revs(self):
+        return self.count
 
 
 def as_stats(revision, complexity_by_line):
@@ -42,4 +104,4 @@ def dict_as_stats(all_proximities):
     return [
         DescriptiveStats(name, proximities_for_one)
         for name, proximities_for_one in all_proximities.items()
-    ]
\ No newline at end of file
+    ]
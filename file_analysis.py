@@ -8,6 +8,8 @@ from bokeh.layouts import column, row
 from bokeh.models import ColumnDataSource, Div, Select
 from bokeh.plotting import figure
 
+from source_data import float_column, int_column
+
 COMPLEXITY_MEASURES = [
     'lines', 'complexity', 'mean_complexity', 'complexity_sd', 'churn',
     'churn/line'
@@ -64,13 +66,10 @@ class FileAnalysis:
     def create_coupling_table(self):
         coupling_table = ['Coupling: </br>']
         if self._selected_file:
-            data, n_revisions = self._git_log.get_couplings(
-                filename=self._selected_file, begin=self._begin, end=self._end)
-            coupled = list(
-                sorted(data.items(), key=lambda x: x[1], reverse=True))
-            if len(coupled) > 10:
-                coupled = coupled[:10]
-            for name, n_coupled in coupled:
+            data, n_revisions = self._git_log.get_top_couplings(
+                begin=self._begin, end=self._end).get(self._selected_file,
+                                                      ({}, 0))
+            for name, n_coupled in data.items():
                 coupling_table.append(f'{name}: {n_coupled}/{n_revisions}')
         return Div(text='</br>'.join(coupling_table),
                    width=self._width,
@@ -186,8 +185,8 @@ class FileAnalysis:
             for row in self._complexity_trend
         ]
         self.complexity_analysis_source.data = dict(
-            x=x,
-            y=measure,
+            x=float_column(x),
+            y=float_column(measure),
             sha=revs,
             commit_msg=msgs,
             author=authors,
@@ -196,23 +195,20 @@ class FileAnalysis:
                     row[0]).creation_time.strftime(DATE_FORMAT)
                 for row in self._complexity_trend
             ],
-            lines=lines,
-            complexity=[
+            lines=int_column(lines),
+            complexity=float_column(
                 row[1 + COMPLEXITY_MEASURES.index('complexity')]
-                for row in self._complexity_trend
-            ],
-            mean_complexity=[
+                for row in self._complexity_trend),
+            mean_complexity=float_column(
                 row[1 + COMPLEXITY_MEASURES.index('mean_complexity')]
-                for row in self._complexity_trend
-            ],
-            complexity_sd=[
+                for row in self._complexity_trend),
+            complexity_sd=float_column(
                 row[1 + COMPLEXITY_MEASURES.index('complexity_sd')]
-                for row in self._complexity_trend
-            ],
-            added_lines=added,
-            removed_lines=removed,
-            added_per_line=added_per_line,
-            removed_per_line=removed_per_line)
+                for row in self._complexity_trend),
+            added_lines=int_column(added),
+            removed_lines=int_column(removed),
+            added_per_line=float_column(added_per_line),
+            removed_per_line=float_column(removed_per_line))
 
         if self.complexity_measures.value == 'churn':
             p.line(x='x',
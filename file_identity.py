@@ -0,0 +1,94 @@
+from bisect import bisect_right
+from typing import List, Optional
+
+from git_data import Commit
+
+
+class FileIdentityIndex:
+    """ Assigns a stable id to each logical file of the history.
+        The commits are replayed in order: a rename moves the id of the
+        old path to the new path and a deletion ends it. A change to a
+        path that no file has at that time, e.g. a path added again after
+        its file was renamed away or deleted, starts a new file. For each
+        file the index records the path it had from which commit on, and
+        for each path the file it belonged to from which commit on.
+    """
+    def __init__(self, commits: List[Commit]) -> None:
+        self._commit_idx = {
+            commit.sha: idx
+            for idx, commit in enumerate(commits)
+        }
+        self._history_idx = []
+        self._history_paths = []
+        self._path_idx = {}
+        self._path_ids = {}
+        self.change_ids = []
+        live = {}
+        for idx, commit in enumerate(commits):
+            # all changes of a commit see the files before the commit
+            file_ids = []
+            for change in commit.changes:
+                path = change.old_filename or change.filename
+                file_id = live.get(path)
+                if file_id is None:
+                    file_id = self._new_file(idx, path)
+                file_ids.append(file_id)
+            for change in commit.changes:
+                if change.old_filename:
+                    live.pop(change.old_filename, None)
+            for change, file_id in zip(commit.changes, file_ids):
+                if change.removed:
+                    live.pop(change.filename, None)
+                    continue
+                live[change.filename] = file_id
+                paths = self._history_paths[file_id]
+                if paths[-1] != change.filename:
+                    self._history_idx[file_id].append(idx)
+                    paths.append(change.filename)
+                    self._assign(change.filename, idx, file_id)
+            self.change_ids.append(file_ids)
+        self.n_files = len(self._history_paths)
+
+    def _new_file(self, idx: int, path: str) -> int:
+        file_id = len(self._history_paths)
+        self._history_idx.append([idx])
+        self._history_paths.append([path])
+        self._assign(path, idx, file_id)
+        return file_id
+
+    def _assign(self, path: str, idx: int, file_id: int):
+        self._path_idx.setdefault(path, []).append(idx)
+        self._path_ids.setdefault(path, []).append(file_id)
+
+    def id_of(self, path: str) -> Optional[int]:
+        """ Returns the id of the latest file with the path. """
+        file_ids = self._path_ids.get(path)
+        return None if file_ids is None else file_ids[-1]
+
+    def id_at(self, path: str, commit_idx: int) -> Optional[int]:
+        """ Returns the id of the file with the path after the commit at
+            commit_idx.
+        """
+        indices = self._path_idx.get(path)
+        if indices is None:
+            return None
+        idx = bisect_right(indices, commit_idx) - 1
+        return self._path_ids[path][max(idx, 0)]
+
+    def id_in(self, path: str, sha: str) -> Optional[int]:
+        """ Returns the id of the file with the path after the commit sha,
+            the latest file if the commit is unknown.
+        """
+        commit_idx = self._commit_idx.get(sha)
+        if commit_idx is None:
+            return self.id_of(path)
+        return self.id_at(path, commit_idx)
+
+    def current_path(self, file_id: int) -> str:
+        """ Returns the latest path of the file. """
+        return self._history_paths[file_id][-1]
+
+    def path_at(self, file_id: int, commit_idx: int) -> str:
+        """ Returns the path of the file after the commit at commit_idx. """
+        idx = bisect_right(self._history_idx[file_id], commit_idx) - 1
+        return self._history_paths[file_id][max(idx, 0)]
@@ -1,6 +1,5 @@
 from datetime import datetime, timedelta
 
-from wordcloud import WordCloud, STOPWORDS
 from bokeh.plotting import figure
 from util import to_days
 from git_log import GitLog, DATE_FORMAT
@@ -13,6 +12,7 @@ def wordcloud_file(end: str, period: timedelta):
 
 
 def generate_wordcloud(git_log: GitLog, end: datetime, period: timedelta):
+    from wordcloud import WordCloud, STOPWORDS
     text = ' '.join(git_log.commit_msg(begin=end - period,
                                        end=end)).replace("'", "")
     wordcloud = WordCloud(stopwords=STOPWORDS | PROJECT_STOPWORDS,
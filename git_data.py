@@ -1,3 +1,4 @@
+from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 import re
@@ -79,13 +80,15 @@ def get_change(line: str) -> Change:
 
 
 def add_parents_and_children(commits: List[Commit]):
+    sha2commits = defaultdict(list)
+    for commit in commits:
+        sha2commits[commit.sha].append(commit)
     for commit in commits:
         for parent_sha in commit.parent_shas:
-            for parent in commits:
-                if parent.sha == parent_sha:
-                    parent.children.append(commit)
-                    parent.child_shas.append(commit.sha)
-                    commit.parents.append(parent)
+            for parent in sha2commits.get(parent_sha, []):
+                parent.children.append(commit)
+                parent.child_shas.append(commit.sha)
+                commit.parents.append(parent)
 
 
 def get_commit_list(git_log: str) -> Tuple[Commit]:
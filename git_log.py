@@ -1,16 +1,48 @@
 from collections import defaultdict
 from git_data import Commit, get_commit_list
-from desc_stats import DescriptiveStats, as_stats, dict_as_stats
-from process_git_log import read_diff_for
-from git_proximity_analysis import parse_changes_per_file_in
+from file_identity import FileIdentityIndex
+from knowledge import ContributionIndex, main_authors
+from desc_stats import DescriptiveStats, RunningStats, as_stats, dict_as_stats
+from stats_cache import PROXIMITIES_NAME
+from tree_cache import files_in_tree
+from loc_series import get_loc_series
+from git_runner import run_cmd as _run_cmd, show_file
+import math
 import os
-import subprocess
+from types import MappingProxyType
 
+import numpy as np
 from datetime import datetime, timezone
-from typing import Dict, List, Set
+from typing import Dict, List, Set, Tuple
 import miner.complexity_calculations as complexity_calculations
 from util import DATE_FORMAT, timer
 
+MAX_CACHED_WINDOWS = 16
+# commits changing more files are skipped when pairing files, as Code Maat
+# does with --max-changeset-size
+MAX_CHANGESET_SIZE = 30
+REVISION_DEFAULTS = {
+    'revisions': 0,
+    'soc': 0,
+    'last_change': datetime(year=2015, month=1, day=1,
+                            tzinfo=timezone.utc).timestamp()
+}
+MODULE_DEFAULTS = {
+    'revisions': 0,
+    'soc': 0,
+    'loc': 0,
+    'last_change': datetime(year=2015, month=1, day=1, tzinfo=timezone.utc),
+    'lines': 0,
+    'complexity': 0.0,
+    'mean_complexity': 0.0,
+    'complexity_sd': 0.0,
+    'complexity_max': 0.0,
+    'proximity': 0.0,
+    'mean_proximity': 0.0,
+    'proximity_sd': 0.0,
+    'proximity_max': 0.0
+}
+
 
 def sum_proximity_stats(all_proximities):
     """ Received all proximities as a list of dictionaries.
@@ -25,32 +57,28 @@ def sum_proximity_stats(all_proximities):
     return dict_as_stats(all_grouped)
 
 
-def _run_cmd(root, args):
-    return subprocess.Popen(args, stdout=subprocess.PIPE,
-                            cwd=root).communicate()[0].decode("utf-8")
+def get_head(root: str) -> str:
+    return _run_cmd(root, ['git', 'rev-parse', '--short', 'HEAD']).strip()
 
 
-def get_full_log(root: str):
-    print('get full log')
+def get_full_log(root: str, rev: str = 'HEAD'):
     return _run_cmd(root, [
         'git', 'log', "--pretty=format:'[%h] [%p] %aN %cd %s'", '--date=iso',
-        '--numstat', '--topo-order', '--summary'
+        '--numstat', '--topo-order', '--summary', rev
     ])
 
 
-def get_log_after_revision(root: str, sha: str):
+def get_log_after_revision(root: str, sha: str, rev: str = 'HEAD'):
     return _run_cmd(root=root,
                     args=[
                         'git', 'log', "--pretty=format:'[%h] [%p] %aN %cd %s'",
                         '--date=iso', '--numstat', '--topo-order', '--summary',
-                        f'{sha}..HEAD'
+                        f'{sha}..{rev}'
                     ])
 
 
 def get_files_in_repository(root: str):
-    return _run_cmd(root=root,
-                    args=['git', 'ls-tree', '-r', 'master',
-                          '--name-only']).split('\n')
+    return files_in_tree(root=root, rev='master')
 
 
 def get_first_commit_date(root: str):
@@ -131,28 +159,14 @@ class BackwardTraversal:
 
 
 def get_files_in_commit(root: str, sha: str):
-    files = _run_cmd(root,
-                     ['git', 'ls-tree', '-r', '--name-only', sha]).split('\n')
-    to_remove = [file for file in files if file.endswith('.enc')]
-    for file in to_remove:
-        files.remove(file)
-    return files
-
-
-def get_lines_in_sha(root: str, sha: str):
-    files = get_files_in_commit(root=root, sha=sha)
-    return sum(
-        complexity_calculations.compute_lines(
-            _run_cmd(root, ['git', 'show', f'{sha}:{file}']))
-        for file in files)
+    return [
+        file for file in files_in_tree(root=root, rev=sha)
+        if not file.endswith('.enc')
+    ]
 
 
 def get_lines_before(root: str, before: datetime):
-    sha = _run_cmd(root, [
-        'git', 'rev-list', '-1', "--pretty=format:'%h'",
-        f'--before={before.strftime(DATE_FORMAT)}', 'master'
-    ]).split('\n')[1].replace("'", "")
-    return get_lines_in_sha(root=root, sha=sha)
+    return get_loc_series(root=root).loc_at(before.timestamp())
 
 
 def _pdistance(positions):
@@ -171,14 +185,24 @@ def in_interval(begin: datetime, end: datetime):
 
 
 class GitLog:
-    def __init__(self, root: str, commits) -> None:
+    def __init__(self, root: str, commits, cache_dir: str = '.') -> None:
         self.root = root
+        self.cache_dir = cache_dir
         self._commits: List[Commit] = commits
         self._sha2commit = {commit.sha: commit for commit in commits}
         self._sha2time = {
             commit.sha: commit.creation_time
             for commit in commits
         }
+        self.identities = FileIdentityIndex(commits)
+        self._proximity_cache = None
+        self._contributions = None
+        self._window_proximities = {}
+        self._window_couplings = {}
+        # commits are sorted by creation time, see get_commit_list
+        self._timestamps = np.array(
+            [commit.creation_time.timestamp() for commit in commits],
+            dtype=np.int64)
         # for commit in commits:
         #     print(
         #         f'p0 {commit.sha} -> {[parent for parent in commit.parent_shas]}')
@@ -188,16 +212,40 @@ class GitLog:
         #     print(
         #         f'c1 {commit.sha} -> {[child.sha for child in commit.children]}')
 
+    def clear_window_caches(self):
+        """ Forgets the memoized proximities and couplings of windows. """
+        self._window_proximities.clear()
+        self._window_couplings.clear()
+
     def get_commit_from_sha(self, sha: str) -> Commit:
         return self._sha2commit[sha]
 
     def get_time_from_sha(self, sha: str) -> datetime:
         return self._sha2time[sha]
 
+    def has_sha(self, sha: str) -> bool:
+        return sha in self._sha2commit
+
     @property
     def commits(self):
         return self._commits
 
+    def window(self, begin: datetime, end: datetime) -> Tuple[int, int]:
+        """ Returns the index range [lo, hi) of all commits with
+            begin <= creation_time <= end.
+        """
+        lo = np.searchsorted(self._timestamps,
+                             math.ceil(begin.timestamp()),
+                             side='left')
+        hi = np.searchsorted(self._timestamps,
+                             math.floor(end.timestamp()),
+                             side='right')
+        return int(lo), int(max(lo, hi))
+
+    def commits_in(self, begin: datetime, end: datetime) -> List[Commit]:
+        lo, hi = self.window(begin=begin, end=end)
+        return self._commits[lo:hi]
+
     def first_commit_date(self):
         return self.commits[0].creation_time
 
@@ -208,262 +256,195 @@ class GitLog:
         return self.commits[-1].sha
 
     def commit_msg(self, begin: datetime, end: datetime):
-        return [
-            commit.msg for commit in self.commits
-            if begin <= commit.creation_time <= end
-        ]
+        return [commit.msg for commit in self.commits_in(begin, end)]
 
     @classmethod
     def from_dir(_cls, dir: str):
         return GitLog(root=dir,
                       commits=get_commit_list(get_full_log(root=dir)))
 
+    def _file_changes(self, file_id: int, lo: int, hi: int):
+        """ Yields (commit index, change) for all changes of the file in the
+            commits [lo, hi).
+        """
+        for idx in range(lo, hi):
+            for change, change_id in zip(self._commits[idx].changes,
+                                         self.identities.change_ids[idx]):
+                if change_id == file_id:
+                    yield idx, change
+
     def get_churn(self):
         churn = defaultdict(list)
-        for commit in self.commits:
-            for change in commit.changes:
-                if change.old_filename:
-                    if change.old_filename not in churn:
-                        continue
-                    churn[change.filename] = churn.pop(change.old_filename)
-                churn[change.filename].append(
+        for idx, commit in enumerate(self._commits):
+            for change, file_id in zip(commit.changes,
+                                       self.identities.change_ids[idx]):
+                churn[self.identities.current_path(file_id)].append(
                     (commit.creation_time, change.added_lines,
                      change.removed_lines))
         return churn
 
     def get_churn_for(self, filename: str, begin: datetime, end: datetime):
-        churn = []
-
-        def op(commit):
-            nonlocal filename
-            for change in commit.changes:
-                if change.filename == filename:
-                    churn.append(
-                        (commit.sha, change.added_lines, change.removed_lines))
-                    if change.old_filename:
-                        filename = change.old_filename
-
-        BackwardTraversal(commits=self._commits,
-                          op=op,
-                          valid_cond=in_interval(begin=begin, end=end))()
-        return list(reversed(churn))
-
-    def get_couplings(self, filename: str, begin: datetime, end: datetime):
+        file_id = self.identities.id_of(filename)
+        if file_id is None:
+            return []
+        lo, hi = self.window(begin=begin, end=end)
+        return [(self._commits[idx].sha, change.added_lines,
+                 change.removed_lines)
+                for idx, change in self._file_changes(file_id, lo, hi)]
+
+    def get_couplings(self,
+                      filename: str,
+                      begin: datetime,
+                      end: datetime,
+                      max_changeset_size: int = MAX_CHANGESET_SIZE):
         n_rev = 0
-        couplings = defaultdict(lambda: {'count': 0, 'names': set()})
-
-        def op(commit):
-            nonlocal filename
-            nonlocal n_rev
-            files_in_commit = [change.filename for change in commit.changes]
-            new_filename = filename
-            if filename in files_in_commit:
-                n_rev += 1
-                for change in commit.changes:
-                    if change.filename == filename:
-                        if change.old_filename:
-                            new_filename = change.old_filename
-                    else:
-                        found = False
-                        for data in couplings.values():
-                            if change.filename in data['names']:
-                                data['count'] += 1
-                                if change.old_filename:
-                                    data['names'].add(change.old_filename)
-                                found = True
-
-                        if not found:
-                            couplings[change.filename]['names'].add(
-                                change.filename)
-                            couplings[change.filename]['count'] += 1
-                            if change.old_filename:
-                                couplings[change.filename]['names'].add(
-                                    change.old_filename)
-            filename = new_filename
-
-        BackwardTraversal(commits=self._commits,
-                          op=op,
-                          valid_cond=in_interval(begin=begin, end=end))()
+        couplings = defaultdict(int)
+        file_id = self.identities.id_of(filename)
+        lo, hi = self.window(begin=begin, end=end)
+        for idx in range(lo, hi) if file_id is not None else ():
+            change_ids = self.identities.change_ids[idx]
+            if file_id not in change_ids or len(
+                    change_ids) > max_changeset_size:
+                continue
+            n_rev += 1
+            for change_id in set(change_ids):
+                if change_id != file_id:
+                    couplings[change_id] += 1
 
         couplings = {
-            name: data['count']
-            for name, data in couplings.items()
-            if data['count'] > 2 and data['count'] / n_rev > 0.2
+            self.identities.current_path(change_id): count
+            for change_id, count in couplings.items()
+            if count > 2 and count / n_rev > 0.2
         }
         return couplings, n_rev
 
     @timer
-    def get_revisions(self, begin: datetime, end: datetime):
-        revisions = defaultdict(
-            lambda: {
-                'revisions':
-                0,
-                'soc':
-                0,
-                'last_change':
-                datetime(year=2015, month=1, day=1, tzinfo=timezone.utc).
-                timestamp(),
-                'churn': [],
-                'proximity':
-                0.0,
-                'mean_proximity':
-                0.0,
-                'proximity_sd':
-                0.0,
-                'proximity_max':
-                0.0
-            })
-
-        def op(commit):
-            for change in commit.changes:
-                if change.old_filename:
-                    revisions[change.filename] = revisions[change.old_filename]
-                    revisions.pop(change.old_filename)
-                revisions[change.filename]['revisions'] += 1
-                revisions[change.filename][
-                    'last_change'] = commit.creation_time.timestamp()
-                revisions[change.filename]['churn'].append({
-                    'timestamp':
-                    revisions[change.filename]['last_change'],
-                    'added_lines':
-                    change.added_lines,
-                    'removed_lines':
-                    change.removed_lines
+    def get_top_couplings(self,
+                          begin: datetime,
+                          end: datetime,
+                          max_couplings: int = 10,
+                          max_changeset_size: int = MAX_CHANGESET_SIZE):
+        """ Returns the couplings of get_couplings for all files of the
+            window at once, limited to the max_couplings strongest ones
+            per file, as a dict filename -> (couplings, n_rev). Commits
+            with more than max_changeset_size changes are skipped, which
+            bounds the pairs of a commit.
+        """
+        window = self.window(begin=begin, end=end)
+        key = (window, max_couplings, max_changeset_size)
+        if key in self._window_couplings:
+            return self._window_couplings[key]
+        lo, hi = window
+        change_ids = self.identities.change_ids
+        pairs = np.unique(
+            np.array([(idx, file_id) for idx in range(lo, hi)
+                      if len(change_ids[idx]) <= max_changeset_size
+                      for file_id in change_ids[idx]],
+                     dtype=np.int64).reshape(-1, 2),
+            axis=0)
+        commits, files = pairs[:, 0], pairs[:, 1]
+        n_revs = np.bincount(files, minlength=self.identities.n_files)
+
+        # all ordered pairs of distinct files changed in the same commit
+        starts = np.flatnonzero(np.r_[True, commits[1:] != commits[:-1]])
+        sizes = np.diff(np.r_[starts, len(commits)])
+        group_sizes = np.repeat(sizes, sizes)
+        left = np.repeat(np.arange(len(files)), group_sizes)
+        right = np.repeat(np.repeat(starts, sizes), group_sizes) + (
+            np.arange(len(left)) -
+            np.repeat(np.cumsum(group_sizes) - group_sizes, group_sizes))
+        distinct = left != right
+        n_files = max(self.identities.n_files, 1)
+        keys, counts = np.unique(files[left[distinct]] * n_files +
+                                 files[right[distinct]],
+                                 return_counts=True)
+        sources, targets = keys // n_files, keys % n_files
+        valid = (counts > 2) & (counts / np.maximum(n_revs[sources], 1) > 0.2)
+        sources, targets, counts = sources[valid], targets[valid], counts[
+            valid]
+        order = np.lexsort((-counts, sources))
+
+        couplings = {}
+        for source, target, count in zip(sources[order], targets[order],
+                                         counts[order]):
+            name = self.identities.current_path(source)
+            coupled = couplings.get(name)
+            if coupled is None:
+                coupled = ({}, int(n_revs[source]))
+                couplings[name] = coupled
+            if len(coupled[0]) < max_couplings:
+                coupled[0][self.identities.current_path(target)] = int(count)
+
+        if len(self._window_couplings) >= MAX_CACHED_WINDOWS:
+            self._window_couplings.pop(next(iter(self._window_couplings)))
+        self._window_couplings[key] = couplings
+        return couplings
+
+    def _get_revisions(self, begin: datetime, end: datetime, defaults):
+        revisions = defaultdict(lambda: dict(defaults, churn=[]))
+        lo, hi = self.window(begin=begin, end=end)
+        for idx in range(lo, hi):
+            commit = self._commits[idx]
+            timestamp = commit.creation_time.timestamp()
+            soc = len(commit.changes) - 1
+            for change, file_id in zip(commit.changes,
+                                       self.identities.change_ids[idx]):
+                data = revisions[self.identities.current_path(file_id)]
+                data['revisions'] += 1
+                data['last_change'] = timestamp
+                data['churn'].append({
+                    'timestamp': timestamp,
+                    'added_lines': change.added_lines,
+                    'removed_lines': change.removed_lines
                 })
-            names_in_commit = [change.filename for change in commit.changes]
-            soc = len(names_in_commit) - 1
-            for name in names_in_commit:
-                revisions[name]['soc'] += soc
-
-        # ForwardTraversal(commits=self._commits,
-        #                  op=op,
-        #                  valid_cond=in_interval(begin, end))()
-
-        for commit in self._commits:
-            if begin > commit.creation_time:
-                continue
-            if end < commit.creation_time:
-                break
-            op(commit)
-
+                data['soc'] += soc
         return revisions
 
     @timer
-    def get_revisions_only(self, begin: datetime, end: datetime):
-        revisions = defaultdict(
-            lambda: {
-                'revisions':
-                0,
-                'soc':
-                0,
-                'last_change':
-                datetime(year=2015, month=1, day=1, tzinfo=timezone.utc).
-                timestamp(),
-                'churn': []
-            })
-
-        def op(commit):
-            for change in commit.changes:
-                if change.old_filename:
-                    revisions[change.filename] = revisions[change.old_filename]
-                    revisions.pop(change.old_filename)
-                revisions[change.filename]['revisions'] += 1
-                revisions[change.filename][
-                    'last_change'] = commit.creation_time.timestamp()
-                revisions[change.filename]['churn'].append({
-                    'timestamp':
-                    revisions[change.filename]['last_change'],
-                    'added_lines':
-                    change.added_lines,
-                    'removed_lines':
-                    change.removed_lines
-                })
-            names_in_commit = [change.filename for change in commit.changes]
-            soc = len(names_in_commit) - 1
-            for name in names_in_commit:
-                revisions[name]['soc'] += soc
-
-        # ForwardTraversal(commits=self._commits,
-        #                  op=op,
-        #                  valid_cond=in_interval(begin, end))()
-
-        for commit in self._commits:
-            if begin > commit.creation_time:
-                continue
-            if end < commit.creation_time:
-                break
-            op(commit)
+    def get_revisions(self, begin: datetime, end: datetime):
+        return self._get_revisions(begin=begin,
+                                   end=end,
+                                   defaults=dict(REVISION_DEFAULTS,
+                                                 proximity=0.0,
+                                                 mean_proximity=0.0,
+                                                 proximity_sd=0.0,
+                                                 proximity_max=0.0))
 
-        return revisions
+    @timer
+    def get_revisions_only(self, begin: datetime, end: datetime):
+        return self._get_revisions(begin=begin,
+                                   end=end,
+                                   defaults=REVISION_DEFAULTS)
 
     def get_revisions_for_module(self, begin: datetime, end: datetime,
                                  module_map):
         '''
             Does not trace renamings.
         '''
-        revisions = defaultdict(
-            lambda: {
-                'revisions':
-                0,
-                'soc':
-                0,
-                'loc':
-                0,
-                'last_change':
-                datetime(year=2015, month=1, day=1, tzinfo=timezone.utc),
-                'churn': [],
-                'lines':
-                0,
-                'complexity':
-                0.0,
-                'mean_complexity':
-                0.0,
-                'complexity_sd':
-                0.0,
-                'complexity_max':
-                0.0,
-                'proximity':
-                0.0,
-                'mean_proximity':
-                0.0,
-                'proximity_sd':
-                0.0,
-                'proximity_max':
-                0.0
-            })
+        revisions = defaultdict(lambda: dict(MODULE_DEFAULTS, churn=[]))
 
         def op(commit):
-            modules_in_commit = {
-                module_map(change.filename)
-                for change in commit.changes
-            }
-            for module in modules_in_commit:
+            churn_per_module = {}
+            for change in commit.changes:
+                module = module_map(change.filename)
+                churn = churn_per_module.get(module)
+                if churn is None:
+                    churn = {
+                        'timestamp': commit.creation_time.timestamp(),
+                        'added_lines': 0,
+                        'removed_lines': 0
+                    }
+                    churn_per_module[module] = churn
+                churn['added_lines'] += change.added_lines
+                churn['removed_lines'] += change.removed_lines
+            soc = len(churn_per_module) - 1
+            for module, churn in churn_per_module.items():
                 revisions[module]['revisions'] += 1
                 revisions[module]['last_change'] = commit.creation_time
-
-                churn = {
-                    'timestamp': commit.creation_time.timestamp(),
-                    'added_lines': 0,
-                    'removed_lines': 0
-                }
-                for change in commit.changes:
-                    if module == module_map(change.filename):
-                        churn['added_lines'] += change.added_lines
-                        churn['removed_lines'] += change.removed_lines
                 revisions[module]['churn'].append(churn)
-            soc = len(modules_in_commit) - 1
-            for module in modules_in_commit:
                 revisions[module]['soc'] += soc
 
-        # ForwardTraversal(commits=self._commits,
-        #                  op=op,
-        #                  valid_cond=in_interval(begin, end))()
-
-        for commit in self._commits:
-            if begin > commit.creation_time:
-                continue
-            if end < commit.creation_time:
-                break
+        for commit in self.commits_in(begin=begin, end=end):
             op(commit)
 
         return revisions
@@ -472,18 +453,22 @@ class GitLog:
     def get_files_in_repository(self):
         return get_files_in_repository(root=self.root)
 
+    @property
+    def contributions(self) -> ContributionIndex:
+        if self._contributions is None:
+            self._contributions = ContributionIndex(self)
+        return self._contributions
+
     def get_authors(self, filename: str, module_map=None):
+        if not module_map:
+            return self.contributions.authors_of(filename)
         n_revs = 0
         authors = defaultdict(int)
-        for commit in reversed(self._commits):
+        for commit in self._commits:
             for change in commit.changes:
-                change_name = module_map(
-                    change.filename) if module_map else change.filename
-                if filename == change_name:
+                if filename == module_map(change.filename):
                     n_revs += 1
                     authors[commit.author] += 1
-                    if change.old_filename:
-                        filename = change.old_filename
         for author in authors:
             authors[author] = authors[author] / n_revs
         return authors
@@ -492,59 +477,24 @@ class GitLog:
                          filename: str,
                          max_authors: int = 3,
                          module_map=None):
-        authors = self.get_authors(filename=filename, module_map=module_map)
-        valid = sorted(authors.values(), reverse=True)
-        n_authors = len(valid)
-        if len(valid) > max_authors:
-            valid = valid[:max_authors]
-        to_remove = [
-            author for author in authors if authors[author] not in valid
-        ]
-        for author in to_remove:
-            authors.pop(author)
-        return authors, n_authors
+        return main_authors(self.get_authors(filename=filename,
+                                             module_map=module_map),
+                            max_authors=max_authors)
 
     def get_commits_for_file(self, filename: str, begin: datetime,
                              end: datetime):
+        file_id = self.identities.id_of(filename)
+        if file_id is None:
+            return []
+        lo, hi = self.window(begin=begin, end=end)
         commits = []
-
-        def op(commit):
-            nonlocal filename
-            for change in commit.changes:
-                if change.filename == filename:
-                    commits.append((commit, filename))
-                    if change.old_filename:
-                        filename = change.old_filename
-                    return
-
-        # is_valid = in_interval(begin=begin, end=end)
-        # for commit in self.commits:
-        #     if is_valid(commit):
-        #         op(commit)
-        BackwardTraversal(commits=self._commits,
-                          op=op,
-                          valid_cond=in_interval(begin=begin, end=end))()
-        return commits
+        for idx, change in self._file_changes(file_id, lo, hi):
+            if not commits or commits[-1][0] is not self._commits[idx]:
+                commits.append((self._commits[idx], change.filename))
+        return list(reversed(commits))
 
     def get_commits(self, begin: datetime, end: datetime) -> List[Commit]:
-        print(f'get commits in {begin} {end}')
-        return tuple(
-            reversed([
-                commit for commit in self.commits
-                if in_interval(begin, end)(commit)
-            ]))
-        # commits = []
-
-        # def op(commit):
-        #     commits.append(commit)
-
-        # BackwardTraversal(commits=self._commits,
-        #                   op=op,
-        #                   valid_cond=in_interval(begin=begin, end=end))()
-        # print(f'found {len(commits)} commits')
-
-
-#        return list(reversed(commits))
+        return tuple(reversed(self.commits_in(begin=begin, end=end)))
 
     def get_commits_after(self, sha: str):
         commits = []
@@ -556,8 +506,9 @@ class GitLog:
                                             end=end)
         complexity_by_rev = []
         for commit, commit_filename in commits:
-            historic_version = _run_cmd(
-                self.root, ['git', 'show', commit.sha + ':' + commit_filename])
+            historic_version = show_file(root=self.root,
+                                         sha=commit.sha,
+                                         filename=commit_filename)
             complexity_by_line = complexity_calculations.calculate_complexity_in(
                 historic_version)
             complexity_by_rev.append((as_stats(commit.sha,
@@ -576,9 +527,10 @@ class GitLog:
         ] for stats in complexity_trend]
 
     def add_complexity_analysis(self, end: str, stats):
-        os.system(
-            f'cd {self.root} && git checkout `git rev-list -n 1 --before={end} master`'
-        )
+        sha = _run_cmd(self.root,
+                       ['git', 'rev-list', '-n', '1', f'--before={end}',
+                        'master']).strip()
+        _run_cmd(self.root, ['git', 'checkout', sha])
         try:
             for filename in stats.keys():
                 with open(self.root + filename, "r") as file_to_calc:
@@ -596,13 +548,12 @@ class GitLog:
                         d_stats.max_value(), 2)
         except Exception as exc:
             print(f'Exc: {type(exc)}:{exc}')
-        os.system(f'cd {self.root} && git checkout master')
+        _run_cmd(self.root, ['git', 'checkout', 'master'])
         return stats
 
     @timer
     def add_proximity_analysis(self, begin: datetime, end: datetime, stats):
         proximities = self.get_proximities(begin=begin, end=end)
-        # print(f'PRXI {proximities}')
         for proximity in proximities:
             filename = proximity[0]
             if not filename in stats:
@@ -618,36 +569,55 @@ class GitLog:
             # stats[filename]['proximity_sd'] = proximity[4]
             # stats[filename]['proximity_max'] = proximity[5]
 
+    @property
+    def proximity_cache(self):
+        if self._proximity_cache is None:
+            # the diff parsing is only needed once proximities are missing
+            from proximity_cache import ProximityCache
+            self._proximity_cache = ProximityCache(
+                root=self.root,
+                path=os.path.join(self.cache_dir, PROXIMITIES_NAME))
+        return self._proximity_cache
+
     @timer
     def read_proximities_from(self, begin: datetime, end: datetime):
+        """ Returns the RunningStats of the proximities of each file in the
+            window. The stats are shared and must not be modified.
+        """
+        window = self.window(begin=begin, end=end)
+        if window in self._window_proximities:
+            return self._window_proximities[window]
         commits = self.get_commits(begin=begin, end=end)
-        print(f'commits {len(commits)}')
-        proximities = defaultdict(list)
-        print(f'proximities {len(proximities)}')
-        for idx in range(len(commits) - 1):
-            current_commit = commits[idx]
-            for change in current_commit.changes:
-                if change.old_filename and change.old_filename in proximities:
-                    proximities[change.filename] = proximities.pop(
-                        change.old_filename)
-            next_commit = commits[idx + 1]
-            git_diff = read_diff_for(self.root, current_commit.sha,
-                                     next_commit.sha)
-            changes = parse_changes_per_file_in(git_diff)
-            new_proximities = calc_proximity(changes)
+        all_proximities = self.proximity_cache.get_all([
+            (commits[idx].sha, commits[idx + 1].sha)
+            for idx in range(len(commits) - 1)
+        ])
+        # keyed by the latest path of the file, as the revisions
+        proximities = defaultdict(RunningStats)
+        for commit_idx, new_proximities in zip(range(window[1] - 1, -1, -1),
+                                               all_proximities):
             for name, proximity in new_proximities.items():
-                proximities[name].append(proximity)
-
+                file_id = self.identities.id_at(name, commit_idx)
+                if file_id is not None:
+                    name = self.identities.current_path(file_id)
+                proximities[name].add(proximity)
+
+        # the result is shared by all callers of the window, read-only
+        proximities = MappingProxyType(dict(proximities))
+        if len(self._window_proximities) >= MAX_CACHED_WINDOWS:
+            self._window_proximities.pop(next(iter(self._window_proximities)))
+        self._window_proximities[window] = proximities
         return proximities
 
     @timer
     def get_proximities(self, begin: datetime, end: datetime):
         proximities = self.read_proximities_from(begin=begin, end=end)
-        stats = dict_as_stats(proximities)
-        presentation_order = sorted(stats, key=lambda p: p.total, reverse=True)
+        presentation_order = sorted(proximities.items(),
+                                    key=lambda item: item[1].total,
+                                    reverse=True)
         return [[
-            p.name, p.n_revs + 1, p.total,
+            name, p.count + 1, p.total,
             round(p.mean(), 2),
             round(p.sd(), 2),
             p.max_value()
-        ] for p in presentation_order]
\ No newline at end of file
+        ] for name, p in presentation_order]
\ No newline at end of file
@@ -12,7 +12,8 @@ import argparse
 ##  python git_proximity_analysis.py --start 540e8de --end d804759
 ##
 ## where the two arguments specify the range of revisions of interest.
-## Note that you must run the program from within a git repo.
+## The repository is given with --root and defaults to the current
+## directory.
 ##
 
 ######################################################################
@@ -121,8 +122,7 @@ def get_proximities(root: str, start_rev: str, end_rev: str):
 
 def run(args):
     revision_range = args.start, args.end
-    proximities = read_proximities_from('/home/lars/projects/Spacy',
-                                        revision_range)
+    proximities = read_proximities_from(args.root, revision_range)
     stats = proximity.sum_proximity_stats(proximities)
     presentation_order = sorted(stats, key=lambda p: p.total, reverse=True)
     as_csv(presentation_order)
@@ -138,6 +138,7 @@ if __name__ == "__main__":
     parser.add_argument('--end',
                         required=True,
                         help='The last commit hash to include')
+    parser.add_argument('--root', default='.', help='The repo root dir')
 
     args = parser.parse_args()
     run(args)
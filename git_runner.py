@@ -0,0 +1,165 @@
+import atexit
+import os
+import subprocess
+import threading
+import time
+from typing import Iterator, Optional, Tuple
+
+import instrument
+
+## Shared execution service for all git (and cloc) invocations.
+##
+## Bounds the number of concurrently running subprocesses, keeps one
+## long-lived `git cat-file --batch` and `--batch-check` process per
+## repository and records the latency of every command.
+## The number of concurrent commands defaults to the number of CPUs and
+## can be set with CRIMESCENE_GIT_WORKERS.
+##
+
+
+class _CatFile:
+    """ A long-lived `git cat-file --batch` or `--batch-check` process. """
+    def __init__(self, root: str, mode: str) -> None:
+        self._lock = threading.Lock()
+        self._process = subprocess.Popen(['git', 'cat-file', mode],
+                                         stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE,
+                                         cwd=root or None)
+        instrument.count('subprocess_spawns')
+
+    def _request(self, obj: str):
+        self._process.stdin.write(obj.encode('utf-8') + b'\n')
+        self._process.stdin.flush()
+        header = self._process.stdout.readline()
+        instrument.count('git_bytes_read', len(header))
+        if not header or header.endswith(b' missing\n') or header.endswith(
+                b' ambiguous\n'):
+            return None
+        sha, obj_type, size = header.split()
+        return sha.decode('utf-8'), obj_type.decode('utf-8'), int(size)
+
+    def read(self, obj: str) -> Optional[bytes]:
+        with self._lock:
+            info = self._request(obj)
+            if info is None:
+                return None
+            content = self._process.stdout.read(info[2])
+            self._process.stdout.read(1)
+            instrument.count('git_bytes_read', len(content))
+            return content
+
+    def info(self, obj: str) -> Optional[Tuple[str, str, int]]:
+        with self._lock:
+            return self._request(obj)
+
+    def close(self):
+        with self._lock:
+            self._process.stdin.close()
+            self._process.wait()
+
+
+class GitRunner:
+    def __init__(self, max_workers: int = None) -> None:
+        self._slots = threading.BoundedSemaphore(max_workers
+                                                 or os.cpu_count() or 1)
+        self._lock = threading.Lock()
+        self._cat_files = {}
+        self._latencies = {}
+
+    def _record(self, args, elapsed: float):
+        name = ' '.join(args[:2])
+        with self._lock:
+            n, total, max_time = self._latencies.get(name, (0, 0.0, 0.0))
+            self._latencies[name] = (n + 1, total + elapsed,
+                                     max(max_time, elapsed))
+
+    def latencies(self) -> dict:
+        """ Returns count, total and max latency in seconds per command. """
+        with self._lock:
+            return {
+                name: {
+                    'count': n,
+                    'total': total,
+                    'mean': total / n,
+                    'max': max_time
+                }
+                for name, (n, total, max_time) in self._latencies.items()
+            }
+
+    def run(self, root: str, args) -> bytes:
+        with self._slots, instrument.span(' '.join(args[:2])):
+            tic = time.perf_counter()
+            output = subprocess.run(args,
+                                    stdout=subprocess.PIPE,
+                                    cwd=root or None).stdout
+            self._record(args, time.perf_counter() - tic)
+        instrument.count('subprocess_spawns')
+        instrument.count(f'{args[0]}_bytes_read', len(output))
+        return output
+
+    def stream(self, root: str, args) -> Iterator[bytes]:
+        """ Yields the output of the command line by line. """
+        with self._slots:
+            tic = time.perf_counter()
+            process = subprocess.Popen(args,
+                                       stdout=subprocess.PIPE,
+                                       cwd=root or None)
+            instrument.count('subprocess_spawns')
+            try:
+                for line in process.stdout:
+                    instrument.count(f'{args[0]}_bytes_read', len(line))
+                    yield line
+            finally:
+                process.stdout.close()
+                process.wait()
+                self._record(args, time.perf_counter() - tic)
+
+    def _cat_file(self, root: str, mode: str) -> _CatFile:
+        key = (root, mode)
+        with self._lock:
+            cat_file = self._cat_files.get(key)
+            if cat_file is None:
+                cat_file = _CatFile(root=root, mode=mode)
+                self._cat_files[key] = cat_file
+            return cat_file
+
+    def show(self, root: str, obj: str) -> bytes:
+        """ Returns the content of obj, e.g. 'sha:path', or b'' if missing. """
+        tic = time.perf_counter()
+        content = self._cat_file(root, '--batch').read(obj)
+        self._record(['git', 'cat-file'], time.perf_counter() - tic)
+        return content or b''
+
+    def info(self, root: str, obj: str) -> Optional[Tuple[str, str, int]]:
+        """ Returns (sha, type, size) of obj or None if it is missing. """
+        return self._cat_file(root, '--batch-check').info(obj)
+
+    def close(self):
+        with self._lock:
+            cat_files = list(self._cat_files.values())
+            self._cat_files.clear()
+        for cat_file in cat_files:
+            cat_file.close()
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner() -> GitRunner:
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            workers = os.environ.get('CRIMESCENE_GIT_WORKERS')
+            _runner = GitRunner(max_workers=int(workers) if workers else None)
+            atexit.register(_runner.close)
+        return _runner
+
+
+def run_cmd(root: str, args) -> str:
+    return get_runner().run(root, args).decode('utf-8', errors='replace')
+
+
+def show_file(root: str, sha: str, filename: str) -> str:
+    return get_runner().show(root, f'{sha}:{filename}').decode(
+        'utf-8', errors='replace')
@@ -0,0 +1,218 @@
+import atexit
+import functools
+import io
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+## Lightweight instrumentation with named, nested spans and counters.
+##
+## Tracing is off by default, spans and counters are no-ops then.
+## Enable it programmatically with enable() or through the environment:
+##
+##  CRIMESCENE_TRACE=trace.json        write all spans on exit
+##  CRIMESCENE_TRACE_FORMAT=chrome     write Chrome trace format instead
+##  CRIMESCENE_PROFILE=1               cProfile every top-level span
+##  CRIMESCENE_TRACEMALLOC=1           record memory deltas per span
+##
+## cProfile and tracemalloc are only imported when they are enabled.
+##
+
+_NULL_SPAN = nullcontext()
+_enabled = False
+_profile = False
+_memory = False
+_lock = threading.Lock()
+_local = threading.local()
+_spans = []
+_counters = Counter()
+_origin = time.perf_counter()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable(profile: bool = False, memory: bool = False):
+    global _enabled, _profile, _memory
+    _profile = profile
+    _memory = memory
+    if memory:
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    if _memory:
+        import tracemalloc
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def reset():
+    global _origin
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _origin = time.perf_counter()
+
+
+def count(name: str, value: int = 1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] += value
+
+
+def counters() -> dict:
+    with _lock:
+        return dict(_counters)
+
+
+def spans() -> list:
+    with _lock:
+        return list(_spans)
+
+
+class _Span:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._start = 0.0
+        self._counters = None
+        self._profiler = None
+        self._memory = 0
+
+    def __enter__(self):
+        stack = _stack()
+        self.depth = len(stack)
+        stack.append(self)
+        self._counters = counters()
+        if _memory:
+            import tracemalloc
+            self._memory = tracemalloc.get_traced_memory()[0]
+        if _profile and self.depth == 0:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        if self._profiler:
+            self._profiler.disable()
+        _stack().pop()
+        after = counters()
+        record = {
+            'name': self.name,
+            'start': self._start - _origin,
+            'duration': end - self._start,
+            'depth': self.depth,
+            'thread': threading.get_ident(),
+            'counters': {
+                name: value - self._counters.get(name, 0)
+                for name, value in after.items()
+                if value != self._counters.get(name, 0)
+            }
+        }
+        if _memory:
+            import tracemalloc
+            record['memory_delta'] = tracemalloc.get_traced_memory(
+            )[0] - self._memory
+        if self._profiler:
+            import pstats
+            profile = io.StringIO()
+            pstats.Stats(self._profiler,
+                         stream=profile).sort_stats('cumulative').print_stats(
+                             20)
+            record['profile'] = profile.getvalue()
+        with _lock:
+            _spans.append(record)
+        return False
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = []
+        _local.stack = stack
+    return stack
+
+
+def span(name: str):
+    """ Context manager recording the time spent in a named block. """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def timer(func):
+    """ Records every call of func as a span named after the function. """
+    @functools.wraps(func)
+    def wrapper_timer(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        with _Span(func.__qualname__):
+            return func(*args, **kwargs)
+
+    return wrapper_timer
+
+
+######################################################################
+## Export
+######################################################################
+
+
+def as_json():
+    return {'spans': spans(), 'counters': counters()}
+
+
+def as_chrome_trace():
+    events = [{
+        'name': record['name'],
+        'ph': 'X',
+        'ts': 1e6 * record['start'],
+        'dur': 1e6 * record['duration'],
+        'pid': os.getpid(),
+        'tid': record['thread'],
+        'args': record['counters']
+    } for record in spans()]
+    end = max((event['ts'] + event['dur'] for event in events), default=0)
+    events.extend({
+        'name': name,
+        'ph': 'C',
+        'ts': end,
+        'pid': os.getpid(),
+        'args': {
+            name: value
+        }
+    } for name, value in counters().items())
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def export(path: str, chrome: bool = False):
+    with open(path, 'w') as trace_file:
+        trace_file.write(
+            json.dumps(as_chrome_trace() if chrome else as_json()))
+
+
+def _configure_from_environment():
+    path = os.environ.get('CRIMESCENE_TRACE')
+    if not path:
+        return
+    enable(profile=bool(os.environ.get('CRIMESCENE_PROFILE')),
+           memory=bool(os.environ.get('CRIMESCENE_TRACEMALLOC')))
+    atexit.register(export,
+                    path=path,
+                    chrome=os.environ.get('CRIMESCENE_TRACE_FORMAT') ==
+                    'chrome')
+
+
+_configure_from_environment()
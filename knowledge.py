@@ -0,0 +1,201 @@
+#!/bin/env python
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import numpy as np
+
+import stats_cache
+from transform.hierarchy import build_hierarchy
+from util import parse_date
+
+## Knowledge map of a time window as data for a D3.js enclosure diagram.
+##
+## The main developer of a file is the author with most added lines in
+## the window, the degree of ownership the share of these lines (as in
+## Code Maat's main-dev analysis). Both are taken from an author x file
+## contribution index which is built in one pass over the commits. The
+## strongest authors get the colors of the category20 palette, files
+## without added lines are black (see
+## transform/csv_main_dev_as_knowledge_json.py).
+##
+## Run the program as:
+##
+##  python knowledge.py --root ~/projects/repo --stats-path ~/.stats/repo \
+##      --begin 2021-01-01 --end 2021-06-30 > knowledge.json
+##
+
+PALETTE = [
+    '#1f77b4', '#aec7e8', '#ff7f0e', '#ffbb78', '#2ca02c', '#98df8a',
+    '#d62728', '#ff9896', '#9467bd', '#c5b0d5', '#8c564b', '#c49c94',
+    '#e377c2', '#f7b6d2', '#7f7f7f', '#c7c7c7', '#bcbd22', '#dbdb8d',
+    '#17becf', '#9edae5'
+]
+DEFAULT_COLOR = 'black'
+OTHER_COLOR = 'lightgray'
+
+
+class ContributionIndex:
+    """ Revisions and added lines per author and file of the commits
+        [lo, hi) of a GitLog. The entries are grouped by file id and
+        ordered by the first contribution of the author to the file.
+    """
+    def __init__(self, git_log, lo: int = 0, hi: int = None) -> None:
+        self.identities = git_log.identities
+        hi = len(git_log.commits) if hi is None else hi
+        author_ids = {}
+        rows = []
+        columns = []
+        added = []
+        for idx in range(lo, hi):
+            commit = git_log.commits[idx]
+            author_id = author_ids.setdefault(commit.author, len(author_ids))
+            change_ids = self.identities.change_ids[idx]
+            rows.extend([author_id] * len(change_ids))
+            columns.extend(change_ids)
+            added.extend(change.added_lines for change in commit.changes)
+        self.authors: List[str] = list(author_ids)
+
+        n_authors = max(len(self.authors), 1)
+        keys, first, inverse = np.unique(
+            np.array(columns, dtype=np.int64) * n_authors +
+            np.array(rows, dtype=np.int64),
+            return_index=True,
+            return_inverse=True)
+        order = np.lexsort((first, keys // n_authors))
+        keys = keys[order]
+        self.files = keys // n_authors
+        self.author_idx = keys % n_authors
+        self.revisions = np.bincount(inverse,
+                                     minlength=len(keys)).astype(
+                                         np.int64)[order]
+        self.added_lines = np.bincount(
+            inverse,
+            weights=np.array(added, dtype=np.float64),
+            minlength=len(keys)).astype(np.int64)[order]
+        n_files = self.identities.n_files
+        self._starts = np.searchsorted(self.files, np.arange(n_files + 1))
+
+    @classmethod
+    def for_window(cls, git_log, begin: datetime,
+                   end: datetime) -> 'ContributionIndex':
+        lo, hi = git_log.window(begin=begin, end=end)
+        return cls(git_log, lo=lo, hi=hi)
+
+    def _entries(self, filename: str):
+        file_id = self.identities.id_of(filename)
+        if file_id is None:
+            return slice(0, 0)
+        return slice(self._starts[file_id], self._starts[file_id + 1])
+
+    def authors_of(self, filename: str) -> Dict[str, float]:
+        """ Returns the share of the revisions per author. """
+        entries = self._entries(filename)
+        revisions = self.revisions[entries]
+        n_revs = int(revisions.sum())
+        return {
+            self.authors[author]: int(count) / n_revs
+            for author, count in zip(self.author_idx[entries], revisions)
+        }
+
+    def ownership(self):
+        """ Returns the main author index (-1 for none) and the degree of
+            ownership per file id.
+        """
+        n_files = len(self._starts) - 1
+        owners = np.full(n_files, -1, dtype=np.int64)
+        degrees = np.zeros(n_files)
+        if not len(self.files):
+            return owners, degrees
+        groups = self._starts[:-1][np.diff(self._starts) > 0]
+        # stable, so ties go to the author who contributed first
+        order = np.lexsort((-self.added_lines, self.files))
+        heads = order[groups]
+        totals = np.add.reduceat(self.added_lines, groups)
+        files = self.files[heads]
+        owners[files] = np.where(totals > 0, self.author_idx[heads], -1)
+        degrees[files] = self.added_lines[heads] / np.maximum(totals, 1)
+        return owners, degrees
+
+    def author_colors(self) -> Dict[str, str]:
+        """ Assigns the palette to the authors with most added lines. """
+        totals = np.bincount(self.author_idx,
+                             weights=self.added_lines,
+                             minlength=len(self.authors))
+        ranking = np.argsort(-totals, kind='stable')
+        return {
+            self.authors[author]:
+            PALETTE[rank] if rank < len(PALETTE) else OTHER_COLOR
+            for rank, author in enumerate(ranking)
+        }
+
+
+def main_authors(authors: Dict[str, float], max_authors: int = 3):
+    """ Keeps the authors with the max_authors highest shares and returns
+        them with the number of all authors.
+    """
+    valid = sorted(authors.values(), reverse=True)[:max_authors]
+    return {
+        author: share
+        for author, share in authors.items() if share in valid
+    }, len(authors)
+
+
+def knowledge_structure(index: ContributionIndex, sizes: Dict[str, float]):
+    """ Returns the enclosure structure of the files in sizes with their
+        size, degree of ownership as weight and the color of the main
+        author.
+    """
+    owners, degrees = index.ownership()
+    colors = index.author_colors()
+    identities = index.identities
+
+    def leaf(name):
+        file_id = identities.id_of(name)
+        owner = -1 if file_id is None else owners[file_id]
+        return name, {
+            'size': sizes[name],
+            'weight': 0.0 if owner < 0 else float(degrees[file_id]),
+            'author_color':
+            DEFAULT_COLOR if owner < 0 else colors[index.authors[owner]]
+        }
+
+    return build_hierarchy(leaf(name) for name in sizes)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Generates a JSON document suitable for knowledge '
+        'diagrams.')
+    parser.add_argument('--root', default='.', help='repo root dir')
+    parser.add_argument('--stats-path',
+                        default='.',
+                        help='directory of the cache files')
+    parser.add_argument('--begin', type=parse_date, help='first day')
+    parser.add_argument('--end', type=parse_date, help='last day')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from code_age import latest_lines
+    from git_log import GitLog
+
+    args = parse_args()
+    git_log = GitLog(root=args.root,
+                     commits=stats_cache.load_commits(args.stats_path),
+                     cache_dir=args.stats_path)
+    end = args.end + timedelta(days=1) if args.end else datetime.now(
+        tz=timezone.utc)
+    begin = args.begin or git_log.first_commit_date()
+    files = git_log.get_files_in_repository()
+    sizes = {
+        filename: lines
+        for filename, lines in latest_lines(
+            stats_cache.load_stats(args.stats_path), git_log).items()
+        if filename in files
+    }
+    json.dump(knowledge_structure(
+        ContributionIndex.for_window(git_log, begin=begin, end=end), sizes),
+              sys.stdout)
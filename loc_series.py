@@ -0,0 +1,88 @@
+import threading
+
+import numpy as np
+
+import miner.complexity_calculations as complexity_calculations
+from git_runner import get_runner
+
+NULL_SHA = '0' * 40
+SUBMODULE_MODE = '160000'
+
+
+class LocSeries:
+    """ Lines of code in the repository after each commit on the
+        first-parent history of rev.
+        Lines are counted once per blob, the running total is updated
+        from the raw diff of each commit against its first parent.
+    """
+    def __init__(self, root: str, rev: str = 'master', blob_lines=None) -> None:
+        self.root = root
+        self._blob_lines = {} if blob_lines is None else blob_lines
+        times = []
+        locs = []
+        loc = 0
+        for line in get_runner().stream(root, [
+                'git', 'log', '--first-parent', '-m', '--raw', '--root',
+                '--no-renames', '--no-abbrev', '--reverse',
+                '--pretty=format:commit %ct', rev
+        ]):
+            line = line.decode('utf-8', errors='replace').rstrip('\n')
+            if line.startswith('commit '):
+                if times:
+                    locs.append(loc)
+                times.append(int(line.split()[1]))
+            elif line.startswith(':'):
+                meta, path = line.split('\t', 1)
+                old_mode, new_mode, old_blob, new_blob, _ = meta[1:].split()
+                loc += self._lines(new_blob, new_mode, path) - self._lines(
+                    old_blob, old_mode, path)
+        if times:
+            locs.append(loc)
+        # committer dates on the first-parent history are almost but not
+        # necessarily strictly ordered
+        self.times = np.maximum.accumulate(np.array(times, dtype=np.int64))
+        self.locs = np.array(locs, dtype=np.int64)
+        self._padded_locs = np.concatenate(([0], self.locs))
+
+    def _lines(self, blob: str, mode: str, path: str) -> int:
+        if blob == NULL_SHA or mode == SUBMODULE_MODE or path.endswith('.enc'):
+            return 0
+        lines = self._blob_lines.get(blob)
+        if lines is None:
+            lines = complexity_calculations.compute_lines(
+                get_runner().show(self.root,
+                                  blob).decode('utf-8', errors='replace'))
+            self._blob_lines[blob] = lines
+        return lines
+
+    def locs_at(self, times) -> np.ndarray:
+        """ Returns the lines of code at each time in seconds since epoch,
+            0 before the first commit.
+        """
+        return self._padded_locs[np.searchsorted(self.times, times,
+                                                 side='right')]
+
+    def loc_at(self, time: float) -> int:
+        return int(self.locs_at(time))
+
+
+_blob_lines = {}
+_series = {}
+_lock = threading.Lock()
+
+
+def get_loc_series(root: str, rev: str = 'master') -> LocSeries:
+    """ Returns the series for the current head of rev. Blob line counts
+        are kept per repository and reused when the head moves.
+    """
+    info = get_runner().info(root, rev)
+    head = info[0] if info else ''
+    with _lock:
+        cached = _series.get((root, rev))
+        blob_lines = _blob_lines.setdefault(root, {})
+    if cached is not None and cached[0] == head:
+        return cached[1]
+    series = LocSeries(root=root, rev=rev, blob_lines=blob_lines)
+    with _lock:
+        _series[(root, rev)] = (head, series)
+    return series
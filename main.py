@@ -1,35 +1,37 @@
 from long_term_plot import LongTermPlot
-from desc_stats import as_stats
-import json
-import re
 
-from stats_cache import load_commits, load_stats
+from model import AnalysisModel, get_model
+from projects import get_registry
 from get_wordcloud import get_new_workcloud_plot
-from git_log import GitLog
+from analysis import get_age
 from file_analysis import FileAnalysis
-from util import ms_to_datetime, timer, to_days
+from source_data import float_column, int_column
+from util import ms_to_datetime, timer
 import math
 import os
 import sys
-import time
+from typing import List
+
+import numpy as np
 
 sys.path.append(os.path.dirname(os.path.realpath(__file__)))
 from datetime import datetime, timedelta, timezone
 
 from bokeh.layouts import column, row
-from bokeh.models import ColumnDataSource, Select, Div, DateRangeSlider, Button
+from bokeh.models import (Button, CDSView, ColumnDataSource, DateRangeSlider,
+                          Div, IndexFilter, Select)
 from bokeh.plotting import curdoc, figure
-from pathlib import Path
 
 import transform.csv_as_enclosure_json as csv_as_enclosure_json
 from circular_package import CircularPackage
-from color_map import get_colors
+from color_map import (color_range, get_color_mapper, recolor_callback,
+                       set_capped_log)
+from coupling import coupling_columns, highlight_callback, soc_callback
 
-HOME = str(Path.home())
 CONTROL_WIDTH = 420
 PLOT_WIDTH = 1200
 PLOT_HEIGHT = 900
-WORDCLOUD_IDX = 2
+WORDCLOUD_IDX = 3
 COLUMNS = [
     'revisions', 'loc', 'complexity', 'mean_complexity', 'complexity_max',
     'complexity_sd', 'soc', 'churn', 'churn/line', 'age', 'proximity',
@@ -45,130 +47,23 @@ LONG_TERM_PLOT_CRITERIA = [
 LEVELS = ['file', 'module']
 
 
-def get_module_map(config):
-    def module_map(name: str):
-        for module, module_regex in config["modules"].items():
-            match = re.match(module_regex, name)
-            if match:
-                return module
-        return f'Project {config["project"]}'
-
-    return module_map
-
-
-def get_age(stats, inverse=False):
-    def f(value):
-        return 1 / value if inverse else value
-
-    return {
-        name:
-        f(to_days(datetime.now(tz=timezone.utc) - stats[name]['last_change']))
-        for name in stats
-    }
-
-
-@timer
-def add_stats_for_module(module_stats, file_stats, module_map):
-    for filename, data in file_stats.items():
-        module = module_map(filename)
-        module_stats[module]['loc'] += data['loc']
-        module_stats[module]['lines'] += data['lines']
-        module_stats[module]['complexity'] += data['complexity']
-        module_stats[module]['complexity_max'] = max(
-            module_stats[module]['complexity_max'], data['complexity'])
-        module_stats[module]['proximity'] += data['proximity']
-        module_stats[module]['proximity_max'] = max(
-            module_stats[module]['proximity_max'], data['proximity'])
-    for data in module_stats.values():
-        data['mean_complexity'] = data['complexity'] / data['lines']
-        data['mean_proximity'] = data['proximity'] / data['revisions']
-
-
-@timer
-def get_current_stats(full_stats, git_log: GitLog, begin: datetime,
-                      end: datetime):
-    stats = git_log.get_revisions_only(begin=begin, end=end)
-    files = git_log.get_files_in_repository()
-    to_remove = [key for key in stats if key not in files]
-    for key in to_remove:
-        del stats[key]
-    for filename in files:
-        data = full_stats.get(filename)
-        if not data:
-            continue
-        shas_with_time = tuple(
-            (sha, git_log.get_time_from_sha(sha)) for sha in data.keys())
-        shas_with_time = tuple(
-            (sha, t) for sha, t in shas_with_time if t <= end)
-        shas_with_time = tuple(
-            sorted(shas_with_time, key=lambda x: x[1], reverse=True))
-        period_shas = tuple(sha for sha, t in shas_with_time if begin <= t)
-        if not shas_with_time:
-            stats[filename].update({
-                'last_change': 0,
-                'loc': 0,
-                'lines': 0,
-                'complexity': 0,
-                'mean_complexity': 0,
-                'complexity_sd': 0,
-                'complexity_max': 0,
-                'proximity': 0,
-                'mean_proximity': 0,
-                'proximity_sd': 0,
-                'proximity_max': 0,
-                'authors': ({}, 0)
-            })
-            continue
-        last_sha, last_change_time = shas_with_time[0]
-
-        proximity_stats = as_stats(
-            'proximity',
-            tuple(data['proximity']
-                  for sha, data in full_stats[filename].items()
-                  if sha in period_shas))
-        stats[filename].update({
-            'last_change':
-            last_change_time,
-            'loc':
-            full_stats[filename][last_sha]['lines'],  # FIXME
-            'lines':
-            full_stats[filename][last_sha]['lines'],
-            'complexity':
-            full_stats[filename][last_sha]['complexity']['total'],
-            'mean_complexity':
-            full_stats[filename][last_sha]['complexity']['mean'],
-            'complexity_sd':
-            full_stats[filename][last_sha]['complexity']['sd'],
-            'complexity_max':
-            full_stats[filename][last_sha]['complexity']['max'],
-            'proximity':
-            proximity_stats.total,
-            'mean_proximity':
-            proximity_stats.mean(),
-            'proximity_sd':
-            proximity_stats.sd(),
-            'proximity_max':
-            proximity_stats.max_value(),
-            'authors':
-            git_log.get_main_authors(filename=filename)
-        })
-
-    return stats
-
-
 class App:
-    def __init__(self, config) -> None:
-        self.__config = config
-        self.git_log = GitLog(root=self.__config['path'],
-                              commits=load_commits())
+    def __init__(self, model: AnalysisModel, projects: List[str]) -> None:
+        self.model = model
+        self.module_map = model.module_map
+        self.git_log = model.git_log
 
         today = datetime.now(tz=timezone.utc)
         period_start = today - timedelta(days=800)
         self.selected = []
-        self.full_stats = load_stats()
+        self.full_stats = model.full_stats
+        self.window = model.new_window()
         self.stats = {}
         self.module_stats = {}
         self.summary = Div(text='', width=CONTROL_WIDTH, height=100)
+        self.project_menu = Select(title='Project',
+                                   value=model.name,
+                                   options=projects)
 
         self.file_analysis = FileAnalysis(git_log=self.git_log,
                                           selected_file='',
@@ -180,6 +75,15 @@ class App:
         self.source = ColumnDataSource(
             data=dict(x=[], y=[], module=[], revisions=[], size=[]))
         self.source.selected.on_change('indices', self.update_selected)  # pylint: disable=no-member
+        self.coupling_source = ColumnDataSource(
+            data=dict(file=[], coupled=[], count=[]))
+        self.coupling_filter = IndexFilter(indices=[])
+        coupling_highlight = highlight_callback(
+            table=self.source,
+            couplings=self.coupling_source,
+            view_filter=self.coupling_filter)
+        self.source.selected.js_on_change('indices', coupling_highlight)  # pylint: disable=no-member
+        self.source.js_on_change('data', coupling_highlight)
         self.x_menu = Select(title='X-Axis', value=COLUMNS[3], options=COLUMNS)
         self.x_menu.on_change('value', self.update_table)
 
@@ -187,7 +91,12 @@ class App:
         self.y_menu.on_change('value', self.update_table)
 
         self.color = Select(title='Color', value=COLUMNS[6], options=COLUMNS)
-        self.color.on_change('value', self.update_table)
+        self.color_mapper = get_color_mapper([])
+        self.recolor = recolor_callback(
+            source=self.source,
+            mapper=self.color_mapper,
+            field_names={'churn/line': 'churn_per_line'})
+        self.color.js_on_change('value', self.recolor)
 
         self.level = LEVELS[0]
         self.level_menu = Select(title='Level',
@@ -199,6 +108,10 @@ class App:
                                       value=CIRC_PACK_CRITERIA[1],
                                       options=CIRC_PACK_CRITERIA)
         self.circ_pack_color.on_change('value', self.update_circ_pack_color)
+        self.soc_highlight = soc_callback(table=self.source,
+                                          couplings=self.coupling_source,
+                                          mode=self.circ_pack_color)
+        self.source.selected.js_on_change('indices', self.soc_highlight)  # pylint: disable=no-member
 
         self.range_slider = DateRangeSlider(
             start=self.git_log.first_commit_date(),
@@ -219,11 +132,13 @@ class App:
         self.minus_button.on_click(self.decrease_dates)
 
         self.long_term_plot = LongTermPlot(stats=self.stats,
+                                           full_stats=self.full_stats,
                                            git_log=self.git_log,
                                            period_start=period_start,
                                            period_end=today,
                                            width=PLOT_WIDTH,
-                                           height=PLOT_HEIGHT)
+                                           height=PLOT_HEIGHT,
+                                           rising_hotspots=model.rising_hotspots)
 
         wordcloud = get_new_workcloud_plot(git_log=self.git_log,
                                            end=self.date_slider_value(),
@@ -232,7 +147,8 @@ class App:
         self.update_stats(period_start=period_start, period_end=today)
         self.update_source()
         self.circular_package = self.get_circular_package()
-        controls = column(row(self.minus_button, self.plus_button),
+        controls = column(self.project_menu,
+                          row(self.minus_button, self.plus_button),
                           self.summary,
                           wordcloud,
                           self.x_menu,
@@ -285,20 +201,6 @@ class App:
         return self.stats
 
     def get_circ_color_data(self, value):
-        if value == 'soc' and self.selected:
-
-            selected_file = self.get_selected_file()
-            begin, end = self.get_period_as_datetime()
-            couplings, _ = self.git_log.get_couplings(filename=selected_file,
-                                                      begin=begin,
-                                                      end=end)
-
-            def get_value(name):
-                return 2 + 2 * couplings[
-                    name] if name in couplings else 1 if name == selected_file else 0
-
-            return {module: get_value(module) for module in self.get_stats()}
-
         if value == 'author':
             main_authors = {
                 module: list(
@@ -348,13 +250,17 @@ class App:
     def get_circular_package(self):
         circ_data = translate_dict(csv_as_enclosure_json.run(
             self.get_stats()))['children']
-        return CircularPackage(data=circ_data,
-                               width=PLOT_HEIGHT,
-                               height=PLOT_HEIGHT,
-                               color_data=self.get_circ_color_data(
-                                   self.circ_pack_color.value),
-                               stats=self.get_stats(),
-                               selected_callback=self.update_circ_selected)
+        circular_package = CircularPackage(
+            data=circ_data,
+            width=PLOT_HEIGHT,
+            height=PLOT_HEIGHT,
+            color_data=self.get_circ_color_data(self.circ_pack_color.value),
+            stats=self.get_stats(),
+            selected_callback=self.update_circ_selected)
+        self.soc_highlight.args = dict(self.soc_highlight.args,
+                                       circles=circular_package.source)
+        circular_package.source.js_on_change('data', self.soc_highlight)
+        return circular_package
 
     def date_slider_value(self):
         return ms_to_datetime(self.range_slider.value[1])
@@ -373,21 +279,14 @@ class App:
         n_authors = len(authors)
         self.summary.text = f'Summary:</br>#files: {len(self.get_stats())}</br>#changed: {n_changed}</br>#authors: {n_authors}'
 
+    @timer
     def update_stats(self, period_start: datetime, period_end: datetime):
-        t0 = time.time()
-        self.stats = get_current_stats(full_stats=self.full_stats,
-                                       git_log=self.git_log,
-                                       begin=period_start,
-                                       end=period_end)
-        t1 = time.time()
-        print(f'time: {t1 - t0}')
-        self.module_stats = self.git_log.get_revisions_for_module(
-            begin=period_start,
-            end=period_end,
-            module_map=get_module_map(self.__config))
-        add_stats_for_module(module_stats=self.module_stats,
-                             file_stats=self.get_stats(),
-                             module_map=get_module_map(self.__config))
+        window_stats = self.model.window_stats(begin=period_start,
+                                               end=period_end,
+                                               window=self.window)
+        self.stats = window_stats.file_stats
+        self.module_stats = window_stats.module_stats
+        self.coupling_source.data = coupling_columns(window_stats.couplings)
         self.update_summary()
         self.long_term_plot.update(stats=self.get_stats(),
                                    period_start=period_start,
@@ -404,6 +303,7 @@ class App:
         period_start, period_end = self.range_slider.value
         return ms_to_datetime(period_start), ms_to_datetime(period_end)
 
+    @timer
     def update_date_range(self):
         self.circular_package.reset_selection()
         period_start, period_end = self.get_period_as_datetime()
@@ -420,152 +320,93 @@ class App:
         else:
             self.update_source_for_file()
 
+    def _source_data(self, stats, churn_per_line_default: float):
+        """ Returns the columns of the table for stats as typed arrays. """
+        values = list(stats.values())
+
+        def summed(key):
+            return int_column(
+                sum(churn[key] for churn in data['churn']) for data in values)
+
+        added = summed('added_lines')
+        removed = summed('removed_lines')
+        churn = added + removed
+        lines = int_column(data['lines'] for data in values)
+        churn_per_line = np.full(len(values), churn_per_line_default)
+        np.divide(churn, lines, out=churn_per_line, where=lines > 0)
+        columns = dict(
+            module=list(stats.keys()),
+            loc=int_column(data['loc'] for data in values),
+            revisions=int_column(data['revisions'] for data in values),
+            lines=lines,
+            soc=int_column(data['soc'] for data in values),
+            age=float_column(get_age(stats).values()),
+            churn_overview=[
+                f'{total}:{added_lines}:{removed_lines}'
+                for total, added_lines, removed_lines in zip(
+                    churn, added, removed)
+            ],
+            churn=churn,
+            churn_per_line=churn_per_line)
+        for name in [
+                'complexity', 'mean_complexity', 'complexity_sd',
+                'complexity_max', 'proximity', 'mean_proximity',
+                'proximity_sd', 'proximity_max'
+        ]:
+            columns[name] = float_column(data[name] for data in values)
+        return columns
+
+    def _color_data(self, columns, values, capped_log: bool):
+        # the browser recolors the same way when the color menu changes
+        set_capped_log(self.recolor, ['churn/line'] if capped_log else [])
+        if self.color.value == 'churn':
+            return columns['churn']
+        if self.color.value == 'churn/line':
+            return np.minimum(np.log1p(columns['churn_per_line']),
+                              2) if capped_log else columns['churn_per_line']
+        return float_column(data[self.color.value] for data in values)
+
     @timer
     def update_source_for_file(self):
-        churn = [
-            sum(churn['added_lines'] + churn['removed_lines']
-                for churn in data['churn'])
-            for data in self.get_stats().values()
-        ]
-        churn_per_line = [(sum(churn['added_lines'] + churn['removed_lines']
-                               for churn in data['churn']) /
-                           data['lines']) if data['lines'] else 99999.9
-                          for data in self.get_stats().values()]
-        color_data = []
-        if self.color.value == 'churn':
-            color_data = churn
-        elif self.color.value == 'churn/line':
-            color_data = [min(math.log(1 + val), 2) for val in churn_per_line]
-        else:
-            color_data = [
-                data[self.color.value] for data in self.get_stats().values()
-            ]
+        stats = self.get_stats()
+        columns = self._source_data(stats, churn_per_line_default=99999.9)
+        color_data = self._color_data(columns,
+                                      stats.values(),
+                                      capped_log=True)
 
         def get_author(author, ratio):
             return f'{author} ({round(ratio,2)})'
 
-        print(f'len {len(self.get_stats())}')
-
         self.source.data = dict(
-            module=list(self.get_stats().keys()),
-            loc=[data['loc'] for data in self.get_stats().values()],
-            revisions=[
-                data['revisions'] for data in self.get_stats().values()
-            ],
-            size=[
-                9 + 0.2 * float(data['loc'])
-                for data in self.get_stats().values()
-            ],
-            lines=[data['lines'] for data in self.get_stats().values()],
-            complexity=[
-                data['complexity'] for data in self.get_stats().values()
-            ],
-            mean_complexity=[
-                data['mean_complexity'] for data in self.get_stats().values()
-            ],
-            complexity_sd=[
-                data['complexity_sd'] for data in self.get_stats().values()
-            ],
-            complexity_max=[
-                data['complexity_max'] for data in self.get_stats().values()
-            ],
-            proximity=[
-                data['proximity'] for data in self.get_stats().values()
-            ],
-            mean_proximity=[
-                data['mean_proximity'] for data in self.get_stats().values()
-            ],
-            proximity_sd=[
-                data['proximity_sd'] for data in self.get_stats().values()
-            ],
-            proximity_max=[
-                data['proximity_max'] for data in self.get_stats().values()
-            ],
-            soc=[data['soc'] for data in self.get_stats().values()],
-            color=get_colors(color_data),
+            columns,
+            size=9 + 0.2 * columns['loc'],
+            color_value=color_data,
             authors=[
                 ', '.join(
                     get_author(author, ratio)
-                    for author, ratio in self.git_log.get_main_authors(
-                        filename=filename)[0].items())
-                for filename in self.get_stats()
-            ],
-            n_authors=[
-                self.get_stats()[name]['authors'][1]
-                for name in self.get_stats()
-            ],
-            age=list(get_age(self.get_stats()).values()),
-            churn_overview=[
-                f"{sum(churn['added_lines'] + churn['removed_lines'] for churn in data['churn'])}:{sum(churn['added_lines'] for churn in data['churn'])}:{sum(churn['removed_lines'] for churn in data['churn'])}"
-                for data in self.get_stats().values()
+                    for author, ratio in data.get('authors', ({},
+                                                              0))[0].items())
+                for data in stats.values()
             ],
-            churn=churn,
-            churn_per_line=churn_per_line)
+            n_authors=int_column(data['authors'][1]
+                                 for data in stats.values()))
+        self.color_mapper.low, self.color_mapper.high = color_range(
+            color_data)
 
     @timer
     def update_source_for_module(self):
         stats = self.module_stats
-        churn = [
-            sum(churn['added_lines'] + churn['removed_lines']
-                for churn in data['churn']) for data in stats.values()
-        ]
-        for f, d in stats.items():
-            if d['lines'] == 0:
-                print(f'no lines in {f}')
-        churn_per_line = [
-            sum(churn['added_lines'] + churn['removed_lines']
-                for churn in data['churn']) / data['lines']
-            for data in stats.values()
-        ]
-        color_data = []
-        if self.color.value == 'churn':
-            color_data = churn
-        elif self.color.value == 'churn/line':
-            color_data = churn_per_line
-        else:
-            color_data = [data[self.color.value] for data in stats.values()]
-
-        sizes = [
-            9 + 0.5 * math.sqrt(float(data['loc'])) for data in stats.values()
-        ]
-
-        def get_author(author, ratio):
-            return f'{author} ({round(ratio,2)})'
-
-        self.source.data = dict(
-            module=list(stats.keys()),
-            loc=[data['loc'] for data in stats.values()],
-            revisions=[data['revisions'] for data in stats.values()],
-            size=sizes,
-            lines=[data['lines'] for data in stats.values()],
-            complexity=[data['complexity'] for data in stats.values()],
-            mean_complexity=[
-                data['mean_complexity'] for data in stats.values()
-            ],
-            complexity_sd=[data['complexity_sd'] for data in stats.values()],
-            complexity_max=[data['complexity_max'] for data in stats.values()],
-            proximity=[data['proximity'] for data in stats.values()],
-            mean_proximity=[data['mean_proximity'] for data in stats.values()],
-            proximity_sd=[data['proximity_sd'] for data in stats.values()],
-            proximity_max=[data['proximity_max'] for data in stats.values()],
-            soc=[data['soc'] for data in stats.values()],
-            color=get_colors(color_data),
-            authors=[
-                '' for _ in stats
-                # ', '.join(
-                #     get_author(author, ratio)
-                #     for author, ratio in self.git_log.get_main_authors(
-                #         filename=filename)[0].items()) for filename in stats
-            ],
-            n_authors=['' for _ in stats],
-            # n_authors=[stats[filename]['authors'][1] for filename in stats],
-            age=list(get_age(stats).values()),
-            churn_overview=[
-                f"{sum(churn['added_lines'] + churn['removed_lines'] for churn in data['churn'])}:{sum(churn['added_lines'] for churn in data['churn'])}:{sum(churn['removed_lines'] for churn in data['churn'])}"
-                for data in stats.values()
-            ],
-            churn=churn,
-            churn_per_line=churn_per_line)
+        columns = self._source_data(stats, churn_per_line_default=np.nan)
+        color_data = self._color_data(columns,
+                                      stats.values(),
+                                      capped_log=False)
+        self.source.data = dict(columns,
+                                size=9 + 0.5 * np.sqrt(columns['loc']),
+                                color_value=color_data,
+                                authors=['' for _ in stats],
+                                n_authors=['' for _ in stats])
+        self.color_mapper.low, self.color_mapper.high = color_range(
+            color_data)
 
     @timer
     def create_figure(self):
@@ -606,12 +447,22 @@ class App:
         p.circle(x=x_title,
                  y=y_title,
                  source=self.source,
-                 color='color',
+                 color=dict(field='color_value',
+                            transform=self.color_mapper),
                  size='size',
                  line_color="white",
                  alpha=0.6,
                  hover_color='white',
                  hover_alpha=0.5)
+        p.circle(x=x_title,
+                 y=y_title,
+                 source=self.source,
+                 view=CDSView(source=self.source,
+                              filters=[self.coupling_filter]),
+                 size='size',
+                 fill_alpha=0,
+                 line_color='black',
+                 line_width=2)
         return p
 
     def get_selected_file(self):
@@ -648,9 +499,6 @@ class App:
         if len(self.layout.children[1].children) == 2 and self.selected:  # pylint: disable=unsubscriptable-object
             self.layout.children[1].children.append(  # pylint: disable=no-member,unsubscriptable-object
                 self.file_analysis.get_plot())
-        if self.circ_pack_color.value == 'soc':
-            self.update_circ_pack_color('value', '',
-                                        self.circ_pack_color.value)
 
 
 MIN_DATUM = 0.0
@@ -670,16 +518,13 @@ def translate_dict(d):
     return new_d
 
 
-def get_config():
-    with open('crimescene/.config', 'r') as config_file:
-        config = json.loads(config_file.read())
-        config['stats_path'] = f'{HOME}/.stats/{config["project"]}'
-        if not config['path'].endswith('/'):
-            config['path'] += '/'
-        return config
+def show_project(doc, name: str):
+    app = App(model=get_model(name), projects=get_registry().names())
+    app.project_menu.on_change(
+        'value', lambda attr, old, new: show_project(doc, new))
+    doc.clear()
+    doc.add_root(app.layout)
+    doc.title = f'Crime Scene - {name}'
 
 
-print(f'CONFIG: {get_config()}')
-app = App(config=get_config())
-curdoc().add_root(app.layout)
-curdoc().title = "Crime Scene"
+show_project(curdoc(), get_registry().names()[0])
@@ -0,0 +1,116 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, NamedTuple, Tuple
+
+from analysis import (LastChanges, add_stats_for_module, get_current_stats,
+                      get_module_map)
+from git_log import MAX_CACHED_WINDOWS
+from projects import Project, get_registry
+from rank_change import RisingHotspots
+from sliding_window import SlidingWindow
+
+## Analysis data shared by all sessions of a bokeh server process.
+##
+## The commit index, the full stats and the indexes derived from them
+## are loaded once per project and never modified afterwards. The stats
+## of a time window are computed once under the model lock and then
+## handed to every session asking for the same window. Sessions keep
+## their view state and their own SlidingWindow, which computes the
+## windows not cached yet, and must treat all returned objects as
+## read-only.
+##
+
+DEFAULT_PERIOD = timedelta(days=800)
+
+
+class WindowStats(NamedTuple):
+    file_stats: Dict[str, dict]
+    module_stats: Dict[str, dict]
+    couplings: Dict[str, Tuple[Dict[str, int], int]]
+
+
+class AnalysisModel:
+    def __init__(self, project: Project) -> None:
+        self.project = project
+        self.name = project.name
+        self.config = project.config
+        self.git_log = project.git_log
+        self.full_stats = project.full_stats
+        self.module_map = get_module_map(project.config)
+        self.rising_hotspots = RisingHotspots(full_stats=self.full_stats,
+                                              git_log=self.git_log)
+        self.last_changes = LastChanges(full_stats=self.full_stats,
+                                        git_log=self.git_log)
+        self._lock = threading.Lock()
+        self._windows: 'OrderedDict[Tuple[int, int], WindowStats]' = OrderedDict(
+        )
+
+    def new_window(self) -> SlidingWindow:
+        """ Returns a sliding window for one session. """
+        return SlidingWindow(git_log=self.git_log,
+                             module_map=self.module_map,
+                             full_stats=self.full_stats)
+
+    def window_stats(self,
+                     begin: datetime,
+                     end: datetime,
+                     window: SlidingWindow = None) -> WindowStats:
+        """ Returns the file and module stats and the couplings of the
+            commits between begin and end. A window not cached yet is
+            computed by moving the session's window, or a new one.
+        """
+        key = self.git_log.window(begin=begin, end=end)
+        with self._lock:
+            stats = self._windows.get(key)
+            if stats is not None:
+                self._windows.move_to_end(key)
+                return stats
+            window = (window or self.new_window()).move(begin=begin, end=end)
+            file_stats = get_current_stats(full_stats=self.full_stats,
+                                           git_log=self.git_log,
+                                           begin=begin,
+                                           end=end,
+                                           window=window,
+                                           last_changes=self.last_changes)
+            module_stats = window.module_revisions()
+            add_stats_for_module(module_stats=module_stats,
+                                 file_stats=file_stats,
+                                 module_map=self.module_map)
+            stats = WindowStats(file_stats=file_stats,
+                                module_stats=module_stats,
+                                couplings=self.git_log.get_top_couplings(
+                                    begin=begin, end=end))
+            self._windows[key] = stats
+            if len(self._windows) > MAX_CACHED_WINDOWS:
+                self._windows.popitem(last=False)
+            return stats
+
+    def warm_up(self):
+        """ Computes the default window of new sessions if it has commits. """
+        end = datetime.now(tz=timezone.utc)
+        begin = end - DEFAULT_PERIOD
+        lo, hi = self.git_log.window(begin=begin, end=end)
+        if lo < hi:
+            self.window_stats(begin=begin, end=end)
+
+
+_models: Dict[str, AnalysisModel] = {}
+_models_lock = threading.Lock()
+
+
+def get_model(name: str) -> AnalysisModel:
+    """ Returns the model of the project, reloaded by the registry when
+        its caches changed. Models of evicted projects are released.
+    """
+    registry = get_registry()
+    project = registry.get(name)
+    with _models_lock:
+        model = _models.get(name)
+        if model is None or model.project is not project:
+            model = AnalysisModel(project)
+            _models[name] = model
+        loaded = set(registry.loaded())
+        for other in [other for other in _models if other not in loaded]:
+            del _models[other]
+        return model
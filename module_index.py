@@ -0,0 +1,59 @@
+import re
+from typing import List, Optional, Pattern
+
+# numbered group references, which an alternation would renumber
+NUMBERED_REFERENCE = re.compile(r'\\[1-9]|\(\?\(\d')
+
+
+def _alternation(module_regexes: List[str]) -> Optional[Pattern]:
+    """ Returns the module regexes as one alternation with a named group
+        per module, None if joining them would change their meaning.
+    """
+    if any(
+            NUMBERED_REFERENCE.search(module_regex)
+            for module_regex in module_regexes):
+        return None
+    try:
+        return re.compile('|'.join(
+            f'(?P<_m{idx}>{module_regex})'
+            for idx, module_regex in enumerate(module_regexes)))
+    except re.error:
+        # e.g. a group name used by two modules or global inline flags
+        return None
+
+
+class ModuleIndex:
+    """ Maps file names to the modules configured in the project config.
+        The module regexes are compiled once into a single alternation
+        if possible and tried one by one otherwise, the first module
+        whose regex matches wins. Each file name is resolved only once.
+    """
+    def __init__(self, config) -> None:
+        self.modules = list(config['modules'].keys())
+        self.modules.append(f'Project {config["project"]}')
+        self.default_id = len(self.modules) - 1
+        module_regexes = list(config['modules'].values())
+        self._regexes = [
+            re.compile(module_regex) for module_regex in module_regexes
+        ]
+        self._regex = _alternation(module_regexes) if module_regexes else None
+        self._module_ids = {}
+
+    def _match(self, name: str) -> int:
+        if self._regex:
+            match = self._regex.match(name)
+            return int(match.lastgroup[2:]) if match else self.default_id
+        for module_id, regex in enumerate(self._regexes):
+            if regex.match(name):
+                return module_id
+        return self.default_id
+
+    def module_id(self, name: str) -> int:
+        module_id = self._module_ids.get(name)
+        if module_id is None:
+            module_id = self._match(name)
+            self._module_ids[name] = module_id
+        return module_id
+
+    def __call__(self, name: str) -> str:
+        return self.modules[self.module_id(name)]
@@ -1,12 +1,8 @@
 from collections import defaultdict
 import time
 import re
-import subprocess
 
-
-def _run_cmd(root, args):
-    return subprocess.Popen(args, stdout=subprocess.PIPE,
-                            cwd=root).communicate()[0].decode("utf-8")
+from git_runner import run_cmd as _run_cmd
 
 
 def _read_revisions_matching(root, git_arguments):
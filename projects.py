@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import stats_cache
+from columnar_store import COLUMNS_NAME, ColumnarStore, has_columns
+from git_log import GitLog
+from update_cache import update_cache
+
+## Multi-project mode.
+##
+## A projects file holds a list of project configs (the same format as
+## crimescene/.config). Each project keeps its caches in its own
+## config['stats_path'] directory. The registry loads projects on demand
+## and evicts the least recently used ones when the estimated memory of
+## all loaded projects exceeds the budget (CRIMESCENE_MEMORY_BUDGET_MB).
+## Cache updates of many repositories run on one shared process pool,
+## once or every --interval minutes. Server processes pick up updated
+## caches on their next access through the registry.
+## Projects whose caches were converted to columns (see columnar_store)
+## read their stats from the mapped column files, which all server
+## processes share.
+##
+
+HOME = str(Path.home())
+CONFIG_PATH = 'crimescene/.config'
+PROJECTS_PATH = 'crimescene/projects.json'
+DEFAULT_MEMORY_BUDGET_MB = 2048
+# the loaded python objects take several times the size of their json
+JSON_MEMORY_FACTOR = 8
+
+
+def complete_config(config: dict) -> dict:
+    config = dict(config)
+    config.setdefault('stats_path', f'{HOME}/.stats/{config["project"]}')
+    if not config['path'].endswith('/'):
+        config['path'] += '/'
+    return config
+
+
+def read_configs(path: str = None) -> List[dict]:
+    """ Reads the project configs from path. Without path the projects file
+        is used if it exists and the single project config otherwise.
+    """
+    if path is None:
+        path = PROJECTS_PATH if os.path.isfile(PROJECTS_PATH) else CONFIG_PATH
+    with open(path, 'r') as config_file:
+        configs = json.loads(config_file.read())
+    if isinstance(configs, dict):
+        configs = [configs]
+    return [complete_config(config) for config in configs]
+
+
+def _cache_files(directory: str) -> List[str]:
+    return [
+        os.path.join(directory, name)
+        for name in (stats_cache.COMMITS_NAME, stats_cache.STATS_NAME)
+    ]
+
+
+def cache_version(directory: str):
+    columns = os.path.join(directory, COLUMNS_NAME)
+    return tuple(
+        os.path.getmtime(path) if os.path.isfile(path) else 0
+        for path in _cache_files(directory)) + (
+            os.path.getmtime(columns) if os.path.isdir(columns) else 0, )
+
+
+def estimated_memory(directory: str, columnar: bool = False) -> int:
+    """ Returns the estimated memory of the loaded caches. The mapped
+        stats columns are shared and not counted.
+    """
+    names = [stats_cache.COMMITS_NAME] if columnar else [
+        stats_cache.COMMITS_NAME, stats_cache.STATS_NAME
+    ]
+    return JSON_MEMORY_FACTOR * sum(
+        os.path.getsize(path)
+        for path in (os.path.join(directory, name) for name in names)
+        if os.path.isfile(path))
+
+
+class Project:
+    def __init__(self, config: dict) -> None:
+        self.config = config
+        self.name = config['project']
+        directory = config['stats_path']
+        self.version = cache_version(directory)
+        columnar = has_columns(directory, _cache_files(directory))
+        self.memory = estimated_memory(directory, columnar=columnar)
+        if columnar:
+            store = ColumnarStore(directory)
+            commits = store.commits()
+            self.full_stats = store.stats()
+        else:
+            commits = stats_cache.load_commits(directory)
+            self.full_stats = stats_cache.load_stats(directory)
+        self.git_log = GitLog(root=config['path'],
+                              commits=commits,
+                              cache_dir=directory)
+
+
+class ProjectRegistry:
+    """ Loads projects on demand and keeps the most recently used ones
+        within the memory budget. A project is reloaded when its cache
+        files changed on disk, e.g. after an update.
+    """
+    def __init__(self, configs: List[dict], memory_budget: int = None) -> None:
+        self._configs: Dict[str, dict] = {
+            config['project']: config
+            for config in configs
+        }
+        self._memory_budget = memory_budget if memory_budget is not None else int(
+            os.environ.get('CRIMESCENE_MEMORY_BUDGET_MB',
+                           DEFAULT_MEMORY_BUDGET_MB)) * 2**20
+        self._lock = threading.Lock()
+        self._loaded: 'OrderedDict[str, Project]' = OrderedDict()
+
+    def names(self) -> List[str]:
+        return list(self._configs)
+
+    def config(self, name: str) -> dict:
+        return self._configs[name]
+
+    def loaded(self) -> List[str]:
+        with self._lock:
+            return list(self._loaded)
+
+    def memory(self) -> int:
+        with self._lock:
+            return sum(project.memory for project in self._loaded.values())
+
+    def get(self, name: str) -> Project:
+        config = self._configs[name]
+        with self._lock:
+            project = self._loaded.get(name)
+            if project is not None and project.version == cache_version(
+                    config['stats_path']):
+                self._loaded.move_to_end(name)
+                return project
+            project = Project(config)
+            self._loaded[name] = project
+            self._loaded.move_to_end(name)
+            self._evict()
+            return project
+
+    def invalidate(self, name: str):
+        with self._lock:
+            self._loaded.pop(name, None)
+
+    def _evict(self):
+        memory = sum(project.memory for project in self._loaded.values())
+        while memory > self._memory_budget and len(self._loaded) > 1:
+            _, project = self._loaded.popitem(last=False)
+            memory -= project.memory
+
+
+class UpdateScheduler:
+    """ Runs cache updates of the projects on a shared process pool.
+        At most one update per project is pending at any time.
+    """
+    def __init__(self, registry: ProjectRegistry,
+                 max_workers: int = None) -> None:
+        self._registry = registry
+        self._pool = ProcessPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+
+    def schedule(self, name: str) -> Future:
+        with self._lock:
+            future = self._pending.get(name)
+            if future is not None and not future.done():
+                return future
+            config = self._registry.config(name)
+            future = self._pool.submit(update_cache,
+                                       root=config['path'],
+                                       directory=config['stats_path'])
+            self._pending[name] = future
+        future.add_done_callback(lambda _: self._registry.invalidate(name))
+        return future
+
+    def schedule_all(self) -> Dict[str, Future]:
+        return {name: self.schedule(name) for name in self._registry.names()}
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ProjectRegistry:
+    """ Returns the registry shared by all sessions of the server process. """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ProjectRegistry(read_configs())
+        return _registry
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='update project caches')
+    parser.add_argument('--config',
+                        help='projects file, a list of project configs')
+    parser.add_argument('--workers',
+                        type=int,
+                        help='number of concurrent updates')
+    parser.add_argument('--interval',
+                        type=float,
+                        help='minutes between updates, update once if unset')
+    parser.add_argument('projects',
+                        nargs='*',
+                        help='projects to update, all if empty')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    registry = ProjectRegistry(read_configs(args.config))
+    scheduler = UpdateScheduler(registry, max_workers=args.workers)
+    names = args.projects or registry.names()
+    while True:
+        futures = {name: scheduler.schedule(name) for name in names}
+        for name, future in futures.items():
+            print(f'{name}: {future.result()} new commits')
+        if args.interval is None:
+            break
+        time.sleep(60 * args.interval)
+    scheduler.shutdown()
@@ -0,0 +1,65 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+import miner.proximity as proximity
+import stats_cache
+from git_proximity_analysis import parse_changes_per_file_in
+from process_git_log import read_diff_for
+from util import timer
+
+
+def diff_proximities(root: str, sha: str, previous_sha: str) -> dict:
+    git_diff = read_diff_for(root, sha, previous_sha)
+    return proximity.calc_proximity(parse_changes_per_file_in(git_diff))
+
+
+class ProximityCache:
+    """ Proximities per file of the diff between two consecutive commits,
+        keyed by the sha of the later commit.
+        Missing pairs are computed on a thread pool of git diff workers
+        and appended to the stats store, one line per batch.
+    """
+    def __init__(self,
+                 root: str,
+                 path: str = stats_cache.PROXIMITIES_NAME,
+                 max_workers: int = None,
+                 compute=diff_proximities) -> None:
+        self._root = root
+        self._path = path
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._compute = compute
+        self._pairs = stats_cache.load_proximities(
+            path) if os.path.isfile(path) else {}
+
+    def __len__(self):
+        return len(self._pairs)
+
+    def get(self, sha: str, previous_sha: str):
+        entry = self._pairs.get(sha)
+        if entry is None or entry['previous_sha'] != previous_sha:
+            return None
+        return entry['proximities']
+
+    @timer
+    def get_all(self, pairs: List[Tuple[str, str]]) -> List[dict]:
+        """ Returns the proximities for all (sha, previous_sha) pairs. """
+        missing = [(sha, previous_sha) for sha, previous_sha in pairs
+                   if self.get(sha, previous_sha) is None]
+        if missing:
+            new_pairs = {}
+            with ThreadPoolExecutor(max_workers=self._max_workers) as pool:
+                results = pool.map(
+                    lambda pair: self._compute(self._root, *pair), missing)
+                for (sha, previous_sha), proximities in zip(missing, results):
+                    new_pairs[sha] = {
+                        'previous_sha': previous_sha,
+                        'proximities': proximities
+                    }
+            self._pairs.update(new_pairs)
+            self.store(new_pairs)
+        return [self.get(sha, previous_sha) for sha, previous_sha in pairs]
+
+    def store(self, new_pairs: dict):
+        if self._path:
+            stats_cache.append_proximities(new_pairs, path=self._path)
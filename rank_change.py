@@ -0,0 +1,117 @@
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+METRICS = {
+    'lines': lambda data: data['lines'],
+    'complexity': lambda data: data['complexity']['total'],
+    'mean complexity': lambda data: data['complexity']['mean'],
+    'complexity sd': lambda data: data['complexity']['sd']
+}
+
+
+class MetricSeries:
+    """ Values of one metric of a file, recorded at the commits that
+        changed the file. Times are seconds since epoch in ascending order.
+    """
+    def __init__(self, times, values) -> None:
+        order = np.argsort(np.asarray(times, dtype=np.int64), kind='stable')
+        self.times = np.asarray(times, dtype=np.int64)[order]
+        self.values = np.asarray(values, dtype=np.float64)[order]
+
+    def window(self, begin: int, end: int) -> Tuple[int, int]:
+        lo = np.searchsorted(self.times, begin, side='left')
+        hi = np.searchsorted(self.times, end, side='right')
+        return int(lo), int(max(lo, hi))
+
+    def step(self, grid) -> np.ndarray:
+        """ Evaluates the series as step function on grid, 0 before the
+            first recorded value.
+        """
+        idx = np.searchsorted(self.times, grid, side='right') - 1
+        return np.where(idx >= 0, self.values[np.maximum(idx, 0)], 0.0)
+
+
+def metric_series_from_stats(full_stats, git_log,
+                             metric: str) -> Dict[str, MetricSeries]:
+    get_value = METRICS[metric]
+    series = {}
+    for filename, data in full_stats.items():
+        rows = [(git_log.get_time_from_sha(sha).timestamp(), get_value(row))
+                for sha, row in data.items() if git_log.has_sha(sha)]
+        if rows:
+            times, values = zip(*rows)
+            series[filename] = MetricSeries(times=times, values=values)
+    return series
+
+
+def descending_ranks(values: np.ndarray) -> np.ndarray:
+    order = np.argsort(-values, kind='stable')
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[order] = np.arange(len(values))
+    return ranks
+
+
+def top_k(names: List[str], scores: np.ndarray,
+          k: int) -> List[Tuple[str, int]]:
+    """ Returns the k names with the highest scores in descending order. """
+    if len(names) > k:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(names))
+    candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+    return [(names[idx], int(scores[idx])) for idx in candidates]
+
+
+class RisingHotspots:
+    """ Ranks files by the change of their rank with respect to a metric
+        between the first and last change within a time window.
+    """
+    def __init__(self, full_stats, git_log) -> None:
+        self._full_stats = full_stats
+        self._git_log = git_log
+        self._series = {}
+
+    def series(self, metric: str) -> Dict[str, MetricSeries]:
+        if metric not in self._series:
+            self._series[metric] = metric_series_from_stats(
+                full_stats=self._full_stats,
+                git_log=self._git_log,
+                metric=metric)
+        return self._series[metric]
+
+    def rank_changes(self, filenames: Iterable[str], metric: str, begin: int,
+                     end: int, k: int = 10) -> List[Tuple[str, int]]:
+        all_series = self.series(metric)
+        names = []
+        first = []
+        last = []
+        for filename in filenames:
+            series = all_series.get(filename)
+            if series is None:
+                continue
+            lo, hi = series.window(begin, end)
+            if lo == hi:
+                continue
+            names.append(filename)
+            first.append(series.values[lo])
+            last.append(series.values[hi - 1])
+        if not names:
+            return []
+        rank_changes = descending_ranks(
+            np.array(first)) - descending_ranks(np.array(last))
+        return top_k(names, rank_changes, k)
+
+    def step_series(self, filenames: Iterable[str], metric: str, begin: int,
+                    end: int):
+        """ Returns the union of all change times of the files in the
+            window and the forward-filled values of each file on it.
+        """
+        all_series = [self.series(metric)[filename] for filename in filenames]
+        windows = [series.window(begin, end) for series in all_series]
+        grid = np.unique(
+            np.concatenate([np.zeros(0, dtype=np.int64)] + [
+                series.times[lo:hi]
+                for series, (lo, hi) in zip(all_series, windows)
+            ]))
+        return grid, [series.step(grid) for series in all_series]
@@ -0,0 +1,194 @@
+#!/bin/env python
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import stats_cache
+from analysis import (LastChanges, add_stats_for_module, get_current_stats,
+                      get_module_map)
+from columnar_store import ColumnarStore, has_columns
+from git_log import GitLog
+from sliding_window import SlidingWindow
+from util import DATE_FORMAT, parse_date
+
+## Headless hotspot report.
+##
+## Computes the file and module metrics of the dashboard for a time window
+## from the stats cache of a repository and writes them as csv, json or
+## parquet (requires pyarrow). The caches are read from the column files
+## (see columnar_store) when they are up to date and the window is
+## computed as by the dashboard. Run the program as:
+##
+##  python report.py --root ~/projects/repo --stats-path ~/.stats/repo \
+##      --begin 2021-01-01 --end 2021-06-30 --output hotspots.csv
+##
+## Does not import bokeh, so it is suited for CI jobs.
+##
+
+FORMATS = ['csv', 'json', 'parquet']
+LEVELS = ['file', 'module']
+DEFAULT_PERIOD = timedelta(days=800)
+
+
+def _as_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, float):
+        return round(value, 4)
+    return value
+
+
+def as_rows(stats, name: str) -> List[dict]:
+    """ Flattens the stats of files or modules into one row each. Churn
+        is summed up, authors are given as main authors and their number.
+    """
+    rows = []
+    for key, data in stats.items():
+        row = {name: key}
+        for column, value in data.items():
+            if column == 'churn':
+                row['added_lines'] = sum(churn['added_lines'] for churn in value)
+                row['removed_lines'] = sum(churn['removed_lines']
+                                           for churn in value)
+            elif column == 'authors':
+                authors, n_authors = value
+                row['authors'] = '; '.join(f'{author} ({round(ratio, 2)})'
+                                           for author, ratio in authors.items())
+                row['n_authors'] = n_authors
+            else:
+                row[column] = _as_value(value)
+        rows.append(row)
+    return sorted(rows, key=lambda row: row.get('revisions', 0), reverse=True)
+
+
+def write_rows(rows: List[dict], output, fmt: str):
+    if fmt == 'json':
+        json.dump(rows, output, indent=2)
+        output.write('\n')
+        return
+    columns = list(dict.fromkeys(column for row in rows for column in row))
+    writer = csv.DictWriter(output, fieldnames=columns)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def write_parquet(rows: List[dict], path: str):
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        sys.exit('parquet output requires pyarrow')
+    pyarrow.parquet.write_table(pyarrow.Table.from_pylist(rows), path)
+
+
+def load_caches(directory: str):
+    """ Returns the commits and the stats of the caches in directory,
+        read from the columns unless they are older than the json files.
+    """
+    sources = [
+        os.path.join(directory, name)
+        for name in (stats_cache.COMMITS_NAME, stats_cache.STATS_NAME)
+    ]
+    if has_columns(directory, sources):
+        store = ColumnarStore(directory)
+        return store.commits(), store.stats()
+    return stats_cache.load_commits(directory), stats_cache.load_stats(
+        directory)
+
+
+def compute_report(git_log: GitLog, full_stats, config, begin: datetime,
+                   end: datetime) -> Dict[str, List[dict]]:
+    module_map = get_module_map(config)
+    window = SlidingWindow(git_log=git_log,
+                           module_map=module_map,
+                           full_stats=full_stats).move(begin=begin, end=end)
+    file_stats = get_current_stats(full_stats=full_stats,
+                                   git_log=git_log,
+                                   begin=begin,
+                                   end=end,
+                                   window=window,
+                                   last_changes=LastChanges(
+                                       full_stats=full_stats,
+                                       git_log=git_log))
+    module_stats = window.module_revisions()
+    add_stats_for_module(module_stats=module_stats,
+                         file_stats=file_stats,
+                         module_map=module_map)
+    return {
+        'file': as_rows(file_stats, name='file'),
+        'module': as_rows(module_stats, name='module')
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Writes the hotspot metrics of a time window.')
+    parser.add_argument('--root', default='.', help='repo root dir')
+    parser.add_argument('--stats-path',
+                        default='.',
+                        help='directory of the cache files')
+    parser.add_argument('--config',
+                        help='project config with the module definitions')
+    parser.add_argument('--begin',
+                        type=parse_date,
+                        help=f'first day of the window, {DATE_FORMAT}')
+    parser.add_argument('--end',
+                        type=parse_date,
+                        help=f'last day of the window, {DATE_FORMAT}')
+    parser.add_argument('--level', choices=LEVELS, default='file')
+    parser.add_argument('--format',
+                        choices=FORMATS,
+                        help='output format, derived from --output by default')
+    parser.add_argument('--output', help='output file, stdout by default')
+    parser.add_argument('--update',
+                        action='store_true',
+                        help='update the cache before the report')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.update:
+        from update_cache import update_cache
+        update_cache(root=args.root, directory=args.stats_path)
+
+    config = {'project': os.path.basename(os.path.abspath(args.root)),
+              'modules': {}}
+    if args.config:
+        with open(args.config, 'r') as config_file:
+            config.update(json.loads(config_file.read()))
+
+    end = args.end + timedelta(days=1) if args.end else datetime.now(
+        tz=timezone.utc)
+    begin = args.begin or end - DEFAULT_PERIOD
+    commits, full_stats = load_caches(args.stats_path)
+    git_log = GitLog(root=args.root,
+                     commits=commits,
+                     cache_dir=args.stats_path)
+    rows = compute_report(git_log=git_log,
+                          full_stats=full_stats,
+                          config=config,
+                          begin=begin,
+                          end=end)[args.level]
+
+    fmt = args.format or (os.path.splitext(args.output)[1][1:]
+                          if args.output else 'csv')
+    if fmt not in FORMATS:
+        sys.exit(f'unknown format {fmt}')
+    if fmt == 'parquet':
+        if not args.output:
+            sys.exit('parquet output requires --output')
+        write_parquet(rows, args.output)
+    elif args.output:
+        with open(args.output, 'w', newline='') as output:
+            write_rows(rows, output, fmt)
+    else:
+        write_rows(rows, sys.stdout, fmt)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/bin/env python
+import argparse
+import os
+import subprocess
+import sys
+
+from columnar_store import update_columns
+from projects import read_configs
+
+## Serves the dashboard with several bokeh server processes.
+##
+## The caches of all projects (see projects.read_configs) are converted
+## to column files first. Each server process then maps the same files
+## read-only instead of parsing its own copy of the json caches, so the
+## processes start fast and the stats are held in memory once per
+## machine. With --update-interval one updater process (see projects.py)
+## keeps the caches of all projects up to date next to the servers, which
+## reload a project when its caches changed. Arguments not known here are
+## passed on to bokeh serve.
+##
+## Run the program as:
+##
+##  python serve.py --num-procs 4 --port 5006
+##
+
+APP_DIR = os.path.dirname(os.path.realpath(__file__))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='serve the dashboard with several processes')
+    parser.add_argument('--num-procs',
+                        type=int,
+                        default=os.cpu_count(),
+                        help='number of server processes')
+    parser.add_argument('--port', type=int, default=5006)
+    parser.add_argument('--update-interval',
+                        type=float,
+                        help='minutes between cache updates, none if unset')
+    return parser.parse_known_args()
+
+
+if __name__ == "__main__":
+    args, bokeh_args = parse_args()
+    for config in read_configs():
+        if update_columns(config['stats_path']):
+            print(f'{config["project"]}: converted caches to columns')
+    if args.update_interval is not None:
+        # a child process, it keeps running when bokeh replaces this one
+        subprocess.Popen([
+            sys.executable,
+            os.path.join(APP_DIR, 'projects.py'), '--interval',
+            str(args.update_interval)
+        ])
+    os.execv(sys.executable, [
+        sys.executable, '-m', 'bokeh', 'serve', APP_DIR, '--num-procs',
+        str(args.num_procs), '--port',
+        str(args.port), *bokeh_args
+    ])
@@ -0,0 +1,223 @@
+from collections import Counter, defaultdict, deque
+from datetime import datetime
+
+from desc_stats import RunningStats
+from git_log import GitLog, MODULE_DEFAULTS, REVISION_DEFAULTS
+
+
+class _FileAggregate:
+    def __init__(self) -> None:
+        self.churn = deque()
+        self.soc = 0
+        self.authors = Counter()
+        self.proximities = deque()
+        self.proximity_stats = RunningStats()
+
+
+class _ModuleAggregate:
+    def __init__(self) -> None:
+        self.churn = deque()
+        self.times = deque()
+        self.soc = 0
+
+
+class SlidingWindow:
+    """ Per-file and per-module aggregates of the commits in a time window.
+        Moving the window only adds the commits entering it and subtracts
+        the commits leaving it, so a move costs O(changed commits). If
+        all commits leave, e.g. when panning by the window's length, or
+        if the delta is larger than the new window, the aggregates are
+        dropped at once instead of commit by commit and only the
+        entering commits are added.
+        Proximities are read from full_stats if given.
+    """
+    def __init__(self, git_log: GitLog, module_map=None,
+                 full_stats=None) -> None:
+        self._git_log = git_log
+        self._module_map = module_map
+        self._full_stats = full_stats or {}
+        self.lo = 0
+        self.hi = 0
+        self._files = {}
+        self._modules = {}
+
+    def move(self, begin: datetime, end: datetime):
+        lo, hi = self._git_log.window(begin=begin, end=end)
+        # no overlap or the delta is larger than adding the whole window
+        if lo >= self.hi or hi <= self.lo or abs(lo - self.lo) + abs(
+                hi - self.hi) > hi - lo:
+            self._files.clear()
+            self._modules.clear()
+            self.lo = self.hi = lo
+        while self.lo < min(lo, self.hi):
+            self._remove(self.lo, left=True)
+            self.lo += 1
+        while self.hi > max(hi, self.lo):
+            self.hi -= 1
+            self._remove(self.hi, left=False)
+        while self.lo > lo:
+            self.lo -= 1
+            self._add(self.lo, left=True)
+        while self.hi < hi:
+            self._add(self.hi, left=False)
+            self.hi += 1
+        return self
+
+    def _module_churn(self, commit):
+        churn_per_module = {}
+        for change in commit.changes:
+            module = self._module_map(change.filename)
+            churn = churn_per_module.get(module)
+            if churn is None:
+                churn = {
+                    'timestamp': commit.creation_time.timestamp(),
+                    'added_lines': 0,
+                    'removed_lines': 0
+                }
+                churn_per_module[module] = churn
+            churn['added_lines'] += change.added_lines
+            churn['removed_lines'] += change.removed_lines
+        return churn_per_module
+
+    def _add(self, idx: int, left: bool):
+        commit = self._git_log.commits[idx]
+        timestamp = commit.creation_time.timestamp()
+        soc = len(commit.changes) - 1
+        identities = self._git_log.identities
+        for change, file_id in zip(commit.changes,
+                                   identities.change_ids[idx]):
+            aggregate = self._files.get(file_id)
+            if aggregate is None:
+                aggregate = _FileAggregate()
+                self._files[file_id] = aggregate
+            churn = {
+                'timestamp': timestamp,
+                'added_lines': change.added_lines,
+                'removed_lines': change.removed_lines
+            }
+            if left:
+                aggregate.churn.appendleft(churn)
+            else:
+                aggregate.churn.append(churn)
+            aggregate.soc += soc
+            aggregate.authors[commit.author] += 1
+            row = self._full_stats.get(identities.current_path(file_id),
+                                       {}).get(commit.sha)
+            if row is not None:
+                if left:
+                    aggregate.proximities.appendleft((idx, row['proximity']))
+                else:
+                    aggregate.proximities.append((idx, row['proximity']))
+                aggregate.proximity_stats.add(row['proximity'])
+
+        if self._module_map is None:
+            return
+        churn_per_module = self._module_churn(commit)
+        soc = len(churn_per_module) - 1
+        for module, churn in churn_per_module.items():
+            aggregate = self._modules.get(module)
+            if aggregate is None:
+                aggregate = _ModuleAggregate()
+                self._modules[module] = aggregate
+            if left:
+                aggregate.churn.appendleft(churn)
+                aggregate.times.appendleft(commit.creation_time)
+            else:
+                aggregate.churn.append(churn)
+                aggregate.times.append(commit.creation_time)
+            aggregate.soc += soc
+
+    def _remove(self, idx: int, left: bool):
+        commit = self._git_log.commits[idx]
+        soc = len(commit.changes) - 1
+        for file_id in self._git_log.identities.change_ids[idx]:
+            aggregate = self._files[file_id]
+            if left:
+                aggregate.churn.popleft()
+            else:
+                aggregate.churn.pop()
+            aggregate.soc -= soc
+            aggregate.authors[commit.author] -= 1
+            if not aggregate.authors[commit.author]:
+                del aggregate.authors[commit.author]
+            proximities = aggregate.proximities
+            end = 0 if left else -1
+            if proximities and proximities[end][0] == idx:
+                _, proximity = proximities.popleft(
+                ) if left else proximities.pop()
+                aggregate.proximity_stats.remove(proximity)
+            if not aggregate.churn:
+                del self._files[file_id]
+
+        if self._module_map is None:
+            return
+        churn_per_module = self._module_churn(commit)
+        soc = len(churn_per_module) - 1
+        for module in churn_per_module:
+            aggregate = self._modules[module]
+            if left:
+                aggregate.churn.popleft()
+                aggregate.times.popleft()
+            else:
+                aggregate.churn.pop()
+                aggregate.times.pop()
+            aggregate.soc -= soc
+            if not aggregate.churn:
+                del self._modules[module]
+
+    def revisions(self):
+        """ Returns the file revisions of the window as get_revisions_only. """
+        revisions = defaultdict(lambda: dict(REVISION_DEFAULTS, churn=[]))
+        for file_id, aggregate in self._files.items():
+            revisions[self._git_log.identities.current_path(file_id)] = dict(
+                REVISION_DEFAULTS,
+                revisions=len(aggregate.churn),
+                soc=aggregate.soc,
+                last_change=aggregate.churn[-1]['timestamp'],
+                churn=list(aggregate.churn))
+        return revisions
+
+    def module_revisions(self):
+        """ Returns the module revisions of the window as
+            get_revisions_for_module.
+        """
+        revisions = defaultdict(lambda: dict(MODULE_DEFAULTS, churn=[]))
+        for module, aggregate in self._modules.items():
+            revisions[module] = dict(MODULE_DEFAULTS,
+                                     revisions=len(aggregate.churn),
+                                     soc=aggregate.soc,
+                                     last_change=aggregate.times[-1],
+                                     churn=list(aggregate.churn))
+        return revisions
+
+    def _aggregate(self, filename: str):
+        file_id = self._git_log.identities.id_of(filename)
+        return None if file_id is None else self._files.get(file_id)
+
+    def authors(self, filename: str):
+        """ Returns the share of the revisions per author in the window. """
+        aggregate = self._aggregate(filename)
+        if aggregate is None:
+            return {}
+        n_revs = len(aggregate.churn)
+        return {
+            author: count / n_revs
+            for author, count in aggregate.authors.items()
+        }
+
+    def proximity(self, filename: str):
+        aggregate = self._aggregate(filename)
+        if aggregate is None:
+            stats = RunningStats()
+            max_value = 0
+        else:
+            stats = aggregate.proximity_stats
+            max_value = max(
+                (proximity for _, proximity in aggregate.proximities),
+                default=0)
+        return {
+            'proximity': stats.total,
+            'mean_proximity': stats.mean(),
+            'proximity_sd': stats.sd(),
+            'proximity_max': max_value
+        }
@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Iterable
+
+import numpy as np
+
+## Columns for ColumnDataSources. Bokeh sends int32, float64 and
+## datetime64 arrays as binary buffers, lists and int64 arrays as JSON.
+##
+
+
+def int_column(values: Iterable[int]) -> np.ndarray:
+    return np.fromiter(values, dtype=np.int32)
+
+
+def float_column(values: Iterable[float]) -> np.ndarray:
+    return np.fromiter((np.nan if value is None else value
+                        for value in values),
+                       dtype=np.float64)
+
+
+def time_column(times: Iterable[datetime]) -> np.ndarray:
+    """ Returns the datetimes as datetime64[ms] in UTC. """
+    return (np.fromiter((time.timestamp() for time in times),
+                        dtype=np.float64) * 1000).astype('datetime64[ms]')
@@ -2,7 +2,8 @@ from git_proximity_analysis import parse_changes_per_file_in
 from process_git_log import read_diff_for, read_diff_for_file
 from desc_stats import as_stats
 from typing import Optional, Tuple
-from git_log import _run_cmd, calc_proximity
+from git_log import calc_proximity
+from git_runner import run_cmd as _run_cmd, show_file
 import miner.complexity_calculations as complexity_calculations
 
 from git_data import Change, Commit
@@ -57,7 +58,7 @@ def compute_complexity(historic_version: str):
 
 
 def get_complexity(root: str, filename: str, sha: str) -> Tuple[int, dict]:
-    historic_version = _run_cmd(root, ['git', 'show', sha + ':' + filename])
+    historic_version = show_file(root=root, sha=sha, filename=filename)
     return compute_complexity(historic_version=historic_version)
 
 
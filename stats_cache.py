@@ -1,7 +1,28 @@
 from datetime import datetime, timezone
 import json
-from typing import List
+import os
+import tempfile
+from typing import List, Optional
 from git_data import Commit, Change, add_parents_and_children
+from util import timer
+
+COMMITS_NAME = 'commits.json'
+STATS_NAME = 'stats.json'
+PROXIMITIES_NAME = 'proximities.json'
+BLAME_NAME = 'blame.json'
+HEAD_NAME = 'head'
+
+
+def _write(path: str, text: str):
+    """ Writes text to a temporary file next to path and moves it over
+        path, so that readers see either the old or the new file.
+    """
+    with tempfile.NamedTemporaryFile('w',
+                                     dir=os.path.dirname(path) or '.',
+                                     prefix=os.path.basename(path),
+                                     delete=False) as tmp_file:
+        tmp_file.write(text)
+    os.replace(tmp_file.name, path)
 
 
 # sha: str = ''
@@ -20,22 +41,23 @@ from git_data import Commit, Change, add_parents_and_children
 # filename: str = ''
 # added_lines: int = 0
 # removed_lines: int = 0
-def store_commits(commits: List[Commit]):
-    with open('commits.json', 'w') as commits_file:
-        json_repr = [{
-            'sha': commit.sha,
-            'parent_shas': commit.parent_shas,
-            'child_shas': commit.child_shas,
-            'creation_time': commit.creation_time.timestamp(),
-            'author': commit.author,
-            'msg': commit.msg,
-            'changes': [change.__dict__ for change in commit.changes]
-        } for commit in commits]
-        commits_file.write(json.dumps(json_repr))
-
-
-def load_commits():
-    with open('commits.json', 'r') as commits_file:
+@timer
+def store_commits(commits: List[Commit], directory: str = '.'):
+    json_repr = [{
+        'sha': commit.sha,
+        'parent_shas': commit.parent_shas,
+        'child_shas': commit.child_shas,
+        'creation_time': commit.creation_time.timestamp(),
+        'author': commit.author,
+        'msg': commit.msg,
+        'changes': [change.__dict__ for change in commit.changes]
+    } for commit in commits]
+    _write(os.path.join(directory, COMMITS_NAME), json.dumps(json_repr))
+
+
+@timer
+def load_commits(directory: str = '.'):
+    with open(os.path.join(directory, COMMITS_NAME), 'r') as commits_file:
         json_repr = json.loads(commits_file.read())
         commits = [
             Commit(sha=entry['sha'],
@@ -52,27 +74,79 @@ def load_commits():
                        Change(old_filename=change_entry['old_filename'],
                               filename=change_entry['filename'],
                               added_lines=int(change_entry['added_lines']),
-                              removed_lines=int(change_entry['removed_lines']))
+                              removed_lines=int(change_entry['removed_lines']),
+                              removed=change_entry.get('removed', False))
                        for change_entry in entry['changes']
                    ]) for entry in json_repr
         ]
 
         add_parents_and_children(commits)
-        print('files')
-        for commit in commits:
-            for change in commit.changes:
-                if change.filename == 'Spacy/Spaces/RealSpace.h':
-                    print(f'found {change.filename} {commit.sha}')
         return commits
 
 
-def store_stats(stats):
-    with open('stats.json', 'w') as stats_file:
-        if "Spacy/Spaces/RealSpace.h" in stats:
-            print("store RealSpace.h")
-        stats_file.write(json.dumps(stats))
+@timer
+def store_stats(stats, directory: str = '.'):
+    _write(os.path.join(directory, STATS_NAME), json.dumps(stats))
 
 
-def load_stats():
-    with open('stats.json', 'r') as stats_file:
+def store_head(sha: str, directory: str = '.'):
+    """ Records the tip commit the cache was updated to. """
+    _write(os.path.join(directory, HEAD_NAME), sha)
+
+
+def load_head(directory: str = '.') -> Optional[str]:
+    path = os.path.join(directory, HEAD_NAME)
+    if not os.path.isfile(path):
+        return None
+    with open(path, 'r') as head_file:
+        return head_file.read().strip() or None
+
+
+@timer
+def load_stats(directory: str = '.'):
+    with open(os.path.join(directory, STATS_NAME), 'r') as stats_file:
         return json.loads(stats_file.read())
+
+
+@timer
+def store_proximities(proximities, path: str = PROXIMITIES_NAME):
+    _write(path, json.dumps(proximities) + '\n')
+
+
+@timer
+def append_proximities(proximities, path: str = PROXIMITIES_NAME):
+    """ Appends the entries as one line, load_proximities merges the
+        lines of the file.
+    """
+    with open(path, 'ab+') as proximities_file:
+        # files written as a single json document lack the line end
+        if proximities_file.tell() > 0:
+            proximities_file.seek(-1, os.SEEK_END)
+            if proximities_file.read(1) != b'\n':
+                proximities_file.write(b'\n')
+        proximities_file.write(json.dumps(proximities).encode('utf-8') +
+                               b'\n')
+
+
+@timer
+def load_proximities(path: str = PROXIMITIES_NAME):
+    proximities = {}
+    with open(path, 'r') as proximities_file:
+        for line in proximities_file:
+            try:
+                proximities.update(json.loads(line))
+            except json.JSONDecodeError:
+                # the last line of an interrupted append
+                continue
+    return proximities
+
+
+@timer
+def store_blame(blame, path: str = BLAME_NAME):
+    _write(path, json.dumps(blame))
+
+
+@timer
+def load_blame(path: str = BLAME_NAME):
+    with open(path, 'r') as blame_file:
+        return json.loads(blame_file.read())
@@ -0,0 +1,88 @@
+import subprocess
+from datetime import datetime, timedelta, timezone
+
+from git_data import Change, Commit
+
+## Histories and repositories shared by the tests.
+##
+
+START = datetime(year=2020, month=1, day=1, tzinfo=timezone.utc)
+
+
+def create_repository(root):
+    subprocess.run(['git', 'init', '-q'], cwd=root, check=True)
+    (root / 'a.h').write_text('int a;\n')
+    subprocess.run(['git', 'add', 'a.h'], cwd=root, check=True)
+    subprocess.run([
+        'git', '-c', 'user.name=Lars Lubkoll', '-c', 'user.email=l@l.de',
+        'commit', '-q', '-m', 'add a.h'
+    ],
+                   cwd=root,
+                   check=True)
+
+
+def get_commits():
+    return [
+        Commit(sha=f'sha{idx}',
+               creation_time=START + timedelta(days=idx),
+               author='Lars Lubkoll',
+               msg=f'commit {idx}',
+               changes=[Change(filename='a.h', added_lines=idx)])
+        for idx in range(10)
+    ]
+
+
+def get_renaming_commits():
+    changes = [
+        Change(filename='a.h', added_lines=10),
+        Change(filename='b.h', added_lines=5),
+        Change(old_filename='a.h', filename='src/a.h', added_lines=1),
+        Change(filename='src/a.h', added_lines=2),
+        Change(old_filename='src/a.h', filename='src/c.h', removed_lines=3)
+    ]
+    commits = [
+        Commit(sha=f'sha{idx}',
+               creation_time=START + timedelta(days=idx),
+               author='Lars Lubkoll' if idx % 2 else 'Ada Lovelace',
+               changes=[change, Change(filename='b.h', added_lines=1)])
+        for idx, change in enumerate(changes)
+    ]
+    commits[1].changes.pop()
+    return commits
+
+
+def get_reused_path_commits():
+    changes = [[Change(filename='a.h', added_lines=10)],
+               [Change(old_filename='a.h', filename='b.h', added_lines=1)],
+               [Change(filename='a.h', added_lines=20)],
+               [Change(filename='b.h', added_lines=2)],
+               [Change(filename='a.h', added_lines=3)]]
+    return [
+        Commit(sha=f'sha{idx}',
+               creation_time=START + timedelta(days=idx),
+               author='Lars Lubkoll',
+               changes=commit_changes)
+        for idx, commit_changes in enumerate(changes)
+    ]
+
+
+def get_stats():
+    return {
+        'src/c.h': {
+            f'sha{idx}': {
+                'name': name,
+                'loc': 0,
+                'lines': 10 + idx,
+                'soc': 2,
+                'complexity': {
+                    'total': 2.0 * idx,
+                    'mean': 0.5,
+                    'sd': 0.0,
+                    'max': 1.0
+                },
+                'proximity': idx
+            }
+            for idx, name in [(4, 'src/c.h'), (0, 'a.h'), (2, 'src/a.h')]
+        },
+        'b.h': {}
+    }
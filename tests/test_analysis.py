@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from analysis import LastChanges
+from columnar_store import ColumnarStore, store_columns
+from git_log import GitLog
+from tests.helpers import START, get_commits, get_renaming_commits, get_stats
+
+
+def test_last_changes():
+    commits = get_commits()
+    # two rows of equal time keep the first one
+    commits[4].creation_time = commits[3].creation_time
+    git_log = GitLog(root='', commits=commits)
+    full_stats = {'a.h': {f'sha{idx}': {} for idx in [5, 3, 4, 1]}}
+    last_changes = LastChanges(full_stats=full_stats, git_log=git_log)
+    assert last_changes.last_change('a.h', START) == (None, None)
+    assert last_changes.last_change('a.h', START + timedelta(days=2)) == (
+        'sha1', START + timedelta(days=1))
+    assert last_changes.last_change('a.h', START + timedelta(days=4)) == (
+        'sha3', START + timedelta(days=3))
+    assert last_changes.last_change('a.h',
+                                    START + timedelta(days=9))[0] == 'sha5'
+    assert last_changes.last_change('b.h', START) == (None, None)
+
+
+def test_last_rows_of_columns(tmp_path):
+    commits = get_renaming_commits()
+    stats = get_stats()
+    store_columns(commits=commits, stats=stats, directory=str(tmp_path))
+    git_log = GitLog(root='', commits=commits)
+    end = START + timedelta(days=3)
+    expected = LastChanges(full_stats=stats,
+                           git_log=git_log).last_rows(['src/c.h', 'b.h'], end)
+    assert expected == {
+        'src/c.h': (stats['src/c.h']['sha2'], START + timedelta(days=2))
+    }
+    last_changes = LastChanges(full_stats=ColumnarStore(str(tmp_path)).stats(),
+                               git_log=git_log)
+    assert 'b.h' not in last_changes
+    assert last_changes.last_rows(['src/c.h', 'b.h'], end) == expected
@@ -0,0 +1,87 @@
+import subprocess
+
+import numpy as np
+
+from blame_cache import BlameCache, apply_hunks, parse_blame, parse_hunk
+from tests.helpers import create_repository
+
+
+def test_apply_hunks():
+    owners = np.array([0, 0, 0, 0], dtype=np.int32)
+    hunks = [
+        parse_hunk('@@ -0,0 +1 @@'),
+        parse_hunk('@@ -2 +3,2 @@ int a;'),
+        parse_hunk('@@ -4,1 +5,0 @@')
+    ]
+    assert hunks[1] == (2, 1, 3, 2)
+    assert apply_hunks(owners, hunks, author_id=1).tolist() == [1, 0, 1, 1, 0]
+
+
+def test_parse_blame():
+    lines = [
+        'sha1 1 2 1', 'author Ada Lovelace', 'filename a.h', 'sha0 1 1 1',
+        'author Lars Lubkoll', 'filename a.h', 'sha1 3 3 1', 'filename a.h'
+    ]
+    assert parse_blame(lines) == [('Ada Lovelace', 2, 1),
+                                  ('Lars Lubkoll', 1, 1),
+                                  ('Ada Lovelace', 3, 1)]
+
+
+def test_blame_cache(tmp_path):
+    create_repository(tmp_path)
+    cache = BlameCache(root=str(tmp_path), path=None)
+    assert cache.ownership(['a.h']) == {'a.h': {'Lars Lubkoll': 1}}
+
+    (tmp_path / 'a.h').write_text('int a;\nint b;\n')
+    subprocess.run([
+        'git', '-c', 'user.name=Ada Lovelace', '-c', 'user.email=a@l.de',
+        'commit', '-q', '-am', 'add b'
+    ],
+                   cwd=tmp_path,
+                   check=True)
+    assert cache.ownership(['a.h']) == {
+        'a.h': {
+            'Lars Lubkoll': 1,
+            'Ada Lovelace': 1
+        }
+    }
+    assert cache.ownership(['a.h'], rev='HEAD~1') == {
+        'a.h': {
+            'Lars Lubkoll': 1
+        }
+    }
+
+
+def test_revisions_are_checked_once(tmp_path):
+    create_repository(tmp_path)
+    (tmp_path / 'b.h').write_text('int b;\n')
+    subprocess.run(['git', 'add', 'b.h'], cwd=tmp_path, check=True)
+    commit = [
+        'git', '-c', 'user.name=Ada Lovelace', '-c', 'user.email=a@l.de',
+        'commit', '-q', '-am'
+    ]
+    subprocess.run(commit + ['add b.h'], cwd=tmp_path, check=True)
+    cache = BlameCache(root=str(tmp_path), path=None)
+    cache.owners(['a.h', 'b.h'])
+
+    (tmp_path / 'a.h').write_text('int a;\nint c;\n')
+    (tmp_path / 'b.h').write_text('int b;\nint c;\n')
+    subprocess.run(commit + ['add c'], cwd=tmp_path, check=True)
+    checked = []
+    on_first_parent_chain = cache._on_first_parent_chain
+
+    def check(base, sha):
+        checked.append(base)
+        return on_first_parent_chain(base, sha)
+
+    cache._on_first_parent_chain = check
+    assert cache.ownership(['a.h', 'b.h']) == {
+        'a.h': {
+            'Lars Lubkoll': 1,
+            'Ada Lovelace': 1
+        },
+        'b.h': {
+            'Ada Lovelace': 2
+        }
+    }
+    assert len(checked) == 1
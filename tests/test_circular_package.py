@@ -0,0 +1,49 @@
+from collections import defaultdict, namedtuple
+
+import numpy as np
+
+from circular_package import get_full_names, get_parents, visible_circles
+
+Circle = namedtuple('Circle', ['x', 'y', 'r', 'level', 'ex'])
+
+
+def get_circles():
+    c_h = {'id': 'c.h', 'datum': 1}
+    b = {'id': 'b', 'datum': 1, 'children': [c_h]}
+    a_h = {'id': 'a.h', 'datum': 1}
+    src = {'id': 'src', 'datum': 2, 'children': [a_h, b]}
+    d_h = {'id': 'd.h', 'datum': 1}
+    return [
+        Circle(x=-0.4, y=0, r=0.5, level=1, ex=src),
+        Circle(x=0.6, y=0, r=0.3, level=1, ex=d_h),
+        Circle(x=-0.6, y=0, r=0.2, level=2, ex=a_h),
+        Circle(x=-0.2, y=0, r=0.2, level=2, ex=b),
+        Circle(x=-0.2, y=0, r=0.1, level=3, ex=c_h)
+    ]
+
+
+def test_hierarchy():
+    circles = get_circles()
+    parents = get_parents(circles)
+    assert parents.tolist() == [-1, -1, 0, 0, 3]
+    levels = np.array([circle.level for circle in circles])
+    assert get_full_names([circle.ex['id'] for circle in circles], levels,
+                          parents) == ['src', 'd.h', 'src/a.h', 'src/b',
+                                       'src/b/c.h']
+
+    # geometric fallback if the data was copied
+    copied = [circle._replace(ex=dict(circle.ex)) for circle in circles]
+    assert get_parents(copied).tolist() == [-1, -1, 0, 0, 3]
+
+
+def test_visible_circles():
+    circles = get_circles()
+    parents = get_parents(circles)
+    levels = np.array([circle.level for circle in circles])
+    children = defaultdict(list)
+    for idx, parent in enumerate(parents):
+        children[parent].append(idx)
+    assert visible_circles(levels, parents, children,
+                           focus=-1).tolist() == [0, 1, 2, 3]
+    assert visible_circles(levels, parents, children,
+                           focus=3).tolist() == [0, 3, 4]
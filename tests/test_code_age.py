@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+import numpy as np
+
+from code_age import code_age_structure, decay_weights, last_change_times
+from git_log import GitLog
+from tests.helpers import START, get_renaming_commits
+from transform.hierarchy import build_hierarchy
+
+
+def test_build_hierarchy():
+    assert build_hierarchy([('src/a.h', {
+        'size': 1
+    }), ('src/b/c.h', {
+        'size': 2
+    }), ('d.h', {
+        'size': 3
+    })]) == {
+        'name':
+        'root',
+        'children': [{
+            'name':
+            'src',
+            'children': [{
+                'name': 'a.h',
+                'children': [],
+                'size': 1
+            }, {
+                'name': 'b',
+                'children': [{
+                    'name': 'c.h',
+                    'children': [],
+                    'size': 2
+                }]
+            }]
+        }, {
+            'name': 'd.h',
+            'children': [],
+            'size': 3
+        }]
+    }
+
+
+def test_decay_weights():
+    weights, colors = decay_weights(np.array([0.0, 6.0, 12.0, np.nan]),
+                                    half_life=6)
+    assert weights.tolist() == [1.0, 0.5, 0.25, 0.0]
+    assert colors.tolist() == ['darkred', 'DodgerBlue', 'DodgerBlue', 'gray']
+
+
+def test_code_age_structure():
+    git_log = GitLog(root='', commits=get_renaming_commits())
+    last_changes = last_change_times(git_log, end=START + timedelta(days=2))
+    file_id = git_log.identities.id_of('src/c.h')
+    assert last_changes[file_id] == (START + timedelta(days=2)).timestamp()
+    structure = code_age_structure(git_log=git_log,
+                                   sizes={
+                                       'src/c.h': 10,
+                                       'new.h': 1
+                                   },
+                                   half_life=1,
+                                   now=START + timedelta(days=49))
+    leaf, new = structure['children']
+    assert leaf['children'][0] == {
+        'name': 'c.h',
+        'children': [],
+        'size': 10,
+        'weight': 0.5,
+        'color': 'DodgerBlue'
+    }
+    assert new == {
+        'name': 'new.h',
+        'children': [],
+        'size': 1,
+        'weight': 0.0,
+        'color': 'gray'
+    }
@@ -0,0 +1,35 @@
+from bokeh.models import ColumnDataSource
+
+from color_map import (COLORS, NONE_COLOR, get_color_indices, get_color_mapper,
+                       get_colors, recolor_callback, set_capped_log)
+
+
+def test_get_colors():
+    colors = get_colors([0.0, None, 10.0, 5.0, 0.9, 0.91])
+    assert colors[0] == COLORS[0]
+    assert colors[1] == NONE_COLOR
+    assert colors[2] == COLORS[-1]
+    assert colors[3] == COLORS[5]
+    assert None not in colors
+
+
+def test_get_colors_for_constant_data():
+    assert get_colors([3, 3]) == [COLORS[0], COLORS[0]]
+    assert get_colors([]) == []
+
+
+def test_scales():
+    values = [1, 2, 3, 1000]
+    assert list(get_color_indices(values)) == [0, 0, 0, 10]
+    assert list(get_color_indices(values, scale='quantile')) == [0, 3, 7, 10]
+    assert get_color_indices(values, scale='log')[2] > 0
+
+
+def test_set_capped_log():
+    callback = recolor_callback(source=ColumnDataSource(),
+                                mapper=get_color_mapper([]),
+                                field_names={},
+                                capped_log=['churn/line'])
+    set_capped_log(callback, [])
+    assert callback.args['capped_log'] == []
+    assert 'source' in callback.args
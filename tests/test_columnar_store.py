@@ -0,0 +1,38 @@
+from columnar_store import ColumnarStore, store_columns
+from git_data import add_parents_and_children
+from tests.helpers import get_renaming_commits, get_stats
+
+
+def test_columns_round_trip(tmp_path):
+    commits = get_renaming_commits()
+    for idx, commit in enumerate(commits[1:], start=1):
+        commit.parent_shas = [f'sha{idx - 1}']
+        commit.msg = f'commit ä{idx}'
+    add_parents_and_children(commits)
+    stats = get_stats()
+    store_columns(commits=commits, stats=stats, directory=str(tmp_path))
+
+    store = ColumnarStore(str(tmp_path))
+    loaded = store.commits()
+    for commit, other in zip(commits, loaded):
+        assert (other.sha, other.creation_time, other.author, other.msg,
+                other.parent_shas, other.child_shas, other.changes) == (
+                    commit.sha, commit.creation_time, commit.author,
+                    commit.msg, commit.parent_shas, commit.child_shas,
+                    commit.changes)
+        assert [parent.sha for parent in other.parents
+                ] == [parent.sha for parent in commit.parents]
+
+    view = store.stats()
+    assert list(view) == ['src/c.h', 'b.h']
+    assert list(view['src/c.h']) == ['sha4', 'sha0', 'sha2']
+    assert view['src/c.h'] == stats['src/c.h']
+    assert dict(view['src/c.h']['sha2']) == stats['src/c.h']['sha2']
+    assert view['src/c.h'].get('sha1') is None
+    assert len(view['b.h']) == 0
+    assert view.get('d.h') is None
+    assert view.rows_at([2, 0]) == [
+        stats['src/c.h']['sha2'], stats['src/c.h']['sha4']
+    ]
+    assert type(view['src/c.h']['sha4']['proximity']) is int
+    assert type(view['src/c.h']['sha0']['complexity']['total']) is float
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+import numpy as np
+
+from communication import (communication_strengths, get_communication,
+                           incidence_product)
+from git_log import GitLog
+from tests.helpers import START, get_renaming_commits
+
+
+def test_incidence_product():
+    authors = np.array([0, 1, 0, 2, 1])
+    files = np.array([0, 0, 1, 1, 2])
+    weights = np.array([1, 2, 3, 4, 5])
+    incidence = np.zeros((3, 3))
+    incidence[authors, files] = weights
+    assert (incidence_product(authors, files, weights,
+                              3) == incidence @ incidence.T).all()
+
+
+def test_communication():
+    git_log = GitLog(root='', commits=get_renaming_commits())
+    begin = START
+    end = START + timedelta(days=10)
+    authors, shared, strength = communication_strengths(git_log=git_log,
+                                                        begin=begin,
+                                                        end=end)
+    assert authors == ['Ada Lovelace', 'Lars Lubkoll']
+    assert shared.tolist() == [[2, 2], [2, 2]]
+    # weighted by revisions
+    assert strength[0, 1] == 95
+    _, _, strength = communication_strengths(git_log=git_log,
+                                             begin=begin,
+                                             end=end,
+                                             method='shared')
+    assert strength[0, 1] == 100
+    assert get_communication(git_log=git_log, begin=begin, end=end) == [{
+        'name': 'Ada Lovelace',
+        'size': 95,
+        'imports': ['Lars Lubkoll']
+    }, {
+        'name': 'Lars Lubkoll',
+        'size': 95,
+        'imports': ['Ada Lovelace']
+    }]
+    assert get_communication(git_log=git_log,
+                             begin=begin + timedelta(days=20),
+                             end=end + timedelta(days=20)) == []
+
+
+def test_large_changesets_are_skipped():
+    git_log = GitLog(root='', commits=get_renaming_commits())
+    begin = START
+    end = START + timedelta(days=10)
+    authors, shared, _ = communication_strengths(git_log=git_log,
+                                                 begin=begin,
+                                                 end=end,
+                                                 max_changeset_size=1)
+    assert authors == ['Lars Lubkoll']
+    assert shared.tolist() == [[1]]
@@ -0,0 +1,43 @@
+import math
+
+from desc_stats import DescriptiveStats, RunningStats
+
+VALUES = [4, 1, 7, 3, 10, 2]
+
+
+def test_descriptive_stats():
+    stats = DescriptiveStats('a.h', VALUES)
+    assert stats.name == 'a.h'
+    assert stats.n_revs == 6
+    assert stats.total == 27
+    assert isinstance(stats.total, int)
+    assert stats.mean() == 4.5
+    assert math.isclose(stats.sd(), math.sqrt(
+        sum((value - 4.5)**2 for value in VALUES) / 6))
+    assert stats.max_value() == 10
+    assert stats.min_value() == 1
+
+    empty = DescriptiveStats('b.h', [])
+    assert (empty.total, empty.mean(), empty.sd(), empty.max_value()) == (0, 0,
+                                                                         0, 0)
+
+
+def test_running_stats_add_merge_remove():
+    expected = RunningStats.from_values(VALUES)
+    added = RunningStats()
+    for value in VALUES:
+        added.add(value)
+    merged = RunningStats.from_values(VALUES[:2]).merge(
+        RunningStats()).merge(RunningStats.from_values(VALUES[2:]))
+    for stats in (added, merged):
+        assert stats.count == expected.count
+        assert stats.total == expected.total
+        assert math.isclose(stats.mean(), expected.mean())
+        assert math.isclose(stats.sd(), expected.sd())
+        assert stats.max_value() == expected.max_value()
+        assert stats.min_value() == expected.min_value()
+
+    added.remove(VALUES[0])
+    rest = RunningStats.from_values(VALUES[1:])
+    assert added.total == rest.total
+    assert math.isclose(added.sd(), rest.sd())
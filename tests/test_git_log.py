@@ -0,0 +1,144 @@
+from datetime import timedelta
+
+from git_data import Change, Commit
+from git_log import GitLog
+from tests.helpers import (START, get_commits, get_renaming_commits,
+                           get_reused_path_commits)
+
+
+def test_window():
+    git_log = GitLog(root='', commits=get_commits())
+    assert git_log.window(begin=START, end=START + timedelta(days=9)) == (0,
+                                                                          10)
+    assert git_log.window(begin=START + timedelta(days=2, hours=1),
+                          end=START + timedelta(days=5)) == (3, 6)
+    assert git_log.window(begin=START + timedelta(days=20),
+                          end=START + timedelta(days=30)) == (10, 10)
+    assert git_log.window(begin=START + timedelta(days=5),
+                          end=START + timedelta(days=2)) == (5, 5)
+
+
+def test_range_bounded_methods():
+    git_log = GitLog(root='', commits=get_commits())
+    begin = START + timedelta(days=7)
+    end = START + timedelta(days=30)
+    assert git_log.commit_msg(begin=begin,
+                              end=end) == ['commit 7', 'commit 8', 'commit 9']
+    assert [commit.sha for commit in git_log.get_commits(begin=begin, end=end)
+            ] == ['sha9', 'sha8', 'sha7']
+    assert git_log.get_revisions(begin=begin, end=end)['a.h']['revisions'] == 3
+    assert [added for _, added, _ in git_log.get_churn_for(
+        filename='a.h', begin=begin, end=end)] == [7, 8, 9]
+
+
+def test_file_identities():
+    git_log = GitLog(root='', commits=get_renaming_commits())
+    identities = git_log.identities
+    file_id = identities.id_of('a.h')
+    assert identities.id_of('src/a.h') == file_id
+    assert identities.id_of('src/c.h') == file_id
+    assert identities.id_of('b.h') != file_id
+    assert identities.current_path(file_id) == 'src/c.h'
+    assert identities.path_at(file_id, 0) == 'a.h'
+    assert identities.path_at(file_id, 3) == 'src/a.h'
+    assert identities.path_at(file_id, 4) == 'src/c.h'
+
+
+def test_queries_follow_renames():
+    git_log = GitLog(root='', commits=get_renaming_commits())
+    begin = START
+    end = START + timedelta(days=10)
+    revisions = git_log.get_revisions_only(begin=begin, end=end)
+    assert set(revisions.keys()) == {'src/c.h', 'b.h'}
+    assert revisions['src/c.h']['revisions'] == 4
+    assert revisions['b.h']['revisions'] == 5
+    assert [added for _, added, _ in git_log.get_churn_for(
+        filename='src/c.h', begin=begin, end=end)] == [10, 1, 2, 0]
+    assert [(commit.sha, name) for commit, name in git_log.get_commits_for_file(
+        filename='src/c.h', begin=begin, end=end)] == [('sha4', 'src/c.h'),
+                                                      ('sha3', 'src/a.h'),
+                                                      ('sha2', 'src/a.h'),
+                                                      ('sha0', 'a.h')]
+    assert git_log.get_couplings(filename='src/c.h', begin=begin,
+                                 end=end) == ({
+                                     'b.h': 4
+                                 }, 4)
+    assert git_log.get_authors(filename='src/c.h') == {
+        'Ada Lovelace': 0.75,
+        'Lars Lubkoll': 0.25
+    }
+
+
+def test_top_couplings():
+    git_log = GitLog(root='', commits=get_renaming_commits())
+    begin = START
+    end = START + timedelta(days=10)
+    assert git_log.get_top_couplings(begin=begin, end=end) == {
+        'src/c.h': ({
+            'b.h': 4
+        }, 4),
+        'b.h': ({
+            'src/c.h': 4
+        }, 5)
+    }
+    assert git_log.get_top_couplings(begin=begin, end=begin) == {}
+
+
+def test_large_changesets_are_skipped():
+    commits = get_renaming_commits()
+    commits.append(
+        Commit(sha='sha5',
+               creation_time=START + timedelta(days=5),
+               author='Lars Lubkoll',
+               changes=[Change(filename='src/c.h'),
+                        Change(filename='b.h')] +
+               [Change(filename=f'gen/{idx}.h') for idx in range(29)]))
+    git_log = GitLog(root='', commits=commits)
+    begin = START
+    end = START + timedelta(days=10)
+    assert git_log.get_couplings(filename='src/c.h', begin=begin,
+                                 end=end) == ({
+                                     'b.h': 4
+                                 }, 4)
+    assert git_log.get_top_couplings(begin=begin, end=end) == {
+        'src/c.h': ({
+            'b.h': 4
+        }, 4),
+        'b.h': ({
+            'src/c.h': 4
+        }, 5)
+    }
+    assert git_log.get_top_couplings(
+        begin=begin, end=end,
+        max_changeset_size=31)['src/c.h'] == ({
+            'b.h': 5
+        }, 5)
+
+
+def test_path_reused_after_rename():
+    git_log = GitLog(root='', commits=get_reused_path_commits())
+    identities = git_log.identities
+    assert identities.id_of('a.h') != identities.id_of('b.h')
+    assert identities.id_at('a.h', 0) == identities.id_of('b.h')
+    assert identities.current_path(identities.id_of('b.h')) == 'b.h'
+    begin = START
+    end = START + timedelta(days=10)
+    revisions = git_log.get_revisions_only(begin=begin, end=end)
+    assert {name: data['revisions']
+            for name, data in revisions.items()} == {
+                'a.h': 2,
+                'b.h': 3
+            }
+    assert [added for _, added, _ in git_log.get_churn_for(
+        filename='b.h', begin=begin, end=end)] == [10, 1, 2]
+    assert [added for _, added, _ in git_log.get_churn_for(
+        filename='a.h', begin=begin, end=end)] == [20, 3]
+
+
+def test_path_reused_after_deletion():
+    commits = get_reused_path_commits()
+    commits[1].changes = [Change(filename='a.h', removed_lines=10,
+                                 removed=True)]
+    identities = GitLog(root='', commits=commits).identities
+    assert identities.change_ids[1] == identities.change_ids[0]
+    assert identities.change_ids[2] != identities.change_ids[0]
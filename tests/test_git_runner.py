@@ -0,0 +1,21 @@
+from git_runner import GitRunner
+from tests.helpers import create_repository
+
+
+def test_git_runner(tmp_path):
+    create_repository(tmp_path)
+    runner = GitRunner(max_workers=2)
+    try:
+        assert runner.run(str(tmp_path),
+                          ['git', 'ls-tree', '-r', '--name-only',
+                           'HEAD']) == b'a.h\n'
+        assert b''.join(
+            runner.stream(str(tmp_path),
+                          ['git', 'show', 'HEAD:a.h'])) == b'int a;\n'
+        assert runner.show(str(tmp_path), 'HEAD:a.h') == b'int a;\n'
+        assert runner.show(str(tmp_path), 'HEAD:b.h') == b''
+        assert runner.info(str(tmp_path), 'HEAD:a.h')[1:] == ('blob', 7)
+        assert runner.info(str(tmp_path), 'HEAD:b.h') is None
+        assert runner.latencies()['git ls-tree']['count'] == 1
+    finally:
+        runner.close()
@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+CHECK_CODE = '''
+import sys
+import report, update_cache
+print(','.join(sorted({name.split('.')[0] for name in sys.modules} &
+                      {'bokeh', 'circlify', 'wordcloud', 'cProfile'})))
+'''
+
+
+def test_headless_entry_points_do_not_load_visualization():
+    output = subprocess.run([sys.executable, '-c', CHECK_CODE],
+                            stdout=subprocess.PIPE,
+                            cwd=ROOT,
+                            check=True).stdout
+    assert output.decode('utf-8').strip() == ''
@@ -0,0 +1,28 @@
+import instrument
+
+
+def test_disabled_span_is_noop():
+    instrument.reset()
+    with instrument.span('outer'):
+        instrument.count('subprocess_spawns')
+    assert instrument.spans() == []
+    assert instrument.counters() == {}
+
+
+def test_nested_spans_and_counters():
+    instrument.reset()
+    instrument.enable()
+    try:
+        with instrument.span('outer'):
+            with instrument.span('inner'):
+                instrument.count('git_bytes_read', 10)
+    finally:
+        instrument.disable()
+    inner, outer = instrument.spans()
+    assert (inner['name'], inner['depth']) == ('inner', 1)
+    assert (outer['name'], outer['depth']) == ('outer', 0)
+    assert outer['counters'] == {'git_bytes_read': 10}
+    assert outer['duration'] >= inner['duration']
+    events = instrument.as_chrome_trace()['traceEvents']
+    assert [event['ph'] for event in events] == ['X', 'X', 'C']
+    instrument.reset()
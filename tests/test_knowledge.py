@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from git_log import GitLog
+from knowledge import (ContributionIndex, DEFAULT_COLOR, PALETTE,
+                       knowledge_structure, main_authors)
+from tests.helpers import START, get_renaming_commits
+
+
+def test_ownership():
+    git_log = GitLog(root='', commits=get_renaming_commits())
+    index = ContributionIndex(git_log)
+    owners, degrees = index.ownership()
+    file_id = git_log.identities.id_of('src/c.h')
+    assert index.authors[owners[file_id]] == 'Ada Lovelace'
+    assert degrees[file_id] == 11 / 13
+    file_id = git_log.identities.id_of('b.h')
+    assert index.authors[owners[file_id]] == 'Lars Lubkoll'
+    assert degrees[file_id] == 6 / 9
+    assert index.author_colors() == {
+        'Ada Lovelace': PALETTE[0],
+        'Lars Lubkoll': PALETTE[1]
+    }
+
+    window = ContributionIndex.for_window(git_log,
+                                          begin=START + timedelta(days=3),
+                                          end=START + timedelta(days=4))
+    owners, degrees = window.ownership()
+    file_id = git_log.identities.id_of('src/c.h')
+    assert window.authors[owners[file_id]] == 'Lars Lubkoll'
+    assert degrees[file_id] == 1.0
+    assert window.authors_of('src/c.h') == {
+        'Lars Lubkoll': 0.5,
+        'Ada Lovelace': 0.5
+    }
+
+
+def test_main_authors():
+    assert main_authors({'a': 0.5, 'b': 0.2, 'c': 0.2, 'd': 0.1},
+                        max_authors=2) == ({
+                            'a': 0.5,
+                            'b': 0.2,
+                            'c': 0.2
+                        }, 4)
+
+
+def test_knowledge_structure():
+    git_log = GitLog(root='', commits=get_renaming_commits())
+    structure = knowledge_structure(ContributionIndex(git_log),
+                                    sizes={
+                                        'src/c.h': 10,
+                                        'new.h': 1
+                                    })
+    source, new = structure['children']
+    assert source['children'][0] == {
+        'name': 'c.h',
+        'children': [],
+        'size': 10,
+        'weight': 11 / 13,
+        'author_color': PALETTE[0]
+    }
+    assert new['weight'] == 0.0
+    assert new['author_color'] == DEFAULT_COLOR
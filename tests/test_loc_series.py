@@ -0,0 +1,41 @@
+import os
+import subprocess
+
+from loc_series import LocSeries
+
+T0 = 1577836800
+
+
+def commit(root, timestamp: int, msg: str):
+    env = dict(os.environ,
+               GIT_AUTHOR_DATE=f'@{timestamp} +0000',
+               GIT_COMMITTER_DATE=f'@{timestamp} +0000')
+    subprocess.run(['git', 'add', '-A'], cwd=root, check=True)
+    subprocess.run([
+        'git', '-c', 'user.name=Lars Lubkoll', '-c', 'user.email=l@l.de',
+        'commit', '-q', '-m', msg
+    ],
+                   cwd=root,
+                   env=env,
+                   check=True)
+
+
+def test_loc_series(tmp_path):
+    subprocess.run(['git', 'init', '-q', '-b', 'master'],
+                   cwd=tmp_path,
+                   check=True)
+    (tmp_path / 'a.h').write_text('int a;\nint b;\n')
+    (tmp_path / 'key.enc').write_text('secret\n')
+    commit(tmp_path, T0, 'add a.h')
+    (tmp_path / 'b.h').write_text('int a;\n\nint c;\nint d;\n')
+    commit(tmp_path, T0 + 1000, 'add b.h')
+    (tmp_path / 'a.h').unlink()
+    (tmp_path / 'b.h').write_text('int a;\n')
+    commit(tmp_path, T0 + 2000, 'remove a.h')
+
+    series = LocSeries(root=str(tmp_path))
+    assert series.times.tolist() == [T0, T0 + 1000, T0 + 2000]
+    assert series.locs.tolist() == [2, 5, 1]
+    assert series.loc_at(T0 - 1) == 0
+    assert series.loc_at(T0 + 500) == 2
+    assert series.locs_at([T0 + 1000, T0 + 3000]).tolist() == [5, 1]
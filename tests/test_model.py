@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta, timezone
+
+from model import AnalysisModel
+from projects import Project, complete_config
+from update_cache import update_cache
+from tests.helpers import create_repository
+
+
+def test_window_stats_are_shared(tmp_path):
+    repository = tmp_path / 'repository'
+    repository.mkdir()
+    create_repository(repository)
+    directory = str(tmp_path / 'stats')
+    update_cache(root=str(repository), directory=directory)
+    model = AnalysisModel(
+        Project(
+            complete_config({
+                'project': 'test',
+                'path': str(repository),
+                'stats_path': directory,
+                'modules': {'src': '.*'}
+            })))
+
+    begin = datetime(year=2000, month=1, day=1, tzinfo=timezone.utc)
+    end = datetime.now(tz=timezone.utc)
+    stats = model.window_stats(begin=begin, end=end)
+    assert stats.file_stats['a.h']['revisions'] == 1
+    assert model.window_stats(begin=begin, end=end) is stats
+    # the same commits in a different period
+    assert model.window_stats(begin=begin.replace(year=2001),
+                              end=end) is stats
+    assert model.window_stats(begin=begin, end=end +
+                              timedelta(days=1)) is stats
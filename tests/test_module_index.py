@@ -0,0 +1,48 @@
+from module_index import ModuleIndex
+
+CONFIG = {
+    'project': 'Spacy',
+    'modules': {
+        'Algorithms': r'Spacy/Algorithm/(.*)',
+        'Spaces': r'Spacy/Spaces/.*',
+        'Spacy': r'Spacy/.*'
+    }
+}
+
+
+def test_module_index():
+    module_map = ModuleIndex(CONFIG)
+    assert module_map('Spacy/Algorithm/CG/CG.h') == 'Algorithms'
+    assert module_map('Spacy/Spaces/RealSpace.h') == 'Spaces'
+    assert module_map('Spacy/Spacy.h') == 'Spacy'
+    assert module_map('CMakeLists.txt') == 'Project Spacy'
+    assert module_map.module_id('Spacy/Spaces/RealSpace.h') == 1
+
+
+def test_module_index_without_modules():
+    module_map = ModuleIndex({'project': 'Spacy', 'modules': {}})
+    assert module_map('Spacy/Spacy.h') == 'Project Spacy'
+
+
+def test_module_index_keeps_regex_meaning():
+    module_map = ModuleIndex({
+        'project': 'Spacy',
+        'modules': {
+            'Lower': r'(?P<name>[a-z]+)/.*\.h',
+            'Doubled': r'(\w+)/\1\.cpp',
+            'Upper': r'(?P<name>[A-Z]+)/.*'
+        }
+    })
+    assert module_map('lib/core.h') == 'Lower'
+    assert module_map('lib/lib.cpp') == 'Doubled'
+    assert module_map('lib/core.cpp') == 'Project Spacy'
+    assert module_map('LIB/core.cpp') == 'Upper'
+
+    module_map = ModuleIndex({
+        'project': 'Spacy',
+        'modules': {
+            'Src': r'src/.*',
+            'Docs': r'(?i)docs/.*'
+        }
+    })
+    assert module_map('DOCS/index.md') == 'Docs'
@@ -0,0 +1,98 @@
+import os
+import subprocess
+
+import stats_cache
+from projects import ProjectRegistry, complete_config
+from update_cache import update_cache
+from tests.helpers import create_repository
+
+
+def create_project(tmp_path, name: str) -> dict:
+    directory = tmp_path / name
+    directory.mkdir()
+    stats_cache.store_commits([], directory=str(directory))
+    stats_cache.store_stats({'a.h': {}}, directory=str(directory))
+    return complete_config({
+        'project': name,
+        'path': str(tmp_path),
+        'stats_path': str(directory)
+    })
+
+
+def test_registry_evicts_least_recently_used(tmp_path):
+    configs = [create_project(tmp_path, name) for name in ('a', 'b', 'c')]
+    registry = ProjectRegistry(configs, memory_budget=0)
+    assert registry.names() == ['a', 'b', 'c']
+    registry.get('a')
+    registry.get('b')
+    assert registry.loaded() == ['b']
+
+    registry = ProjectRegistry(configs, memory_budget=2**20)
+    project = registry.get('a')
+    registry.get('b')
+    assert registry.get('a') is project
+    assert registry.loaded() == ['b', 'a']
+    stats_path = os.path.join(configs[0]['stats_path'],
+                              stats_cache.STATS_NAME)
+    os.utime(stats_path, (0, 0))
+    assert registry.get('a') is not project
+
+
+def test_update_cache(tmp_path):
+    repository = tmp_path / 'repository'
+    repository.mkdir()
+    create_repository(repository)
+    directory = str(tmp_path / 'stats')
+    assert update_cache(root=str(repository), directory=directory) == 1
+    assert 'a.h' in stats_cache.load_stats(directory=directory)
+    assert update_cache(root=str(repository), directory=directory) == 0
+
+
+def git(root, *args, date: str = None):
+    env = dict(os.environ)
+    if date:
+        env.update(GIT_AUTHOR_DATE=date, GIT_COMMITTER_DATE=date)
+    subprocess.run([
+        'git', '-c', 'user.name=Lars Lubkoll', '-c', 'user.email=l@l.de',
+        *args
+    ],
+                   cwd=root,
+                   env=env,
+                   check=True,
+                   stdout=subprocess.DEVNULL)
+
+
+def test_update_cache_after_merge(tmp_path):
+    repository = tmp_path / 'repository'
+    repository.mkdir()
+    create_repository(repository)
+    git(repository, 'branch', 'side')
+    git(repository, 'checkout', '-q', 'side')
+    (repository / 'b.h').write_text('int b;\n')
+    git(repository, 'add', 'b.h')
+    git(repository, 'commit', '-q', '-m', 'add b.h', date='2030-01-05T00:00')
+    git(repository, 'checkout', '-q', '-')
+    (repository / 'a.h').write_text('int a = 1;\n')
+    git(repository,
+        'commit',
+        '-q',
+        '-am',
+        'change a.h',
+        date='2030-01-03T00:00')
+    git(repository,
+        'merge',
+        '-q',
+        '--no-edit',
+        'side',
+        date='2030-01-04T00:00')
+    directory = str(tmp_path / 'stats')
+    assert update_cache(root=str(repository), directory=directory) == 4
+    # the newest cached commit is on the side branch, not the tip
+    assert stats_cache.load_commits(directory)[-1].msg == 'add b.h'
+
+    (repository / 'a.h').write_text('int a = 2;\n')
+    git(repository, 'commit', '-q', '-am', 'change a.h again',
+        date='2030-01-06T00:00')
+    assert update_cache(root=str(repository), directory=directory) == 1
+    shas = [commit.sha for commit in stats_cache.load_commits(directory)]
+    assert len(shas) == len(set(shas)) == 5
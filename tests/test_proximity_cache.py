@@ -0,0 +1,67 @@
+import json
+from datetime import timedelta
+
+import pytest
+
+from git_log import GitLog
+from proximity_cache import ProximityCache
+from tests.helpers import START, get_commits
+
+
+def test_proximity_cache(tmp_path):
+    computed = []
+
+    def compute(root, sha, previous_sha):
+        computed.append(sha)
+        return {'a.h': f'{previous_sha}..{sha}'}
+
+    path = str(tmp_path / 'proximities.json')
+    cache = ProximityCache(root='', path=path, compute=compute)
+    assert cache.get_all([('c', 'b'), ('b', 'a')]) == [{
+        'a.h': 'b..c'
+    }, {
+        'a.h': 'a..b'
+    }]
+    assert sorted(computed) == ['b', 'c']
+
+    cache = ProximityCache(root='', path=path, compute=compute)
+    assert len(cache) == 2
+    cache.get_all([('c', 'b'), ('d', 'c')])
+    assert sorted(computed) == ['b', 'c', 'd']
+    assert cache.get('c', previous_sha='a') is None
+    with open(path, 'r') as proximities_file:
+        assert len(proximities_file.readlines()) == 2
+
+
+def test_append_to_single_document(tmp_path):
+    path = tmp_path / 'proximities.json'
+    path.write_text(
+        json.dumps({'b': {
+            'previous_sha': 'a',
+            'proximities': {
+                'a.h': 1
+            }
+        }}))
+    cache = ProximityCache(root='',
+                           path=str(path),
+                           compute=lambda root, sha, previous_sha: {'a.h': 2})
+    cache.get_all([('c', 'b')])
+    cache = ProximityCache(root='', path=str(path))
+    assert cache.get('b', 'a') == {'a.h': 1}
+    assert cache.get('c', 'b') == {'a.h': 2}
+
+
+def test_window_proximities_are_read_only():
+    git_log = GitLog(root='', commits=get_commits())
+    git_log._proximity_cache = ProximityCache(
+        root='', path='', compute=lambda root, sha, previous_sha: {'a.h': 1})
+    begin = START
+    end = START + timedelta(days=3)
+    proximities = git_log.read_proximities_from(begin=begin, end=end)
+    assert list(proximities) == ['a.h']
+    assert (proximities['a.h'].count, proximities['a.h'].total) == (3, 3)
+    assert git_log.get_proximities(begin=begin,
+                                   end=end) == [['a.h', 4, 3, 1.0, 0.0, 1]]
+    assert git_log.read_proximities_from(begin=begin, end=end) is proximities
+    with pytest.raises(TypeError):
+        proximities['b.h'] = None
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from git_data import Commit
+from git_log import GitLog
+from rank_change import MetricSeries, RisingHotspots, top_k
+
+START = datetime(year=2020, month=1, day=1, tzinfo=timezone.utc)
+
+
+def test_step():
+    series = MetricSeries(times=[30, 10, 20], values=[3, 1, 2])
+    assert list(series.step([0, 10, 15, 30, 40])) == [0, 1, 1, 3, 3]
+    assert series.window(11, 30) == (1, 3)
+
+
+def test_top_k():
+    assert top_k(['a', 'b', 'c', 'd'], np.array([1, 4, -2, 3]),
+                 2) == [('b', 4), ('d', 3)]
+
+
+def test_rank_changes():
+    git_log = GitLog(root='',
+                     commits=[
+                         Commit(sha=f'sha{idx}',
+                                creation_time=START + timedelta(days=idx))
+                         for idx in range(3)
+                     ])
+
+    def row(lines):
+        return {'lines': lines, 'complexity': {}}
+
+    full_stats = {
+        'a.h': {
+            'sha0': row(100),
+            'sha2': row(10)
+        },
+        'b.h': {
+            'sha0': row(50),
+            'sha1': row(200)
+        },
+        'c.h': {
+            'sha1': row(1)
+        }
+    }
+    rising_hotspots = RisingHotspots(full_stats=full_stats, git_log=git_log)
+    begin = START.timestamp()
+    end = (START + timedelta(days=2)).timestamp()
+    assert rising_hotspots.rank_changes(filenames=full_stats.keys(),
+                                        metric='lines',
+                                        begin=begin,
+                                        end=end) == [('b.h', 1), ('c.h', 0),
+                                                     ('a.h', -1)]
+    x, ys = rising_hotspots.step_series(filenames=['a.h', 'b.h'],
+                                        metric='lines',
+                                        begin=begin,
+                                        end=end)
+    assert len(x) == 3
+    assert list(ys[0]) == [100, 100, 10]
+    assert list(ys[1]) == [50, 200, 200]
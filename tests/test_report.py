@@ -0,0 +1,77 @@
+import io
+import json
+import os
+from datetime import datetime, timezone
+
+import stats_cache
+from columnar_store import StatsView, store_columns
+from report import as_rows, load_caches, write_rows
+from tests.helpers import get_renaming_commits
+
+STATS = {
+    'a.h': {
+        'revisions': 2,
+        'last_change': datetime(2020, 1, 1, tzinfo=timezone.utc),
+        'churn': [{
+            'added_lines': 3,
+            'removed_lines': 1
+        }, {
+            'added_lines': 2,
+            'removed_lines': 0
+        }],
+        'authors': ({
+            'Lars Lubkoll': 1.0
+        }, 1)
+    },
+    'b.h': {
+        'revisions': 5,
+        'mean_complexity': 1 / 3
+    }
+}
+
+
+def test_as_rows():
+    rows = as_rows(STATS, name='file')
+    assert [row['file'] for row in rows] == ['b.h', 'a.h']
+    assert rows[0]['mean_complexity'] == 0.3333
+    assert rows[1] == {
+        'file': 'a.h',
+        'revisions': 2,
+        'last_change': '2020-01-01T00:00:00+00:00',
+        'added_lines': 5,
+        'removed_lines': 1,
+        'authors': 'Lars Lubkoll (1.0)',
+        'n_authors': 1
+    }
+
+
+def test_write_rows():
+    rows = as_rows(STATS, name='file')
+    output = io.StringIO()
+    write_rows(rows, output, 'csv')
+    lines = output.getvalue().splitlines()
+    assert lines[0] == ('file,revisions,mean_complexity,last_change,'
+                        'added_lines,removed_lines,authors,n_authors')
+    assert lines[1] == 'b.h,5,0.3333,,,,,'
+    output = io.StringIO()
+    write_rows(rows, output, 'json')
+    assert json.loads(output.getvalue()) == rows
+
+
+def test_load_caches(tmp_path):
+    directory = str(tmp_path)
+    commits = get_renaming_commits()
+    stats = {'b.h': {}}
+    stats_cache.store_commits(commits, directory=directory)
+    stats_cache.store_stats(stats, directory=directory)
+    assert load_caches(directory)[1] == stats
+
+    store_columns(commits=commits, stats=stats, directory=directory)
+    loaded, full_stats = load_caches(directory)
+    assert isinstance(full_stats, StatsView)
+    assert [commit.sha for commit in loaded
+            ] == [commit.sha for commit in commits]
+
+    stats_path = os.path.join(directory, stats_cache.STATS_NAME)
+    os.utime(stats_path, (2**31, 2**31))
+    assert not isinstance(load_caches(directory)[1], StatsView)
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from git_log import GitLog
+from module_index import ModuleIndex
+from sliding_window import SlidingWindow
+from tests.helpers import START, get_renaming_commits
+
+MODULE_MAP = ModuleIndex({'project': 'test', 'modules': {'src': 'src/.*'}})
+
+
+def window_bounds(first_day: int, last_day: int):
+    return START + timedelta(days=first_day), START + timedelta(days=last_day)
+
+
+def test_sliding_window_matches_recomputation():
+    commits = get_renaming_commits()
+    full_stats = {
+        'src/c.h': {
+            commit.sha: {
+                'proximity': idx
+            }
+            for idx, commit in enumerate(commits)
+        }
+    }
+    git_log = GitLog(root='', commits=commits)
+    window = SlidingWindow(git_log=git_log,
+                           module_map=MODULE_MAP,
+                           full_stats=full_stats)
+    for first_day, last_day in [(0, 1), (1, 2), (2, 3), (1, 4), (0, 4),
+                                (3, 3), (0, 2), (4, 9), (0, 1)]:
+        begin, end = window_bounds(first_day, last_day)
+        window.move(begin=begin, end=end)
+        assert window.revisions() == git_log.get_revisions_only(begin=begin,
+                                                                end=end)
+        assert window.module_revisions() == git_log.get_revisions_for_module(
+            begin=begin, end=end, module_map=MODULE_MAP)
+        in_window = [
+            idx for idx in range(first_day, min(last_day, 4) + 1)
+            if idx != 1
+        ]
+        assert window.proximity('src/c.h')['proximity'] == sum(in_window)
+        assert window.proximity('src/c.h')['proximity_max'] == max(
+            in_window, default=0)
+
+
+def test_sliding_window_authors():
+    git_log = GitLog(root='', commits=get_renaming_commits())
+    begin, end = window_bounds(0, 3)
+    window = SlidingWindow(git_log=git_log).move(begin=begin, end=end)
+    assert window.authors('src/c.h') == {
+        'Ada Lovelace': 2 / 3,
+        'Lars Lubkoll': 1 / 3
+    }
+    assert window.authors('unknown.h') == {}
+
+
+def test_panning_adds_only_entering_commits():
+    git_log = GitLog(root='', commits=get_renaming_commits())
+    window = SlidingWindow(git_log=git_log, module_map=MODULE_MAP)
+    calls = []
+
+    def record(name, update):
+        def recorded(idx, left):
+            calls.append((name, idx))
+            update(idx, left)
+
+        return recorded
+
+    window._add = record('add', window._add)
+    window._remove = record('remove', window._remove)
+    window.move(*window_bounds(0, 1))
+    calls.clear()
+    # the +/- buttons move the window by its own length
+    begin, end = window_bounds(2, 3)
+    window.move(begin=begin, end=end)
+    assert calls == [('add', 2), ('add', 3)]
+    assert window.revisions() == git_log.get_revisions_only(begin=begin,
+                                                            end=end)
+    calls.clear()
+    window.move(*window_bounds(3, 4))
+    assert calls == [('remove', 2), ('add', 4)]
@@ -0,0 +1,12 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from source_data import float_column, int_column, time_column
+
+
+def test_columns():
+    assert int_column([1, 2]).dtype == np.int32
+    assert np.isnan(float_column([1.5, None])).tolist() == [False, True]
+    assert time_column([datetime(2020, 1, 1, tzinfo=timezone.utc)
+                        ]).tolist() == [datetime(2020, 1, 1)]
@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+import stats_cache
+
+
+def test_store_replaces_whole_files(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    stats_cache.store_stats({'a.h': {}}, directory=directory)
+    stats_cache.store_head('sha0', directory=directory)
+    assert sorted(os.listdir(directory)) == ['head', 'stats.json']
+
+    def fail(src, dst):
+        raise OSError('interrupted')
+
+    monkeypatch.setattr(os, 'replace', fail)
+    with pytest.raises(OSError):
+        stats_cache.store_stats({'b.h': {}}, directory=directory)
+    assert stats_cache.load_stats(directory=directory) == {'a.h': {}}
+    assert stats_cache.load_head(directory=directory) == 'sha0'
@@ -0,0 +1,11 @@
+from tree_cache import TreeSnapshots
+from tests.helpers import create_repository
+
+
+def test_tree_snapshots(tmp_path):
+    create_repository(tmp_path)
+    snapshots = TreeSnapshots(root=str(tmp_path))
+    files = snapshots.files('HEAD')
+    assert files == {'a.h'}
+    assert snapshots.files(snapshots.tree_sha('HEAD')) is files
+    assert snapshots.files('unknown') == frozenset()
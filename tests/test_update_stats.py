@@ -1,5 +1,7 @@
+from file_identity import FileIdentityIndex
 from git_data import get_commit_list
-from update_stats import compute_stats
+from update_stats import compute_stats, rekey_stats
+from tests.helpers import get_reused_path_commits
 
 
 def get_complexity(filename: str, sha: str):
@@ -19,3 +21,31 @@ def test_compute_stats():
         assert stats['LICENSE']['b3d38b33']['complexity']['mean'] == 1.3
         assert stats['LICENSE']['b3d38b33']['complexity']['sd'] == 0.3
         assert stats['LICENSE']['b3d38b33']['complexity']['max'] == 3
+
+
+def test_rekey_stats_keeps_reused_paths_apart():
+    commits = get_reused_path_commits()
+    # stats of the first commit stored before the rename was known
+    stats = {
+        'a.h': {
+            'sha0': {
+                'name': 'a.h'
+            },
+            'sha2': {
+                'name': 'a.h'
+            },
+            'sha4': {
+                'name': 'a.h'
+            }
+        },
+        'b.h': {
+            'sha1': {
+                'name': 'b.h'
+            }
+        }
+    }
+    rekey_stats(stats, FileIdentityIndex(commits))
+    assert {name: sorted(rows) for name, rows in stats.items()} == {
+        'a.h': ['sha2', 'sha4'],
+        'b.h': ['sha0', 'sha1']
+    }
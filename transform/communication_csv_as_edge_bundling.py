@@ -5,7 +5,8 @@
 ## Hierarchical Edge Bundling visualization (see https://gist.github.com/mbostock/7607999)
 ##
 ## The input data is read from a Code Maat CSV file containg the result 
-## of a <communication> analysis.
+## of a <communication> analysis. communication.py --method shared
+## computes the same document directly from the commit history.
 #######################################################################
 
 import argparse
@@ -27,11 +28,11 @@ def validate_content_by(heading, expected):
 
 def parse_csv(filename, parse_action, expected_format=None):
     def read_heading_from(r):
-        p = r.next()
+        p = next(r)
         while p == []:
-            p = r.next()
+            p = next(r)
         return p
-    with open(filename, 'rb') as csvfile:
+    with open(filename, 'r', newline='') as csvfile:
         r = csv.reader(csvfile, delimiter=',')
         heading = read_heading_from(r)
         validate_content_by(heading, expected_format)
@@ -69,7 +70,7 @@ def aggregate_links_per_author_in(peer_links):
 ######################################################################
 
 def write_json(result):
-    print json.dumps(result)
+    print(json.dumps(result))
 
 ######################################################################
 ## Main
@@ -80,7 +81,7 @@ def run(args):
                             expected_format='author,peer,shared,average,strength',
                             parse_action=parse_peers)
     links_by_author = aggregate_links_per_author_in(peer_links)
-    write_json(links_by_author.values())
+    write_json(list(links_by_author.values()))
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Generates a JSON document suitable for communication diagrams.')
@@ -1,5 +1,7 @@
 import os
 
+from transform.hierarchy import build_hierarchy
+
 
 class StructuralElement(object):
     def __init__(self, name, complexity):
@@ -32,62 +34,11 @@ def module_weight_calculator_from(analysis_results):
     return normalized_weight_for
 
 
-######################################################################
-## Building the structure of the system
-######################################################################
-
-
-def _matching_part_in(hierarchy, part):
-    return next((x for x in hierarchy if x['name'] == part), None)
-
-
-def _ensure_branch_exists(hierarchy, branch):
-    existing = _matching_part_in(hierarchy, branch)
-    if not existing:
-        new_branch = {'name': branch, 'children': []}
-        hierarchy.append(new_branch)
-        existing = new_branch
-    return existing
-
-
-def _add_leaf(hierarchy, module, weight_calculator, name):
-    # TODO: augment with weight here!
-    new_leaf = {
-        'name': name,
-        'children': [],
+def generate_structure_from(modules, weight_calculator):
+    return build_hierarchy((module.name, {
         'size': module.complexity,
         'weight': weight_calculator(module.name)
-    }
-    hierarchy.append(new_leaf)
-    return hierarchy
-
-
-def _insert_parts_into(hierarchy, module, weight_calculator, parts):
-    """ Recursively traverse the hierarchy and insert the individual parts 
-        of the module, one by one.
-        The parts specify branches. If any branch is missing, it's
-        created during the traversal. 
-        The final part specifies a module name (sans its path, of course).
-        This is where we add size and weight to the leaf.
-    """
-    if len(parts) == 1:
-        return _add_leaf(hierarchy, module, weight_calculator, name=parts[0])
-    next_branch = parts[0]
-    existing_branch = _ensure_branch_exists(hierarchy, next_branch)
-    return _insert_parts_into(existing_branch['children'],
-                              module,
-                              weight_calculator,
-                              parts=parts[1:])
-
-
-def generate_structure_from(modules, weight_calculator):
-    hierarchy = []
-    for module in modules:
-        parts = module.parts()
-        _insert_parts_into(hierarchy, module, weight_calculator, parts)
-
-    structure = {'name': 'root', 'children': hierarchy}
-    return structure
+    }) for module in modules)
 
 
 def run(stats):
@@ -0,0 +1,35 @@
+######################################################################
+## Building the structure of the system
+######################################################################
+
+
+def path_parts(path: str):
+    return [part for part in path.split('/') if part]
+
+
+def build_hierarchy(leaves, root_name: str = 'root'):
+    """ Builds the nested {'name', 'children'} structure of a D3.js
+        enclosure diagram in a single pass.
+        leaves yields (path, attributes) pairs, the attributes are added
+        to the leaf node of the path. Branches are looked up by their path
+        prefix in a dict instead of a linear search among the siblings.
+    """
+    root = {'name': root_name, 'children': []}
+    nodes = {}
+    for path, attributes in leaves:
+        parts = path_parts(path)
+        key = ()
+        children = root['children']
+        for part in parts[:-1]:
+            key = (key, part)
+            node = nodes.get(key)
+            if node is None:
+                node = {'name': part, 'children': []}
+                nodes[key] = node
+                children.append(node)
+            children = node['children']
+        leaf = {'name': parts[-1], 'children': []}
+        leaf.update(attributes)
+        children.append(leaf)
+        nodes.setdefault((key, parts[-1]), leaf)
+    return root
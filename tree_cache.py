@@ -0,0 +1,50 @@
+import sys
+import threading
+from typing import FrozenSet
+
+from git_runner import get_runner
+
+
+class TreeSnapshots:
+    """ File listings of the git trees of one repository, keyed by tree sha.
+        Revisions are resolved through the long-lived cat-file process and
+        each tree is listed only once.
+    """
+    def __init__(self, root: str) -> None:
+        self._root = root
+        self._lock = threading.Lock()
+        self._trees = {}
+
+    def tree_sha(self, rev: str) -> str:
+        info = get_runner().info(self._root, f'{rev}^{{tree}}')
+        return info[0] if info else ''
+
+    def files(self, rev: str = 'master') -> FrozenSet[str]:
+        tree_sha = self.tree_sha(rev)
+        with self._lock:
+            files = self._trees.get(tree_sha)
+        if files is None:
+            files = frozenset(
+                sys.intern(line.decode('utf-8', errors='replace'))
+                for line in get_runner().run(
+                    self._root,
+                    ['git', 'ls-tree', '-r', '--name-only', tree_sha
+                     ]).split(b'\n') if line) if tree_sha else frozenset()
+            with self._lock:
+                self._trees[tree_sha] = files
+        return files
+
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_tree_snapshots(root: str) -> TreeSnapshots:
+    with _snapshots_lock:
+        if root not in _snapshots:
+            _snapshots[root] = TreeSnapshots(root=root)
+        return _snapshots[root]
+
+
+def files_in_tree(root: str, rev: str = 'master') -> FrozenSet[str]:
+    return get_tree_snapshots(root).files(rev)
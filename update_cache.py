@@ -1,62 +1,74 @@
 import argparse
-from collections import defaultdict
-from git_log import get_full_log, get_log_after_revision
+from git_log import get_full_log, get_head, get_log_after_revision
 import os
-from update_stats import compute_new_stats, compute_stats
+from columnar_store import store_columns
+from update_stats import compute_stats, rekey_stats
+from file_identity import FileIdentityIndex
 from git_data import get_commit_list
 import stats_cache
 from stats import get_loc_in_revision, get_complexity, get_proximities_for_file
 
-CACHENAME = 'cache.json'
-COMMITSNAME = 'commits.json'
-
-# def compute_stats(commits: List[Commit], get_loc, get_complexity):
-
 
 def parse_args():
     parser = argparse.ArgumentParser(description='update cache')
     parser.add_argument('--root', help='repo root dir')
+    parser.add_argument('--stats-path',
+                        default='.',
+                        help='directory of the cache files')
 
     return parser.parse_args()
 
 
-if __name__ == "__main__":
-    print('start cache update')
-    args = parse_args()
-    stats = defaultdict(dict)
+def update_cache(root: str, directory: str = '.') -> int:
+    """ Appends the commits after the tip cached last time to the cache in
+        directory and updates the stats of the files changed by them.
+        Returns the number of new commits.
+    """
+    os.makedirs(directory, exist_ok=True)
+    stats = {}
     commits = []
-    if os.path.isfile(COMMITSNAME):
-        commits = stats_cache.load_commits()
+    if os.path.isfile(os.path.join(directory, stats_cache.COMMITS_NAME)):
+        commits = stats_cache.load_commits(directory=directory)
 
-    if os.path.isfile(CACHENAME):
+    if os.path.isfile(os.path.join(directory, stats_cache.STATS_NAME)):
         print('load cache update')
-        stats = stats_cache.load_stats()
+        stats = stats_cache.load_stats(directory=directory)
 
-    print('get last sha')
-    last_sha = stats.get('last_sha')
-    last_sha = '9f7ebce4'
+    # commits are sorted by time, the last one need not be the tip of the
+    # history cached last time, e.g. with merged side branches
+    last_sha = stats_cache.load_head(directory) or (commits[-1].sha
+                                                    if commits else None)
+    head = get_head(root)
 
     print('get git log')
     git_log = get_log_after_revision(
-        root=args.root, sha=last_sha) if last_sha else get_full_log(
-            root=args.root)
+        root=root, sha=last_sha, rev=head) if last_sha else get_full_log(
+            root=root, rev=head)
     print('get commits')
-    new_commits = get_commit_list(git_log=git_log)
-    commits.extend(new_commits)
+    cached_shas = {commit.sha for commit in commits}
+    new_commits = [
+        commit for commit in get_commit_list(git_log=git_log)
+        if commit.sha not in cached_shas
+    ]
+    if not new_commits:
+        stats_cache.store_head(head, directory=directory)
+        return 0
+    # commits of a merged side branch can be older than cached ones
+    commits = sorted(commits + new_commits,
+                     key=lambda commit: commit.creation_time)
     print(f'COMMITS: {len(commits)}')
-    stats_cache.store_commits(commits=commits)
 
     def get_loc(filename: str, sha: str):
         return 0
-        # return get_loc_in_revision(root=args.root, filename=filename, sha=sha)
+        # return get_loc_in_revision(root=root, filename=filename, sha=sha)
 
     def _get_complexity(filename: str, sha: str):
-        return get_complexity(root=args.root, filename=filename, sha=sha)
+        return get_complexity(root=root, filename=filename, sha=sha)
 
     def _get_proximity(filename: str, sha: str, previous_sha):
         if previous_sha is None:
             return 0
-        return get_proximities_for_file(root=args.root,
+        return get_proximities_for_file(root=root,
                                         filename=filename,
                                         sha=sha,
                                         previous_sha=previous_sha)
@@ -66,9 +78,19 @@ if __name__ == "__main__":
                               get_loc=get_loc,
                               get_complexity=_get_complexity,
                               get_proximity=_get_proximity)
-    if 'Spacy/Spaces/RealSpace.h' in new_stats:
-        print('FOUND2')
+    rekey_stats(stats, FileIdentityIndex(commits))
     for filename, data in new_stats.items():
-        stats[filename].update(data)
+        stats.setdefault(filename, {}).update(data)
     print('store cache update')
-    stats_cache.store_stats(stats)
+    # each file is replaced as a whole, the head only after the data
+    stats_cache.store_commits(commits=commits, directory=directory)
+    stats_cache.store_stats(stats, directory=directory)
+    store_columns(commits=commits, stats=stats, directory=directory)
+    stats_cache.store_head(head, directory=directory)
+    return len(new_commits)
+
+
+if __name__ == "__main__":
+    print('start cache update')
+    args = parse_args()
+    update_cache(root=args.root, directory=args.stats_path)
@@ -1,27 +1,20 @@
 from collections import defaultdict
-from git_log import BackwardTraversal, ForwardTraversal, in_interval
+from file_identity import FileIdentityIndex
 from typing import List
 from git_data import Commit
-from copy import deepcopy
 
 
 def compute_stats(commits: List[Commit], get_loc, get_complexity,
                   get_proximity):
+    """ Returns the stats of every change, keyed by the latest name of the
+        changed file and the commit sha.
+    """
     stats = defaultdict(lambda: defaultdict(dict))
+    identities = FileIdentityIndex(commits)
 
     previous_sha = None
-
-    def op(commit: Commit):
-        nonlocal previous_sha
-        for change in commit.changes:
-            if change.old_filename and change.old_filename in stats:
-                if change.old_filename not in stats:
-                    print(f'{commit.sha} {change}')
-                    print(f'kezs {stats.keys()}')
-                stats[change.filename] = deepcopy(stats[change.old_filename])
-            # if change.filename == 'Examples/FEniCS/PDE/Nonlinear_Heat_Transfer_PenaltyBC/CMakeLists.txt':
-            #     print(f'sha: {commit.sha}')
-            #     print(f'removed: {change.removed}')
+    for idx, commit in enumerate(commits):
+        for change, file_id in zip(commit.changes, identities.change_ids[idx]):
             if change.removed:
                 continue
             lines, complexity = get_complexity(filename=change.filename,
@@ -30,7 +23,7 @@ def compute_stats(commits: List[Commit], get_loc, get_complexity,
             proximity = get_proximity(filename=change.filename,
                                       sha=commit.sha,
                                       previous_sha=previous_sha)
-            stats[change.filename][commit.sha] = {
+            stats[identities.current_path(file_id)][commit.sha] = {
                 'name': change.filename,
                 'loc': loc,
                 'lines': lines,
@@ -40,12 +33,25 @@ def compute_stats(commits: List[Commit], get_loc, get_complexity,
             }
         previous_sha = commit.sha
 
-    for commit in commits:
-        op(commit)
-
+    return stats
 
-#    ForwardTraversal(commits=commits, op=op)()
 
+def rekey_stats(stats, identities: FileIdentityIndex):
+    """ Moves the stats of renamed files to their latest name. Each row
+        belongs to the file that had the row's name at the row's commit.
+    """
+    for filename in list(stats.keys()):
+        for sha in list(stats[filename].keys()):
+            row = stats[filename][sha]
+            file_id = identities.id_in(row.get('name', filename), sha)
+            if file_id is None:
+                continue
+            current_path = identities.current_path(file_id)
+            if current_path != filename:
+                stats.setdefault(current_path,
+                                 {})[sha] = stats[filename].pop(sha)
+        if not stats[filename]:
+            del stats[filename]
     return stats
 
 